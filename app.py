@@ -1,10 +1,17 @@
-from flask import Flask, request, jsonify, send_file, send_from_directory
+from flask import Flask, Response, g, request, jsonify, send_file, send_from_directory, stream_with_context
 from flask_cors import CORS
 import io
 import os
-import shutil
-from src.model import openai_model_with_mcp_tools
-from src.reentry_care_plan import generate_reentry_care_plan, get_candidates_by_name
+import re
+import time
+from src.model import HRA_CACHE, stream_stats as hra_stream_stats
+from src.hra import generate_hra_document, generate_hra_batch, HRAGenerationError, HRA_DATA_MODES
+from src.jobs import JobQueue, QueueFull
+from src.llm_client import DeadlineExceeded, llm_stats
+from src.reentry_care_plan import generate_reentry_care_plan_document, generate_reentry_care_plans_bulk, get_candidates_by_name, search_candidates, SEARCH_INDEX, REENTRY_DOCUMENTS
+from src.db import pool_stats as cloud_sql_pool_stats
+from src.report import DOCX_MIMETYPE, FORMATS, UnsupportedFormat, negotiate_format
+from src.telemetry import log_event, observe_request, render_metrics, reset_endpoint, set_endpoint
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -12,7 +19,82 @@ load_dotenv()
 
 # Create Flask app with static folder for frontend
 app = Flask(__name__, static_folder='frontend', static_url_path='')
-CORS(app)
+# ETag is exposed so the frontend can revalidate documents it already downloaded
+CORS(app, expose_headers=['ETag'])
+
+# Bounded background queue for HRA jobs (HRA_JOBS_WORKERS / _MAX_PENDING / _DIR / _TTL_S)
+HRA_JOBS = JobQueue.from_env("HRA_JOBS")
+
+# Synchronous HRA calls must finish (retries included) before gunicorn's 120 s worker timeout
+HRA_REQUEST_DEADLINE_S = float(os.getenv("HRA_REQUEST_DEADLINE_S", "100"))
+
+def request_deadline():
+    """time.monotonic() deadline for this request; clients may shorten it with X-Request-Timeout (seconds)."""
+    budget = HRA_REQUEST_DEADLINE_S
+    try:
+        budget = min(budget, float(request.headers.get('X-Request-Timeout', budget)))
+    except ValueError:
+        pass
+    return time.monotonic() + budget
+
+def docx_response(doc_io, filename, mimetype=DOCX_MIMETYPE, as_attachment=True, etag=None):
+    """
+    Send an in-memory DOCX (or other buffer) as a download with an explicit Content-Length.
+    With a strong `etag`, a matching If-None-Match is answered with 304 on GET/HEAD and
+    with 412 on other methods, as RFC 9110 §13.1.2 requires.
+    """
+    if etag is not None and request.if_none_match.contains_weak(etag):
+        response = Response(status=304 if request.method in ('GET', 'HEAD') else 412)
+        response.set_etag(etag)
+    else:
+        response = send_file(doc_io, as_attachment=as_attachment, download_name=filename, mimetype=mimetype,
+                             etag=etag or False)
+        response.content_length = doc_io.getbuffer().nbytes
+    if etag is not None:
+        # Documents hold personal data: browsers may keep them, but must revalidate and shared caches must not store them
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+    return response
+
+def requested_format(data):
+    """Output format from ?format= or the JSON body's "format", else the Accept header (DOCX for */*)."""
+    accept = request.accept_mimetypes
+    return negotiate_format(
+        request.args.get('format') or data.get('format'),
+        accept.best_match if accept else None
+    )
+
+def document_response(doc_io, basename, fmt, etag=None):
+    """Send a rendered document; HTML and JSON previews are served inline, the rest as downloads."""
+    mimetype, extension = FORMATS[fmt]
+    response = docx_response(doc_io, f"{basename}.{extension}", mimetype, as_attachment=fmt not in ('html', 'json'), etag=etag)
+    response.vary.add('Accept')
+    return response
+
+# Per-request latency and the endpoint label for every stage timed while serving it
+@app.before_request
+def start_request_timer():
+    # The route pattern (not the raw path) keeps the label set small
+    g.endpoint_label = request.url_rule.rule if request.url_rule else 'unmatched'
+    g.endpoint_token = set_endpoint(g.endpoint_label)
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_time(response):
+    if 'request_start' in g:
+        observe_request(g.endpoint_label, response.status_code, time.perf_counter() - g.request_start)
+    return response
+
+@app.teardown_request
+def clear_endpoint_label(error=None):
+    token = g.pop('endpoint_token', None)
+    if token is not None:
+        reset_endpoint(token)
+
+# Prometheus scrape target: per-stage and per-request latency histograms for all workers
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
 
 # Serve frontend files
 @app.route('/')
@@ -38,36 +120,51 @@ def serve_images(filename):
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
-    return jsonify({'status': 'healthy', 'message': 'Backend is running'})
+    return jsonify({
+        'status': 'healthy',
+        'message': 'Backend is running',
+        'cloud_sql_pool': cloud_sql_pool_stats(),
+        'hra_cache': HRA_CACHE.stats(),
+        'hra_stream': hra_stream_stats(),
+        'openai': llm_stats(),
+        'search_index': SEARCH_INDEX.stats(),
+        'reentry_doc_cache': REENTRY_DOCUMENTS.stats() if REENTRY_DOCUMENTS is not None else 'off'
+    })
+
+# Drop cached HRA extraction results
+@app.route('/invalidate_hra_cache', methods=['POST'])
+def invalidate_hra_cache_endpoint():
+    """Invalidate one candidate/table-set entry, or the whole HRA cache when no candidate is given"""
+    data = request.get_json(silent=True) or {}
+    candidate_name = data.get('candidate_name') or None
+    HRA_CACHE.invalidate(candidate_name, data.get('selected_fields', []))
+    return jsonify({'success': True, 'hra_cache': HRA_CACHE.stats()})
 
 # Get candidates by name endpoint
 @app.route('/get_candidates_by_name', methods=['POST'])
 def get_candidates_endpoint():
     """Get all candidate profiles for a given name"""
-    print("\n=== GET_CANDIDATES_BY_NAME ENDPOINT ===")
     try:
         data = request.get_json()
-        print(f"📥 INPUT: {data}")
         candidate_name = data.get('candidate_name', '').strip()
         
         if not candidate_name:
-            print("❌ ERROR: No candidate name provided")
             return jsonify({'error': 'Candidate name is required'}), 400
         
-        print(f"🔍 SEARCHING for candidates with name: '{candidate_name}'")
-        
         # Call the utility function
-        print("🔧 CALLING get_candidates_by_name()...")
         candidates = get_candidates_by_name(candidate_name)
-        print(f"📊 FOUND {len(candidates)} candidates: {candidates}")
         
         # Format response
+        # Each candidate is "Name — Medical ID-XXXX | Telephone Number- ... | Residential Address- ..."
         profiles = []
-        for name, medical_id in candidates:
+        for entry in candidates:
+            match = re.search(r"^(.*?)\s+— Medical ID-(\d+)", entry)
+            if not match:
+                continue
             profiles.append({
-                'name': name,
-                'medical_id': medical_id,
-                'display_text': f"{name} (ID: {medical_id})"
+                'name': match.group(1),
+                'medical_id': match.group(2),
+                'display_text': entry
             })
         
         result = {
@@ -75,67 +172,105 @@ def get_candidates_endpoint():
             'candidates': profiles,
             'count': len(profiles)
         }
-        print(f"📤 OUTPUT: {result}")
+        log_event('candidates_found', count=len(profiles))
         return jsonify(result)
         
     except Exception as e:
-        print(f"❌ ERROR in get_candidates_endpoint: {e}")
+        log_event('request_failed', level='error', error=str(e))
         return jsonify({'error': str(e)}), 500
-    finally:
-        print("=== END GET_CANDIDATES_BY_NAME ===")
+
+# Typeahead over the in-memory candidate index (no backend round trip per keystroke)
+SEARCH_MAX_LIMIT = 50
+
+@app.route('/search_candidates', methods=['GET'])
+def search_candidates_endpoint():
+    """Prefix and typo-tolerant candidate matches for ?q= (optional &limit=, default 10)"""
+    query = request.args.get('q', '').strip()
+    try:
+        limit = min(max(int(request.args.get('limit', 10)), 1), SEARCH_MAX_LIMIT)
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    if not query:
+        return jsonify({'success': True, 'query': query, 'candidates': [], 'count': 0})
+
+    candidates = search_candidates(query, limit)
+    return jsonify({
+        'success': True,
+        'query': query,
+        'candidates': candidates,
+        'count': len(candidates)
+    })
 
 # Reentry Care Plan endpoint
-@app.route('/generate_reentry_care_plan', methods=['POST'])
+@app.route('/generate_reentry_care_plan', methods=['GET', 'POST'])
 def generate_reentry_endpoint():
-    """Handle Reentry Care Plan generation"""
-    print("\n=== GENERATE_REENTRY_CARE_PLAN ENDPOINT ===")
+    """Handle Reentry Care Plan generation (GET takes the same fields as query parameters and can be revalidated)"""
     try:
-        data = request.get_json()
-        print(f"📥 INPUT: {data}")
+        if request.method == 'GET':
+            data = {
+                'candidate_name': request.args.get('candidate_name', ''),
+                'selected_fields': request.args.getlist('selected_fields'),
+            }
+        else:
+            data = request.get_json()
         selected_fields = data.get('selected_fields', [])
         candidate_name = data.get('candidate_name', '')
         
         if not candidate_name:
-            print("❌ ERROR: No candidate name provided")
             return jsonify({'error': 'Candidate name is required'}), 400
         
         if not selected_fields:
-            print("❌ ERROR: No fields selected")
             return jsonify({'error': 'At least one field must be selected'}), 400
         
-        print(f"🏗️ GENERATING Reentry Care Plan for '{candidate_name}'")
-        print(f"📋 SELECTED FIELDS ({len(selected_fields)}): {selected_fields}")
+        try:
+            fmt = requested_format(data)
+        except UnsupportedFormat as e:
+            return jsonify({'error': str(e)}), 406
         
-        # Call your existing reentry function
-        print("🔧 CALLING generate_reentry_care_plan()...")
-        doc_io = generate_reentry_care_plan(selected_fields, candidate_name)
+        # Cached by content; a GET for an unchanged plan is answered with 304 when the client sends its ETag
+        document = generate_reentry_care_plan_document(selected_fields, candidate_name, fmt)
         
-        if doc_io is None:
-            print("❌ ERROR: Document generation failed")
+        if document is None:
             return jsonify({'error': 'Failed to generate care plan'}), 500
-            
-        print("📄 DOCUMENT generated successfully")
         
-        # Save the document to a file for download
-        output_path = "data/reentry_output.docx"
-        with open(output_path, 'wb') as f:
-            f.write(doc_io.getvalue())
-        
-        # Return the file for download
-        filename = f"{candidate_name}_reentry_care_plan.docx"
-        print(f"📤 SENDING FILE: {filename}")
-        return send_file(
-            output_path,
-            as_attachment=True,
-            download_name=filename,
-            mimetype='application/vnd.openxmlformats-officedocument.wordprocessingml.document'
-        )
+        # Serve the in-memory buffer directly (no temp file)
+        etag, doc_io = document
+        log_event('document_generated', format=fmt, fields=len(selected_fields), bytes=doc_io.getbuffer().nbytes)
+        return document_response(doc_io, f"{candidate_name}_reentry_care_plan", fmt, etag=etag)
         
     except Exception as e:
-        print(f"❌ ERROR in reentry endpoint: {e}")
+        log_event('request_failed', level='error', error=str(e))
+        return jsonify({'error': str(e)}), 500
+
+# Bulk Reentry Care Plan export (one pass per source, streamed ZIP)
+REENTRY_BULK_MAX_ITEMS = int(os.getenv("REENTRY_BULK_MAX_ITEMS", "1000"))
+
+@app.route('/generate_reentry_care_plans_bulk', methods=['POST'])
+def generate_reentry_bulk_endpoint():
+    """Stream a ZIP of care plans for many people (formatted candidates or Medical IDs)"""
+    data = request.get_json(silent=True) or {}
+    selected_fields = data.get('selected_fields', [])
+    people = data.get('candidates', [])
+
+    if not people:
+        return jsonify({'error': 'At least one candidate is required'}), 400
+    if len(people) > REENTRY_BULK_MAX_ITEMS:
+        return jsonify({'error': f'At most {REENTRY_BULK_MAX_ITEMS} candidates per export'}), 400
+    if not selected_fields:
+        return jsonify({'error': 'At least one field must be selected'}), 400
+
+    try:
+        chunks = generate_reentry_care_plans_bulk(selected_fields, people)
+    except Exception as e:
+        log_event('request_failed', level='error', error=str(e))
         return jsonify({'error': str(e)}), 500
-    finally:
-        print("=== END GENERATE_REENTRY_CARE_PLAN ===")
+
+    filename = f"reentry_care_plans_{len(people)}.zip"
+    return Response(
+        stream_with_context(chunks),
+        mimetype='application/zip',
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
 
 # Adult Health Risk Assessment endpoint
 @app.route('/generate_hra_adult', methods=['POST'])
@@ -152,36 +287,27 @@ def generate_hra_adult_endpoint():
         if not selected_fields:
             return jsonify({'error': 'At least one field must be selected'}), 400
         
-        print(f"Generating Adult HRA for {candidate_name} with fields: {selected_fields}")
+        mode = data.get('mode')
+        if mode and mode not in HRA_DATA_MODES:
+            return jsonify({'error': f"mode must be one of {list(HRA_DATA_MODES)}"}), 400
         
-        # Call your OpenAI MCP function
-        result = openai_model_with_mcp_tools(selected_fields, candidate_name)
+        try:
+            fmt = requested_format(data)
+        except UnsupportedFormat as e:
+            return jsonify({'error': str(e)}), 406
         
-        if isinstance(result, dict):
-            # If successful, the function already generated the DOCX via json_to_docx_append_vertical_tables
-            output_path = "data/output.docx"  # This is where document_pre.py saves the file
-            
-            if not os.path.exists(output_path):
-                return jsonify({'error': 'Document generation failed - output file not created'}), 500
-            
-            # Rename the file for this specific use case
-            final_path = f"data/{candidate_name}_adult_hra.docx"
-            
-            # Copy the generated file to the final path
-            shutil.copy(output_path, final_path)
-            
-            return send_file(
-                final_path,
-                as_attachment=True,
-                download_name=f"{candidate_name}_adult_hra.docx",
-                mimetype='application/vnd.openxmlformats-officedocument.wordprocessingml.document'
-            )
-        else:
-            # If there was an error, return it
-            return jsonify({'error': f'Failed to generate HRA: {result}'}), 500
-            
+        log_event('hra_requested', assessment_type='adult', format=fmt, tables=len(selected_fields))
+        
+        # Fetch (LLM or direct mode), build the document in memory and stream it straight back
+        doc_io = generate_hra_document(selected_fields, candidate_name, mode, data.get('stream'), request_deadline(), fmt)
+        return document_response(doc_io, f"{candidate_name}_adult_hra", fmt)
+
+    except HRAGenerationError as e:
+        return jsonify({'error': str(e)}), 500
+    except DeadlineExceeded as e:
+        return jsonify({'error': str(e)}), 504
     except Exception as e:
-        print(f"Error in adult HRA endpoint: {e}")
+        log_event('request_failed', level='error', error=str(e))
         return jsonify({'error': str(e)}), 500
 
 # Juvenile Health Risk Assessment endpoint
@@ -199,36 +325,161 @@ def generate_hra_juvenile_endpoint():
         if not selected_fields:
             return jsonify({'error': 'At least one field must be selected'}), 400
         
-        print(f"Generating Juvenile HRA for {candidate_name} with fields: {selected_fields}")
+        mode = data.get('mode')
+        if mode and mode not in HRA_DATA_MODES:
+            return jsonify({'error': f"mode must be one of {list(HRA_DATA_MODES)}"}), 400
         
-        # Call your OpenAI MCP function
-        result = openai_model_with_mcp_tools(selected_fields, candidate_name)
+        try:
+            fmt = requested_format(data)
+        except UnsupportedFormat as e:
+            return jsonify({'error': str(e)}), 406
         
-        if isinstance(result, dict):
-            # If successful, the function already generated the DOCX via json_to_docx_append_vertical_tables
-            output_path = "data/output.docx"  # This is where document_pre.py saves the file
-            
-            if not os.path.exists(output_path):
-                return jsonify({'error': 'Document generation failed - output file not created'}), 500
-            
-            # Rename the file for this specific use case
-            final_path = f"data/{candidate_name}_juvenile_hra.docx"
-            
-            # Copy the generated file to the final path
-            shutil.copy(output_path, final_path)
-            
-            return send_file(
-                final_path,
-                as_attachment=True,
-                download_name=f"{candidate_name}_juvenile_hra.docx",
-                mimetype='application/vnd.openxmlformats-officedocument.wordprocessingml.document'
-            )
-        else:
-            # If there was an error, return it
-            return jsonify({'error': f'Failed to generate HRA: {result}'}), 500
-            
+        log_event('hra_requested', assessment_type='juvenile', format=fmt, tables=len(selected_fields))
+        
+        # Fetch (LLM or direct mode), build the document in memory and stream it straight back
+        doc_io = generate_hra_document(selected_fields, candidate_name, mode, data.get('stream'), request_deadline(), fmt)
+        return document_response(doc_io, f"{candidate_name}_juvenile_hra", fmt)
+
+    except HRAGenerationError as e:
+        return jsonify({'error': str(e)}), 500
+    except DeadlineExceeded as e:
+        return jsonify({'error': str(e)}), 504
+    except Exception as e:
+        log_event('request_failed', level='error', error=str(e))
+        return jsonify({'error': str(e)}), 500
+
+# Asynchronous HRA jobs: submit, poll, download
+HRA_JOB_KINDS = ('adult', 'juvenile')
+
+@app.route('/hra_jobs', methods=['POST'])
+def submit_hra_job_endpoint():
+    """Queue an HRA and return its job id immediately (429 when the queue is full)"""
+    data = request.get_json(silent=True) or {}
+    kind = data.get('assessment_type', 'adult')
+    selected_fields = data.get('selected_fields', [])
+    candidate_name = data.get('candidate_name', '')
+
+    if kind not in HRA_JOB_KINDS:
+        return jsonify({'error': f"assessment_type must be one of {list(HRA_JOB_KINDS)}"}), 400
+    if not candidate_name:
+        return jsonify({'error': 'Candidate name is required'}), 400
+    if not selected_fields:
+        return jsonify({'error': 'At least one field must be selected'}), 400
+    mode = data.get('mode')
+    if mode and mode not in HRA_DATA_MODES:
+        return jsonify({'error': f"mode must be one of {list(HRA_DATA_MODES)}"}), 400
+
+    try:
+        job_id = HRA_JOBS.submit(
+            generate_hra_document, selected_fields, candidate_name, mode, data.get('stream'),
+            filename=f"{candidate_name}_{kind}_hra.docx"
+        )
+    except QueueFull:
+        response = jsonify({'error': 'Too many HRA jobs in progress, retry later'})
+        response.headers['Retry-After'] = '30'
+        return response, 429
+
+    return jsonify({
+        'job_id': job_id,
+        'status': 'queued',
+        'status_url': f"/hra_jobs/{job_id}",
+        'download_url': f"/hra_jobs/{job_id}/download"
+    }), 202
+
+@app.route('/hra_jobs/<job_id>', methods=['GET'])
+def hra_job_status_endpoint(job_id):
+    """Report queued / running / done / failed for a job"""
+    meta = HRA_JOBS.status(job_id)
+    if meta is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(meta)
+
+@app.route('/hra_jobs/<job_id>/download', methods=['GET'])
+def hra_job_download_endpoint(job_id):
+    """Serve the finished document for a job"""
+    meta = HRA_JOBS.status(job_id)
+    if meta is None:
+        return jsonify({'error': 'Job not found'}), 404
+    path = HRA_JOBS.result_path(job_id)
+    if path is None:
+        return jsonify({'error': f"Job is {meta['status']}", 'status': meta['status']}), 409
+    # MIME type follows the file name (.docx for single HRAs, .zip for batches)
+    return send_file(path, as_attachment=True, download_name=meta['filename'])
+
+# Batch HRA generation for a whole cohort
+HRA_BATCH_MAX_ITEMS = int(os.getenv("HRA_BATCH_MAX_ITEMS", "200"))
+# Synchronous batches share one request deadline, so only what fits in it runs inline
+# (HRA_BATCH_CONCURRENCY renders at a time); larger batches must go through the job queue
+HRA_BATCH_SYNC_MAX_ITEMS = int(os.getenv("HRA_BATCH_SYNC_MAX_ITEMS", "8"))
+
+@app.route('/generate_hra_batch', methods=['POST'])
+def generate_hra_batch_endpoint():
+    """
+    Generate HRAs for many candidates and return one ZIP (one DOCX per candidate plus
+    manifest.json). 'candidates' holds names or {candidate_name, selected_fields,
+    assessment_type} objects; top-level selected_fields / assessment_type are the defaults.
+    With "async": true the batch runs as an /hra_jobs job instead; batches over
+    HRA_BATCH_SYNC_MAX_ITEMS candidates must be sent that way.
+    """
+    data = request.get_json(silent=True) or {}
+    default_kind = data.get('assessment_type', 'adult')
+    default_fields = data.get('selected_fields', [])
+    entries = data.get('candidates', [])
+
+    if not isinstance(entries, list):
+        return jsonify({'error': 'candidates must be a list'}), 400
+    if not entries:
+        return jsonify({'error': 'At least one candidate is required'}), 400
+    if len(entries) > HRA_BATCH_MAX_ITEMS:
+        return jsonify({'error': f'At most {HRA_BATCH_MAX_ITEMS} candidates per batch'}), 400
+    mode = data.get('mode')
+    if mode and mode not in HRA_DATA_MODES:
+        return jsonify({'error': f"mode must be one of {list(HRA_DATA_MODES)}"}), 400
+
+    items = []
+    for index, entry in enumerate(entries):
+        if isinstance(entry, str):
+            entry = {'candidate_name': entry}
+        if not isinstance(entry, dict):
+            return jsonify({'error': f'candidates[{index}]: must be a name or an object'}), 400
+        item = {
+            'candidate_name': str(entry.get('candidate_name') or '').strip(),
+            'selected_fields': entry.get('selected_fields') or default_fields,
+            'assessment_type': entry.get('assessment_type', default_kind),
+        }
+        if not item['candidate_name']:
+            return jsonify({'error': f'candidates[{index}]: candidate name is required'}), 400
+        if not item['selected_fields']:
+            return jsonify({'error': f'candidates[{index}]: at least one field must be selected'}), 400
+        if item['assessment_type'] not in HRA_JOB_KINDS:
+            return jsonify({'error': f"candidates[{index}]: assessment_type must be one of {list(HRA_JOB_KINDS)}"}), 400
+        items.append(item)
+
+    if not data.get('async') and len(items) > HRA_BATCH_SYNC_MAX_ITEMS:
+        return jsonify({'error': f'Batches over {HRA_BATCH_SYNC_MAX_ITEMS} candidates must be sent with "async": true'}), 400
+
+    log_event('hra_batch_requested', sample=1.0, candidates=len(items))
+    filename = f"hra_batch_{len(items)}_candidates.zip"
+
+    if data.get('async'):
+        try:
+            job_id = HRA_JOBS.submit(generate_hra_batch, items, mode, data.get('stream'), filename=filename)
+        except QueueFull:
+            response = jsonify({'error': 'Too many HRA jobs in progress, retry later'})
+            response.headers['Retry-After'] = '30'
+            return response, 429
+        return jsonify({
+            'job_id': job_id,
+            'status': 'queued',
+            'status_url': f"/hra_jobs/{job_id}",
+            'download_url': f"/hra_jobs/{job_id}/download"
+        }), 202
+
+    try:
+        zip_io = generate_hra_batch(items, mode, data.get('stream'), request_deadline())
+        return docx_response(zip_io, filename, mimetype='application/zip')
     except Exception as e:
-        print(f"Error in juvenile HRA endpoint: {e}")
+        log_event('request_failed', level='error', error=str(e))
         return jsonify({'error': str(e)}), 500
 
 # Error handlers
@@ -0,0 +1,431 @@
+"""
+Offline load test: the Flask endpoints under concurrent load, with local stand-ins
+for every backend.
+
+    python -m benchmarks.load_test [--rows 10000] [--concurrency 8] [--duration 20]
+                                   [--llm-latency 1.0] [--bq-latency 0.05] [--sql-latency 0]
+                                   [--endpoints candidates,reentry,hra_adult,hra_juvenile] [--json out.json]
+
+Stand-ins:
+  - Excel roster: a synthetic workbook with --rows rows (REENTRY_ROSTER_PATH)
+  - Cloud SQL:    a SQLite copy of SocialEconomicLogistics_backup (CLOUD_SQL_URL), plus an
+                  optional --sql-latency sleep per statement for the network round trip
+  - BigQuery:     FakeBigQueryClient, which answers the app's parameterized queries from a
+                  DataFrame after --bq-latency
+  - OpenAI:       a stub for openai_model_with_mcp_tools that returns an HRA dict after
+                  --llm-latency (spread across sections when the request streams)
+
+Generated data is cached under --data-dir by row count and seed, so 1M-row runs only pay
+for generation once. The app is served in-process by a threaded werkzeug server; each
+client thread sends plain HTTP requests in a closed loop. The report gives throughput and
+p50/p95/p99 per endpoint, setup times (roster load, search index build) and the mean time
+per stage from src.telemetry.
+"""
+import argparse
+import http.client
+import json
+import logging
+import os
+import random
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pandas as pd
+
+# Kept in sync with src.reentry_care_plan.SQL_TABLE; importing src here would read the env too early
+SQL_TABLE = "SocialEconomicLogistics_backup"
+
+FIRST_NAMES = [
+    "James", "Maria", "John", "Jane", "Luis", "Ana", "David", "Grace", "Omar", "Emily", "Carlos", "Sofia",
+    "Michael", "Aisha", "Daniel", "Mei", "Jose", "Fatima", "Robert", "Priya", "Kevin", "Lucia", "Andre", "Hana",
+]
+LAST_NAMES = [
+    "Hernandez", "Sanchez", "Doe", "Smith", "Garcia", "Lee", "Davis", "Nguyen", "Brown", "Lopez", "Khan", "Ward",
+    "Martinez", "Kim", "Johnson", "Patel", "Rivera", "Chen", "Williams", "Torres", "Baker", "Flores", "Young", "Reyes",
+]
+
+ROSTER_COLUMNS = [
+    "Name of the youth", "Race/Ethnicity", "Medi-Cal ID Number", "Residential Address", "Telephone",
+    "Medi-Cal health plan assigned", "Screenings", "Clinical Assessments", "Chronic Conditions",
+    "Prescribed Medications", "Treatment History", "Primary physician contacts", "Emergency contacts",
+    "Health Screenings", "Health Assessments",
+]
+REMOTE_COLUMNS = [
+    "medical_id_number", "youth_name", "telephone", "residential_address", "actual_release_date", "court_dates",
+    "scheduled_appointments", "housing", "employment", "income_and_benefits", "life_skills", "family_and_children",
+    "service_referrals", "home_modifications", "durable_medical_equipment", "case_notes",
+]
+
+# What the frontend sends (see frontend/app.js)
+REENTRY_FIELDS = [
+    "Name of the youth (CM)", "Race/Ethnicity (Excel)", "Telephone (Excel)", "Residential Address (Excel)",
+    "Actual release date (CM)", "Court dates (CM)", "Medi-Cal ID Number (CM)", "Screenings (Excel)",
+    "Durable Medical Equipment (SQL)", "Housing (SQL)", "Income and benefits (SQL)", "Employment (CM)",
+    "Life skills (SQL)", "Family and children (SQL)", "Service referrals (SQL)",
+]
+ADULT_TABLES = [
+    "adult_screening", "adult_vital_signs", "adult_allergies_and_diet", "adult_diabetes", "adult_hypertension",
+    "adult_mental_health_screening", "adult_suicide_risk_scale", "adult_substance_use",
+]
+JUVENILE_TABLES = [
+    "juvenile_assessment", "juvenile_family_history", "juvenile_relationships", "juvenile_education_employment",
+    "juvenile_mental_health_history", "juvenile_mental_status_exam",
+]
+
+
+# ---------- synthetic data ----------
+
+def synthetic_people(rows, seed=7):
+    """(name, medical_id, telephone, address) tuples; names repeat now and then, like real rosters."""
+    rng = random.Random(seed)
+    people = []
+    for i in range(rows):
+        name = f"{rng.choice(FIRST_NAMES)} {chr(65 + rng.randrange(26))}. {rng.choice(LAST_NAMES)}"
+        people.append((name, str(9_000_000_000 + i), f"(555) {rng.randrange(100, 999)}-{rng.randrange(1000, 9999)}",
+                       f"{rng.randrange(1, 9999)} Main Street, Los Angeles, CA 900{rng.randrange(10, 99)}"))
+    return people
+
+
+def write_roster(path, people):
+    """Synthetic Excel roster with the same columns as ExcelFiles/reentry5.xlsx."""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(ROSTER_COLUMNS)
+    for name, mid, phone, address in people:
+        sheet.append([name, "Hispanic/Latino", int(mid), address, phone, "Blue Shield of California",
+                      "Depression screening", "General health assessment", "Asthma", "Albuterol Inhaler",
+                      "Mental health: CBT", "Dr. Smith, (555) 987-6543", f"Emergency contact for {name}",
+                      "Depression screening", "General health assessment"])
+    tmp = f"{path}.tmp"
+    workbook.save(tmp)
+    os.replace(tmp, path)
+
+
+def remote_frame(people):
+    """Rows shared by the Cloud SQL and BigQuery stand-ins (snake_case columns, like the real tables)."""
+    names, mids, phones, addresses = zip(*people)
+    data = {"medical_id_number": mids, "youth_name": names, "telephone": phones, "residential_address": addresses}
+    for column in REMOTE_COLUMNS[4:]:
+        data[column] = [f"{column.replace('_', ' ')} details"] * len(people)
+    return pd.DataFrame(data, columns=REMOTE_COLUMNS)
+
+
+def write_sqlite(path, frame, indexes=True):
+    """SocialEconomicLogistics_backup as a SQLite file, optionally with the documented lookup indexes."""
+    tmp = f"{path}.tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    conn = sqlite3.connect(tmp)
+    columns = ", ".join(f'"{c}" TEXT' for c in frame.columns)
+    conn.execute(f'CREATE TABLE "{SQL_TABLE}" ({columns})')
+    placeholders = ", ".join("?" * len(frame.columns))
+    conn.executemany(f'INSERT INTO "{SQL_TABLE}" VALUES ({placeholders})', frame.itertuples(index=False, name=None))
+    if indexes:
+        conn.execute(f'CREATE INDEX ix_mid ON "{SQL_TABLE}" (medical_id_number)')
+        conn.execute(f'CREATE INDEX ix_name ON "{SQL_TABLE}" (youth_name)')
+    conn.commit()
+    conn.close()
+    os.replace(tmp, path)
+
+
+def data_paths(data_dir, rows, seed, sql_indexes):
+    stem = os.path.join(data_dir, f"rows{rows}.seed{seed}")
+    return f"{stem}.xlsx", f"{stem}{'' if sql_indexes else '.noindex'}.sqlite"
+
+
+def prepare_data(data_dir, rows, seed, sql_indexes):
+    """Generate (or reuse) the roster and SQLite files for this row count and seed."""
+    os.makedirs(data_dir, exist_ok=True)
+    roster_path, sqlite_path = data_paths(data_dir, rows, seed, sql_indexes)
+    people = synthetic_people(rows, seed)
+    frame = remote_frame(people)
+    if not os.path.exists(roster_path):
+        write_roster(roster_path, people)
+    if not os.path.exists(sqlite_path):
+        write_sqlite(sqlite_path, frame, sql_indexes)
+    return people, frame
+
+
+# ---------- backend stand-ins ----------
+
+class FakeBigQueryClient:
+    """
+    Enough of bigquery.Client for this app: query() with @mid / @name / @ids parameters
+    (or none, for full-table reads) and a `col`, ... or * select list, and
+    get_table().modified / .schema.
+    """
+
+    def __init__(self, frame, latency=0.0):
+        self.frame = frame
+        self.latency = latency
+        self.modified = pd.Timestamp.now(tz="UTC")
+        self._by_id = frame.groupby("medical_id_number").indices
+        self._by_name = frame.groupby("youth_name").indices
+        self.queries = 0
+        self.bytes_returned = 0
+
+    def _rows(self, params):
+        if "mid" in params:
+            return self.frame.iloc[self._by_id.get(params["mid"], [])]
+        if "name" in params:
+            return self.frame.iloc[self._by_name.get(params["name"], [])]
+        if "ids" in params:
+            positions = [p for mid in params["ids"] for p in self._by_id.get(mid, [])]
+            return self.frame.iloc[positions]
+        return self.frame
+
+    def query(self, sql, job_config=None):
+        self.queries += 1
+        if self.latency:
+            time.sleep(self.latency)
+        params = {}
+        for param in getattr(job_config, "query_parameters", None) or []:
+            params[param.name] = param.values if hasattr(param, "values") else param.value
+        frame = self._rows(params).reset_index(drop=True)
+        select = re.search(r"SELECT\s+(.*?)\s+FROM", sql, re.S).group(1).strip()
+        if select != "*":
+            frame = frame[re.findall(r"`([^`]+)`", select)]
+        self.bytes_returned += int(frame.memory_usage(deep=True, index=False).sum())
+        return SimpleNamespace(to_dataframe=lambda: frame.copy())
+
+    def get_table(self, table_ref):
+        return SimpleNamespace(modified=self.modified,
+                               schema=[SimpleNamespace(name=column) for column in self.frame.columns])
+
+
+def stub_hra_model(latency=1.0):
+    """Stand-in for openai_model_with_mcp_tools: a well-formed HRA dict after `latency` seconds."""
+    from src.hra_data import humanize_key
+    from src.telemetry import timed_stage
+
+    @timed_stage("openai")
+    def openai_model_with_mcp_tools(selected_tables, candidate, on_section=None, deadline=None):
+        result = {"Candidate Name": candidate, "Date of Birth": "1990-05-12", "Inmate Number": "CA0001"}
+        for table in selected_tables:
+            result[humanize_key(table)] = [
+                {"Screening ID": i, "Screened": False, "Notes": f"{table} note {i}", "Follow Up": None}
+                for i in range(1, 4)
+            ]
+        if on_section is None:
+            time.sleep(latency)
+        else:
+            for key, value in result.items():
+                time.sleep(latency / len(result))
+                on_section(key, value)
+        return result
+
+    return openai_model_with_mcp_tools
+
+
+def install_stand_ins(frame, args):
+    """Point the app's module-level clients at the stand-ins (after the env vars are set)."""
+    from sqlalchemy import event
+
+    from src import bigquery_client, db, hra
+
+    bq = FakeBigQueryClient(frame, args.bq_latency)
+    bigquery_client._client = bq
+    hra.openai_model_with_mcp_tools = stub_hra_model(args.llm_latency)
+    if args.sql_latency:
+        event.listen(db.get_engine(), "before_cursor_execute", lambda *_: time.sleep(args.sql_latency))
+    return bq
+
+
+# ---------- load ----------
+
+def workloads(people, rng):
+    """endpoint name → () -> (method, path, JSON body or None)."""
+    def person():
+        return people[rng.randrange(len(people))]
+
+    def display(p):
+        name, mid, phone, address = p
+        return f"{name} — Medical ID-{mid} | Telephone Number- {phone} | Residential Address- {address}"
+
+    return {
+        "candidates": lambda: ("POST", "/get_candidates_by_name", {"candidate_name": person()[0]}),
+        "reentry": lambda: ("POST", "/generate_reentry_care_plan",
+                            {"candidate_name": display(person()), "selected_fields": REENTRY_FIELDS}),
+        "hra_adult": lambda: ("POST", "/generate_hra_adult",
+                              {"candidate_name": person()[0], "selected_fields": rng.sample(ADULT_TABLES, 4)}),
+        "hra_juvenile": lambda: ("POST", "/generate_hra_juvenile",
+                                 {"candidate_name": person()[0], "selected_fields": rng.sample(JUVENILE_TABLES, 4)}),
+        "search": lambda: ("GET", f"/search_candidates?q={person()[0].split()[0][:3]}", None),
+    }
+
+
+def send(port, method, path, body, timeout):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=timeout)
+    try:
+        payload = json.dumps(body).encode("utf-8") if body is not None else None
+        headers = {"Content-Type": "application/json"} if payload is not None else {}
+        start = time.perf_counter()
+        conn.request(method, path, body=payload, headers=headers)
+        response = conn.getresponse()
+        response.read()
+        return response.status, time.perf_counter() - start
+    finally:
+        conn.close()
+
+
+def run_load(port, requests_for, endpoints, concurrency, duration, max_requests, timeout):
+    """Closed loop: each client sends the next endpoint in turn until time or the request budget runs out."""
+    results = {name: [] for name in endpoints}
+    errors = {name: 0 for name in endpoints}
+    lock = threading.Lock()
+    sent = [0]
+    stop_at = time.monotonic() + duration
+
+    def client(offset):
+        i = offset
+        while time.monotonic() < stop_at:
+            with lock:
+                if max_requests and sent[0] >= max_requests:
+                    return
+                sent[0] += 1
+            name = endpoints[i % len(endpoints)]
+            i += 1
+            try:
+                status, elapsed = send(port, *requests_for[name](), timeout)
+            except OSError:
+                status, elapsed = None, None
+            with lock:
+                if status == 200:
+                    results[name].append(elapsed)
+                else:
+                    errors[name] += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="client") as pool:
+        list(pool.map(client, range(concurrency)))
+    return results, errors, time.perf_counter() - start
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, max(0, int(round(q / 100 * len(sorted_values) + 0.5)) - 1))]
+
+
+def summarize(results, errors, wall_s):
+    summary = {}
+    for name, latencies in results.items():
+        latencies = sorted(latencies)
+        summary[name] = {
+            "ok": len(latencies),
+            "errors": errors[name],
+            "throughput_rps": round(len(latencies) / wall_s, 2),
+            **{f"p{q}_ms": None if not latencies else round(percentile(latencies, q) * 1000, 1) for q in (50, 95, 99)},
+            "max_ms": round(latencies[-1] * 1000, 1) if latencies else None,
+        }
+    return summary
+
+
+def stage_means(before, after):
+    """Mean ms per (stage, endpoint) observed between two STAGE_SECONDS snapshots."""
+    means = {}
+    for labels, series in after.items():
+        prior = before.get(labels)
+        count = sum(series[:-1]) - (sum(prior[:-1]) if prior else 0)
+        total = series[-1] - (prior[-1] if prior else 0.0)
+        if count:
+            means["/".join(labels)] = {"count": count, "mean_ms": round(total / count * 1000, 2)}
+    return dict(sorted(means.items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=10000, help="synthetic people per source (10k–1M)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "serrano_load_test"))
+    parser.add_argument("--no-sql-indexes", action="store_true", help="stand-in table without lookup indexes")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds of load")
+    parser.add_argument("--requests", type=int, default=0, help="stop after this many requests (0: no limit)")
+    parser.add_argument("--endpoints", default="candidates,reentry,hra_adult,hra_juvenile",
+                        help="comma-separated subset of candidates,reentry,hra_adult,hra_juvenile,search")
+    parser.add_argument("--llm-latency", type=float, default=1.0, help="seconds per stubbed model call")
+    parser.add_argument("--bq-latency", type=float, default=0.05, help="seconds per fake BigQuery query")
+    parser.add_argument("--sql-latency", type=float, default=0.0, help="extra seconds per SQL statement")
+    parser.add_argument("--timeout", type=float, default=120.0, help="client timeout per request")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    endpoints = [e.strip() for e in args.endpoints.split(",") if e.strip()]
+
+    # The app reads these at import time, so nothing from src is imported before this point
+    roster_path, sqlite_path = data_paths(args.data_dir, args.rows, args.seed, not args.no_sql_indexes)
+    os.environ["REENTRY_ROSTER_PATH"] = roster_path
+    os.environ["CLOUD_SQL_URL"] = f"sqlite:///{sqlite_path}"
+    os.environ.setdefault("LOG_SAMPLE_RATE", "0")
+    os.environ.setdefault("METRICS_DIR", tempfile.mkdtemp(prefix="load-test-metrics-"))
+    os.environ.setdefault("CLOUD_SQL_POOL_SIZE", str(max(args.concurrency, 5)))
+
+    start = time.perf_counter()
+    people, frame = prepare_data(args.data_dir, args.rows, args.seed, not args.no_sql_indexes)
+    setup = {"data_s": round(time.perf_counter() - start, 2)}
+
+    from werkzeug.serving import make_server
+
+    from app import app
+    from src.reentry_care_plan import ROSTER, SEARCH_INDEX
+    from src.telemetry import STAGE_SECONDS
+
+    bq = install_stand_ins(frame, args)
+
+    start = time.perf_counter()
+    ROSTER.records()
+    setup["roster_load_s"] = round(time.perf_counter() - start, 2)
+    if "search" in endpoints:
+        start = time.perf_counter()
+        SEARCH_INDEX.refresh(force=True)
+        SEARCH_INDEX.start()
+        setup["search_index_s"] = round(time.perf_counter() - start, 2)
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, name="load-test-server", daemon=True).start()
+    port = server.server_port
+
+    requests_for = workloads(people, random.Random(args.seed))
+    # One request per endpoint first, so template caches and pools are warm before timing
+    for name in endpoints:
+        send(port, *requests_for[name](), args.timeout)
+
+    before = STAGE_SECONDS.snapshot()
+    bq_before = (bq.queries, bq.bytes_returned)
+    results, errors, wall_s = run_load(port, requests_for, endpoints, args.concurrency, args.duration,
+                                       args.requests, args.timeout)
+    stages = stage_means(before, STAGE_SECONDS.snapshot())
+    server.shutdown()
+
+    summary = summarize(results, errors, wall_s)
+    print(f"\n{args.rows:,} rows, concurrency {args.concurrency}, {wall_s:.1f}s; "
+          f"LLM {args.llm_latency}s, BigQuery {args.bq_latency}s, SQL +{args.sql_latency}s")
+    print("setup: " + ", ".join(f"{k} {v}s" for k, v in setup.items()))
+    bigquery = {"queries": bq.queries - bq_before[0], "bytes_returned": bq.bytes_returned - bq_before[1]}
+    print(f"BigQuery stand-in: {bigquery['queries']} queries, {bigquery['bytes_returned']:,} bytes returned")
+    print(f"\n{'endpoint':<14}{'ok':>7}{'err':>6}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, row in summary.items():
+        cells = [row[k] if row[k] is not None else "-" for k in ("p50_ms", "p95_ms", "p99_ms", "max_ms")]
+        print(f"{name:<14}{row['ok']:>7}{row['errors']:>6}{row['throughput_rps']:>9}" + "".join(f"{c:>10}" for c in cells))
+    print(f"\n{'stage / endpoint':<60}{'count':>8}{'mean ms':>10}")
+    for label, row in stages.items():
+        print(f"{label:<60}{row['count']:>8}{row['mean_ms']:>10}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "setup": setup, "wall_s": round(wall_s, 2),
+                       "endpoints": summary, "stages": stages, "bigquery": bigquery}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Roster startup and lookup time: pd.read_excel + dict indexes vs the memory-mapped Arrow snapshot.
+
+    python -m benchmarks.roster_snapshot [--rows 10000] [--lookups 2000]
+
+Uses the synthetic roster from benchmarks.load_test. For each path it reports the time until
+the first lookup can be answered (what a fresh gunicorn worker pays) and the mean time per
+lookup by name and by Medi-Cal ID. "cold" is the first open after ingest (file not yet in the
+page cache for this process); "warm" is every later worker mapping the same file.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.load_test import synthetic_people, write_roster
+from src import snapshot
+from src.reentry_care_plan import normalize_columns
+from src.roster import RosterStore
+
+
+def startup(path):
+    """A new store, timed until its first name and ID lookups have been answered."""
+    store = RosterStore(path, normalize=normalize_columns)
+    start = time.perf_counter()
+    store.find_by_name("nobody")
+    store.find_by_medical_id("0")
+    return store, time.perf_counter() - start
+
+
+def per_lookup(fn, keys):
+    start = time.perf_counter()
+    found = sum(bool(fn(key)) for key in keys)
+    return (time.perf_counter() - start) / len(keys), found
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    people = synthetic_people(args.rows, args.seed)
+    rng = random.Random(args.seed)
+    sample = [rng.choice(people) for _ in range(args.lookups)]
+    names, ids = [p[0] for p in sample], [p[1] for p in sample]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        roster = os.path.join(tmp, "roster.xlsx")
+        start = time.perf_counter()
+        write_roster(roster, people)
+        print(f"Wrote {args.rows:,}-row roster in {time.perf_counter() - start:.1f}s "
+              f"({os.path.getsize(roster):,} bytes)")
+
+        snapshot.SNAPSHOT_DIR = os.path.join(tmp, "snapshots")
+        snapshot.SNAPSHOTS_ENABLED = False
+        stores = {"pd.read_excel": startup(roster)}
+
+        snapshot.SNAPSHOTS_ENABLED = True
+        metadata = snapshot.write_snapshot(roster)
+        print(f"Ingest (python -m src.snapshot): {metadata['ingest_ms'] / 1000:.2f}s, "
+              f"{metadata['bytes']:,} bytes")
+        stores["snapshot (cold)"] = startup(roster)
+        stores["snapshot (warm)"] = startup(roster)
+
+        print(f"\n  {'path':<18} {'startup':>10} {'by name':>12} {'by id':>12}")
+        for label, (store, seconds) in stores.items():
+            by_name, found_names = per_lookup(store.find_by_name, names)
+            by_id, found_ids = per_lookup(store.find_by_medical_id, ids)
+            assert found_names == found_ids == args.lookups, (label, found_names, found_ids)
+            print(f"  {label:<18} {seconds * 1000:8.1f}ms {by_name * 1e6:10.1f}us {by_id * 1e6:10.1f}us")
+
+        baseline = stores["pd.read_excel"][0]
+        fast = stores["snapshot (warm)"][0]
+        assert all(len(baseline.find_by_name(n)) == len(fast.find_by_name(n)) for n in names[:100])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Cloud SQL lookup microbenchmark against a local SQLite stand-in for
+SocialEconomicLogistics_backup.
+
+    python -m benchmarks.sql_lookup [--rows 100000] [--lookups 500] [--extra-columns 20]
+
+Compares the previous f-string `SELECT *` queries with SQLTableReader (bound
+parameters, projected columns), each with and without the expected indexes.
+The stand-in table has every CANON_MAP column plus `--extra-columns` wide
+unmapped columns, which `SELECT *` drags along and the reader skips.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import pandas as pd
+from sqlalchemy import create_engine, text
+
+from src.reentry_care_plan import CANON_MAP, SQL_READER, SQL_TABLE
+from src.sql_reader import SQLTableReader
+
+RAW_COLUMNS = [c for c in dict.fromkeys(CANON_MAP) if c not in ("medical_id_number", "youth_name")]
+
+
+def build_database(path, rows, extra_columns):
+    engine = create_engine(f"sqlite:///{path}")
+    random.seed(7)
+    first = ["John", "Jane", "Maria", "James", "Emily", "Luis", "Ana", "David", "Grace", "Omar"]
+    last = ["Doe", "Smith", "Garcia", "Lee", "Davis", "Nguyen", "Brown", "Lopez", "Khan", "Ward"]
+    data = {
+        "id": range(rows),
+        "medical_id_number": [str(10**9 + i) for i in range(rows)],
+        "youth_name": [f"{random.choice(first)} {random.choice(last)} {i % 997}" for i in range(rows)],
+    }
+    for col in RAW_COLUMNS:
+        data[col] = [f"{col} value {i}" for i in range(rows)]
+    for n in range(extra_columns):
+        data[f"extra_{n}"] = ["x" * 200] * rows
+    pd.DataFrame(data).to_sql(SQL_TABLE, engine, index=False, chunksize=5000)
+    return engine
+
+
+def old_lookup(conn, person_input, medical_id=None):
+    if medical_id:
+        query = f"SELECT * FROM {SQL_TABLE} WHERE medical_id_number='{medical_id}'"
+    else:
+        query = f"SELECT * FROM {SQL_TABLE} WHERE youth_name='{person_input}'"
+    return pd.read_sql(query, conn)
+
+
+def timed(label, fn, keys):
+    start = time.perf_counter()
+    found = sum(len(fn(key)) for key in keys)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<34} {elapsed / len(keys) * 1000:8.3f} ms/lookup   ({found} rows)")
+
+
+def run(engine, ids, names, label):
+    reader = SQLTableReader(SQL_TABLE, SQL_READER.wanted_columns)
+    with engine.connect() as conn:
+        print(f"{label}: {len(reader.columns(conn))} projected columns")
+        timed("f-string SELECT * by id", lambda k: old_lookup(conn, None, k), ids)
+        timed("bound + projected by id", lambda k: reader.fetch(medical_id=k, conn=conn), ids)
+        timed("f-string SELECT * by name", lambda k: old_lookup(conn, k), names)
+        timed("bound + projected by name", lambda k: reader.fetch(name=k, conn=conn), names)
+    return reader
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--lookups", type=int, default=500)
+    parser.add_argument("--extra-columns", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "standin.sqlite")
+        start = time.perf_counter()
+        engine = build_database(path, args.rows, args.extra_columns)
+        print(f"Built {args.rows} rows in {time.perf_counter() - start:.1f}s")
+
+        with engine.connect() as conn:
+            ids = [str(10**9 + random.randrange(args.rows)) for _ in range(args.lookups)]
+            names = [row[0] for row in conn.execute(
+                text(f"SELECT youth_name FROM {SQL_TABLE} ORDER BY random() LIMIT :n"), {"n": args.lookups})]
+            # The unindexed runs scan the whole table, so they get fewer lookups
+            scan_ids, scan_names = ids[:max(args.lookups // 10, 5)], names[:max(args.lookups // 10, 5)]
+
+        run(engine, scan_ids, scan_names, "No indexes")
+        reader = SQLTableReader(SQL_TABLE, SQL_READER.wanted_columns)
+        with engine.connect() as conn:
+            for ddl in reader.ensure_indexes(conn):
+                print(f"  {ddl}")
+        run(engine, ids, names, "With indexes")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,10 @@ const { useMemo, useState, useEffect, useRef } = React;
 // ---- Data (same as before) ---------------------------------------------------
 const STEPS = ["Reentry Care Plan", "Health Risk Assessment", "Warm Handoff"];
 
+// Last download per request (ETag + blob), so repeats can be revalidated instead of re-sent
+const DOWNLOAD_CACHE = new Map();
+const DOWNLOAD_CACHE_MAX = 20;
+
 const REENTRY_SECTIONS = [
   {
     title: "Personal Identification & Demographics",
@@ -449,11 +453,10 @@ function ReentryCarePlanUI() {
         setLoadingProfiles(true);
         setError("");
         
-        const response = await fetch("http://localhost:5000/get_candidates_by_name", {
-          method: "POST",
-          headers: { "Content-Type": "application/json" },
-          body: JSON.stringify({ candidate_name: candidateName }),
-        });
+        // Typeahead against the backend's in-memory index (no per-keystroke source queries)
+        const response = await fetch(
+          `http://localhost:5000/search_candidates?q=${encodeURIComponent(candidateName.trim())}`
+        );
 
         if (!response.ok) {
           const errorData = await response.json().catch(() => ({ error: `Server error: ${response.status}` }));
@@ -464,8 +467,8 @@ function ReentryCarePlanUI() {
         const profiles = data.candidates || [];
         setCandidateProfiles(profiles);
         
-        // Auto-select if only one profile found
-        if (profiles.length === 1) {
+        // Auto-select if the only match is an exact one (prefix/fuzzy hits still need a pick)
+        if (profiles.length === 1 && profiles[0].match === "exact") {
           setSelectedProfile(profiles[0].medical_id);
           // Update candidate name to full display text including ID
           setCandidateName(profiles[0].display_text);
@@ -485,7 +488,7 @@ function ReentryCarePlanUI() {
     };
 
     // Debounce the API call
-    const timeoutId = setTimeout(fetchCandidates, 500);
+    const timeoutId = setTimeout(fetchCandidates, 200);
     return () => clearTimeout(timeoutId);
   }, [candidateName, activeStep]);
 
@@ -557,22 +560,39 @@ function ReentryCarePlanUI() {
         return;
       }
 
-      const response = await fetch(endpoint, {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ 
-          selected_fields: selectedFields, 
-          candidate_name: finalCandidateForBackend
-        }),
+      const body = JSON.stringify({ 
+        selected_fields: selectedFields, 
+        candidate_name: finalCandidateForBackend
       });
+      // The care plan is fetched with GET, so a document downloaded before can be revalidated:
+      // an unchanged one comes back as an empty 304. The HRA endpoints are POST-only.
+      let options = { method: "POST", headers: { "Content-Type": "application/json" }, body, cache: "no-store" };
+      let requestUrl = endpoint;
+      if (step === "Reentry Care Plan") {
+        const params = new URLSearchParams({ candidate_name: finalCandidateForBackend });
+        selectedFields.forEach((field) => params.append("selected_fields", field));
+        requestUrl = `${endpoint}?${params}`;
+        options = { method: "GET", headers: {}, cache: "no-store" };
+      }
+      const cacheKey = requestUrl === endpoint ? `${endpoint}\n${body}` : requestUrl;
+      const previous = DOWNLOAD_CACHE.get(cacheKey);
+      if (previous) options.headers["If-None-Match"] = previous.etag;
 
-      if (!response.ok) {
+      const response = await fetch(requestUrl, options);
+
+      if (response.status !== 304 && !response.ok) {
         const errorData = await response.json().catch(() => ({ error: `Server error: ${response.status}` }));
         throw new Error(errorData.error || `Server error: ${response.status}`);
       }
 
       // Handle file download
-      const blob = await response.blob();
+      const blob = response.status === 304 ? previous.blob : await response.blob();
+      const etag = response.headers.get("ETag");
+      if (etag && response.status !== 304) {
+        DOWNLOAD_CACHE.delete(cacheKey);
+        DOWNLOAD_CACHE.set(cacheKey, { etag, blob });
+        if (DOWNLOAD_CACHE.size > DOWNLOAD_CACHE_MAX) DOWNLOAD_CACHE.delete(DOWNLOAD_CACHE.keys().next().value);
+      }
       const url = window.URL.createObjectURL(blob);
       const a = document.createElement("a");
       a.href = url;
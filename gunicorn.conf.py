@@ -0,0 +1,15 @@
+import threading
+
+
+def post_fork(server, worker):
+    """Warm each worker's DB pool, BigQuery client and Excel roster without delaying boot."""
+    from src.reentry_care_plan import warm_up
+
+    threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+
+
+def on_starting(server):
+    """Start /metrics from zero: drop worker snapshots left by a previous run."""
+    from src.telemetry import reset_metrics_dir
+
+    reset_metrics_dir()
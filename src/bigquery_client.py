@@ -0,0 +1,17 @@
+import threading
+
+# ✅ BigQuery client — created on first use so importing a module that needs it never touches the network
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_bigquery_client():
+    """Return the process-wide BigQuery client, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from google.cloud import bigquery
+
+                _client = bigquery.Client()
+    return _client
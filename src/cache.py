@@ -0,0 +1,326 @@
+import copy
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Iterable, Optional
+
+# ---------- BACKENDS ----------
+
+
+class LRUBackend:
+    """In-process, size-bounded LRU store (per worker)."""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return copy.deepcopy(self._data[key])
+
+    def set(self, key, entry):
+        with self._lock:
+            self._data[key] = copy.deepcopy(entry)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class DiskBackend:
+    """
+    JSON files in a shared directory, so every gunicorn worker sees the same entries.
+    Reads touch the file's mtime and eviction drops the oldest, which approximates LRU.
+    """
+
+    def __init__(self, directory: str, max_entries: int = 256):
+        self.directory = directory
+        self.max_entries = max_entries
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha256(key.encode("utf-8")).hexdigest() + ".json")
+
+    def _files(self):
+        return [os.path.join(self.directory, f) for f in os.listdir(self.directory) if f.endswith(".json")]
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return entry
+
+    def set(self, key, entry):
+        # Write to a temp file and rename so readers never see a partial entry
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f, default=str)
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            # Don't leave half-written temp files behind (unserializable value, full disk)
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+        self._evict()
+
+    def _evict(self):
+        files = self._files()
+        if len(files) <= self.max_entries:
+            return
+        files.sort(key=lambda p: os.path.getmtime(p) if os.path.exists(p) else 0)
+        for path in files[:len(files) - self.max_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def clear(self):
+        for path in self._files():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def __len__(self):
+        return len(self._files())
+
+
+# ---------- RESULT CACHE ----------
+
+
+class ResultCache:
+    """TTL'd cache of results keyed on (normalized candidate, sorted table set)."""
+
+    def __init__(self, backend=None, ttl: float = 900.0):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, prefix: str, default_dir: Optional[str] = None):
+        """
+        Build a cache from <prefix>_BACKEND (memory | disk | off), <prefix>_TTL_S,
+        <prefix>_MAX_ENTRIES and <prefix>_DIR.
+        """
+        kind = os.getenv(f"{prefix}_BACKEND", "memory").lower()
+        ttl = float(os.getenv(f"{prefix}_TTL_S", "900"))
+        max_entries = int(os.getenv(f"{prefix}_MAX_ENTRIES", "256"))
+        if kind == "off":
+            backend = None
+        elif kind == "disk":
+            directory = os.getenv(f"{prefix}_DIR", default_dir or os.path.join(tempfile.gettempdir(), prefix.lower()))
+            backend = DiskBackend(directory, max_entries=max_entries)
+        else:
+            backend = LRUBackend(max_entries=max_entries)
+        return cls(backend, ttl=ttl)
+
+    @staticmethod
+    def make_key(candidate: str, tables: Iterable[str]) -> str:
+        name = " ".join(str(candidate).split()).lower()
+        table_set = sorted({str(t).strip() for t in tables or []})
+        return json.dumps([name, table_set])
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, candidate, tables) -> Any:
+        """Return the cached value, or None on a miss or an expired entry."""
+        if self.backend is None:
+            return None
+        key = self.make_key(candidate, tables)
+        entry = self.backend.get(key)
+        if entry is None or entry.get("expires_at", 0) < time.time():
+            if entry is not None:
+                self.backend.delete(key)
+            self._count(False)
+            return None
+        self._count(True)
+        return entry["value"]
+
+    def set(self, candidate, tables, value):
+        if self.backend is None:
+            return
+        entry = {"expires_at": time.time() + self.ttl, "value": value}
+        self.backend.set(self.make_key(candidate, tables), entry)
+
+    def invalidate(self, candidate=None, tables=None):
+        """Drop one (candidate, tables) entry, or everything when no candidate is given."""
+        if self.backend is None:
+            return
+        if candidate is None:
+            self.backend.clear()
+        else:
+            self.backend.delete(self.make_key(candidate, tables))
+
+    def stats(self):
+        total = self.hits + self.misses
+        enabled = self.backend is not None
+        return {
+            "backend": type(self.backend).__name__ if enabled else "off",
+            "entries": len(self.backend) if enabled else 0,
+            "ttl_s": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+
+# ---------- DOCUMENT CACHE ----------
+
+
+class DocumentCache:
+    """
+    Rendered documents keyed by a content hash of everything that went into them, in an
+    in-process LRU bounded by entry count and total bytes. Each entry carries a strong
+    ETag derived from its content key, not its bytes: renders of the same content differ
+    (python-docx stamps the time into the zip), and every worker must send the same ETag.
+
+    A second, short-lived index maps a request (person, fields, format) to the content key
+    it produced, so a repeat download within `fresh_s` seconds is served without
+    re-reading the sources.
+    """
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 64 << 20, fresh_s: float = 30.0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.fresh_s = fresh_s
+        self._data = OrderedDict()       # content key → (etag, bytes)
+        self._requests = OrderedDict()   # request key → (content key, recorded at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.fresh_hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls, prefix: str):
+        """
+        Build a cache from <prefix>_BACKEND (memory | off), <prefix>_MAX_ENTRIES,
+        <prefix>_MAX_BYTES and <prefix>_FRESH_S. Returns None when the cache is off.
+        """
+        if os.getenv(f"{prefix}_BACKEND", "memory").lower() == "off":
+            return None
+        return cls(
+            max_entries=int(os.getenv(f"{prefix}_MAX_ENTRIES", "256")),
+            max_bytes=int(os.getenv(f"{prefix}_MAX_BYTES", str(64 << 20))),
+            fresh_s=float(os.getenv(f"{prefix}_FRESH_S", "30")),
+        )
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        """SHA-256 over a canonical JSON encoding of `parts` (dict order does not matter)."""
+        encoded = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def make_etag(content_key: str) -> str:
+        """ETag for a content key (already a SHA-256 of every input to the document)."""
+        return content_key[:32]
+
+    def get(self, content_key):
+        """(etag, bytes) for a content key, or None."""
+        with self._lock:
+            entry = self._data.get(content_key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(content_key)
+            self.hits += 1
+            return entry
+
+    def set(self, content_key, body: bytes):
+        """Store a rendered document and return its (etag, bytes)."""
+        entry = (self.make_etag(content_key), body)
+        if len(body) > self.max_bytes:
+            return entry
+        with self._lock:
+            previous = self._data.pop(content_key, None)
+            if previous is not None:
+                self._bytes -= len(previous[1])
+            self._data[content_key] = entry
+            self._bytes += len(body)
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted) = self._data.popitem(last=False)
+                self._bytes -= len(evicted)
+        return entry
+
+    def remember(self, request_key, content_key):
+        """Record which content a request produced, for fresh_s seconds."""
+        if self.fresh_s <= 0:
+            return
+        with self._lock:
+            self._requests[request_key] = (content_key, time.monotonic())
+            self._requests.move_to_end(request_key)
+            while len(self._requests) > self.max_entries:
+                self._requests.popitem(last=False)
+
+    def get_fresh(self, request_key):
+        """(etag, bytes) last produced by this request if it is recent and still cached, else None."""
+        with self._lock:
+            recorded = self._requests.get(request_key)
+            if recorded is None:
+                return None
+            content_key, at = recorded
+            entry = self._data.get(content_key)
+            if entry is None or time.monotonic() - at > self.fresh_s:
+                del self._requests[request_key]
+                return None
+            self._data.move_to_end(content_key)
+            self.fresh_hits += 1
+            return entry
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._requests.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "fresh_s": self.fresh_s,
+                "hits": self.hits,
+                "fresh_hits": self.fresh_hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / total if total else 0.0,
+            }
@@ -0,0 +1,130 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# ✅ One pooled engine per worker process (created lazily, so never shared across a fork)
+_engine = None
+_engine_lock = threading.Lock()
+
+_stats_lock = threading.Lock()
+_stats = {
+    "connects": 0,        # new DBAPI connections (TCP + auth handshakes)
+    "checkouts": 0,
+    "checkins": 0,
+    "invalidated": 0,
+    "wait_total_s": 0.0,  # time spent waiting for a pooled connection
+    "wait_max_s": 0.0,
+}
+
+
+def _bump(key, amount=1):
+    with _stats_lock:
+        _stats[key] += amount
+
+
+def _pool_settings(url=None):
+    """Pool tuning, overridable per deployment through the environment."""
+    settings = {
+        "pool_size": int(os.getenv("CLOUD_SQL_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("CLOUD_SQL_MAX_OVERFLOW", "2")),
+        "pool_recycle": int(os.getenv("CLOUD_SQL_POOL_RECYCLE", "1800")),
+        "pool_timeout": float(os.getenv("CLOUD_SQL_POOL_TIMEOUT", "10")),
+        "pool_pre_ping": True,
+        "connect_args": {},
+    }
+    if url is None or url.startswith("mysql"):
+        # Fail fast instead of hanging a worker when the DB host is unreachable
+        settings["connect_args"]["connect_timeout"] = int(os.getenv("CLOUD_SQL_CONNECT_TIMEOUT", "5"))
+    elif url.startswith("sqlite"):
+        # Local stand-in (see benchmarks/load_test.py): connections move between pool threads
+        settings["connect_args"]["check_same_thread"] = False
+    return settings
+
+
+def _connection_url():
+    """CLOUD_SQL_URL (any SQLAlchemy URL, e.g. a local stand-in) or the Cloud SQL MySQL instance."""
+    if os.getenv("CLOUD_SQL_URL"):
+        return os.environ["CLOUD_SQL_URL"]
+    user = os.environ["CLOUD_SQL_USER"]
+    password = os.environ["CLOUD_SQL_PASSWORD"]
+    host = os.environ["CLOUD_SQL_HOST"]
+    database = os.getenv("CLOUD_SQL_DATABASE", "serrano")
+    return f"mysql+pymysql://{user}:{password}@{host}/{database}"
+
+
+def _attach_listeners(engine):
+    from sqlalchemy import event
+
+    event.listen(engine, "connect", lambda *_: _bump("connects"))
+    event.listen(engine, "checkout", lambda *_: _bump("checkouts"))
+    event.listen(engine, "checkin", lambda *_: _bump("checkins"))
+    event.listen(engine, "invalidate", lambda *_: _bump("invalidated"))
+
+
+def get_engine():
+    """Return the process-wide Cloud SQL engine, creating it on first use."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                from sqlalchemy import create_engine
+
+                url = _connection_url()
+                engine = create_engine(url, **_pool_settings(url))
+                _attach_listeners(engine)
+                _engine = engine
+    return _engine
+
+
+@contextmanager
+def connection():
+    """Check a connection out of the shared pool, recording how long we waited for it."""
+    engine = get_engine()
+    start = time.perf_counter()
+    conn = engine.connect()
+    waited = time.perf_counter() - start
+    with _stats_lock:
+        _stats["wait_total_s"] += waited
+        _stats["wait_max_s"] = max(_stats["wait_max_s"], waited)
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def ping():
+    """Run a trivial query so the pool holds one live, authenticated connection."""
+    with connection() as conn:
+        conn.exec_driver_sql("SELECT 1")
+
+
+def dispose_engine():
+    """Drop the pool (e.g. in a gunicorn post_fork hook or at shutdown)."""
+    global _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+            _engine = None
+
+
+def pool_stats():
+    """Snapshot of pool occupancy plus cumulative checkout/wait counters."""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats.update(_pool_settings())
+    stats.pop("pool_pre_ping", None)
+    stats.pop("connect_args", None)
+    engine = _engine
+    if engine is None:
+        stats.update({"initialized": False, "checked_out": 0, "overflow": 0, "idle": 0})
+    else:
+        pool = engine.pool
+        stats.update({
+            "initialized": True,
+            "checked_out": pool.checkedout(),
+            "overflow": max(pool.overflow(), 0),
+            "idle": pool.checkedin(),
+        })
+    stats["avg_wait_s"] = stats["wait_total_s"] / stats["checkouts"] if stats["checkouts"] else 0.0
+    return stats
@@ -1,11 +1,18 @@
+import copy
+import hashlib
 import json
-import shutil
-from typing import Dict, Any
+import os
+import threading
+from io import BytesIO
+from typing import Dict, Any, List, Tuple
 from docx import Document
 from docx.shared import Pt
 from docx.oxml import OxmlElement
 from docx.oxml.ns import qn
 
+from src.report import Report, Section, register_docx_layout, render_docx
+from src.telemetry import log_event, stage
+
 # ---------- JSON HELPER ----------
 
 def normalize_str_value(value):
@@ -35,6 +42,117 @@ def extract_base_info(json_obj: Dict[str, Any]) -> Dict[str, Any]:
     return base_info
 
 
+# ---------- TEMPLATE CACHE ----------
+
+TEMPLATE_PATH = "data/Template.docx"
+DOCUMENT_FONT = "Century Gothic"
+# Render from the slim, cached copy of the template (see src/template_prep.py)
+TEMPLATE_SLIM = os.getenv("TEMPLATE_SLIM", "1").lower() in ("1", "true", "yes")
+
+# Styles whose runs should pick up the document font; the rest inherit it from docDefaults
+FONT_STYLE_NAMES = (
+    "Normal", "Normal Table", "TableNormal", "Table Grid", "Title", "Subtitle",
+    "Heading 1", "Heading 2", "Heading 3", "Heading 4", "Heading 5", "Heading 6",
+)
+_RFONTS_ATTRS = ("w:ascii", "w:hAnsi", "w:cs", "w:eastAsia")
+# Theme references win over explicit names, so they are dropped when a font is forced
+_RFONTS_THEME_ATTRS = ("w:asciiTheme", "w:hAnsiTheme", "w:cstheme", "w:eastAsiaTheme")
+
+_templates: Dict[Any, Document] = {}
+_template_versions: Dict[Any, str] = {}
+_templates_lock = threading.Lock()
+
+
+def set_rfonts(rFonts, font_name: str):
+    """Point every script slot of a w:rFonts element at `font_name`. Returns True if it changed."""
+    changed = False
+    for attr in _RFONTS_THEME_ATTRS:
+        if rFonts.get(qn(attr)) is not None:
+            del rFonts.attrib[qn(attr)]
+            changed = True
+    for attr in _RFONTS_ATTRS:
+        if rFonts.get(qn(attr)) != font_name:
+            rFonts.set(qn(attr), font_name)
+            changed = True
+    return changed
+
+
+def apply_document_font(doc: Document, font_name: str = DOCUMENT_FONT):
+    """
+    Make `font_name` the inherited font of the whole document: docDefaults plus the
+    Normal, table and heading styles. Costs O(styles), not O(runs); runs without
+    their own w:rFonts pick the font up through the style chain.
+    """
+    styles = doc.styles.element
+    rPrDefault = styles.find(qn("w:docDefaults") + "/" + qn("w:rPrDefault"))
+    if rPrDefault is None:
+        docDefaults = styles.find(qn("w:docDefaults"))
+        if docDefaults is None:
+            docDefaults = OxmlElement("w:docDefaults")
+            styles.insert(0, docDefaults)
+        rPrDefault = OxmlElement("w:rPrDefault")
+        docDefaults.insert(0, rPrDefault)
+    rPr = rPrDefault.find(qn("w:rPr"))
+    if rPr is None:
+        rPr = OxmlElement("w:rPr")
+        rPrDefault.append(rPr)
+    set_rfonts(rPr.get_or_add_rFonts(), font_name)
+
+    for style in doc.styles:
+        if style.name in FONT_STYLE_NAMES:
+            style_rPr = style.element.get_or_add_rPr()
+            set_rfonts(style_rPr.get_or_add_rFonts(), font_name)
+
+
+def _load_template(template_path: str) -> Document:
+    if TEMPLATE_SLIM:
+        try:
+            from src.template_prep import cached_slim_template
+            return Document(cached_slim_template(template_path))
+        except Exception as e:
+            log_event("slim_template_unavailable", level="warning", template=template_path, error=str(e))
+    return Document(template_path)
+
+
+def _cached_template(template_path: str, font: str = None) -> Document:
+    key = (template_path, font)
+    template = _templates.get(key)
+    if template is None:
+        with _templates_lock:
+            template = _templates.get(key)
+            if template is None:
+                with open(template_path, "rb") as f:
+                    digest = hashlib.sha256(f.read()).hexdigest()
+                template = _load_template(template_path)
+                if font:
+                    apply_document_font(template, font)
+                from src.template_prep import PREP_VERSION
+                slim = PREP_VERSION if TEMPLATE_SLIM else 0
+                _template_versions[key] = hashlib.sha256(f"{digest}|slim={slim}|{font}".encode("utf-8")).hexdigest()[:16]
+                _templates[key] = template
+    return template
+
+
+def new_document_from_template(template_path: str = TEMPLATE_PATH, font: str = None) -> Document:
+    """
+    Return a fresh Document cloned from the template, which is parsed only once per process.
+    The slim copy of the template is used unless TEMPLATE_SLIM is off. With `font`, the
+    cached template is pre-styled once (see apply_document_font), so clones need no
+    per-run font work.
+    """
+    # Deep copy clones the XML part tree; binary parts (fonts, media) share their immutable blobs
+    return copy.deepcopy(_cached_template(template_path, font))
+
+
+def template_version(template_path: str = TEMPLATE_PATH, font: str = None) -> str:
+    """
+    Short hash of the template this process renders from (file content as loaded, slimming
+    and font). Part of rendered-document cache keys, so a template change invalidates them.
+    """
+    _cached_template(template_path, font)
+    return _template_versions[(template_path, font)]
+
+
 # ---------- DOCX HELPERS ----------
 
 def set_table_borders(table):
@@ -51,67 +169,180 @@ def set_table_borders(table):
         tblBorders.append(border)
     tblPr.append(tblBorders)
 
-def set_font(run, font_name="Century Gothic", size=12, bold=False):
-    """Set font for a run (paragraph or cell)."""
-    run.font.name = font_name
-    run._element.rPr.rFonts.set(qn('w:eastAsia'), font_name)
+def set_font(run, font_name=DOCUMENT_FONT, size=12, bold=False):
+    """
+    Set font for a run (paragraph or cell). Pass font_name=None when the document was
+    pre-styled with apply_document_font, so the run inherits it and only size/bold are set.
+    """
+    if font_name is not None:
+        run.font.name = font_name
+        run._element.rPr.rFonts.set(qn('w:eastAsia'), font_name)
     run.font.size = Pt(size)
     run.bold = bold
 
-def add_vertical_table_with_border(doc: Document, section_title: str, data: Dict[str, Any]):
+def append_rows_from_template(table, template_tr, rows):
+    """
+    Append one row per entry of `rows` by cloning `template_tr` and replacing the text of
+    its runs, in cell order. The clone carries the template's cell widths and run
+    properties, so the XML matches what table.add_row().cells + add_run would produce,
+    but each row costs O(1) instead of re-walking the whole grid (O(rows²) overall).
+    """
+    tbl = table._tbl
+    for values in rows:
+        tr = copy.deepcopy(template_tr)
+        for r, text in zip(tr.xpath("./w:tc/w:p/w:r"), values):
+            r.text = text  # same run-content rules as Run.text (tabs, line breaks)
+        tbl.append(tr)
+
+def table_rows(data: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """(key, text) rows exactly as they appear in a vertical table."""
+    rows = []
+    for key, value in data.items():
+        clean_value = normalize_str_value(value)
+        rows.append((str(key), "" if clean_value is None else str(clean_value)))
+    return rows
+
+def add_rows_table_with_border(doc: Document, section_title: str, rows: List[Tuple[str, str]], font_name=DOCUMENT_FONT):
     # Section heading
     heading = doc.add_paragraph()
     run = heading.add_run(section_title)
-    set_font(run, font_name="Century Gothic", size=14, bold=True)
+    set_font(run, font_name=font_name, size=14, bold=True)
 
     # Table
     table = doc.add_table(rows=0, cols=2)
-    for key, value in data.items():
-        clean_value = normalize_str_value(value)
+    if rows:
+        # First row through python-docx; it becomes the template for the rest
+        key_text, value_text = rows[0]
         row_cells = table.add_row().cells
 
         # Apply font to key cell
         p1 = row_cells[0].paragraphs[0]
-        run1 = p1.add_run(str(key))
-        set_font(run1)
+        run1 = p1.add_run(key_text)
+        set_font(run1, font_name=font_name)
 
         # Apply font to value cell
         p2 = row_cells[1].paragraphs[0]
-        run2 = p2.add_run("" if clean_value is None else str(clean_value))
-        set_font(run2)
+        run2 = p2.add_run(value_text)
+        set_font(run2, font_name=font_name)
+
+        append_rows_from_template(table, table._tbl.tr_lst[0], rows[1:])
 
     set_table_borders(table)
     doc.add_paragraph()
 
+def add_vertical_table_with_border(doc: Document, section_title: str, data: Dict[str, Any], font_name=DOCUMENT_FONT):
+    add_rows_table_with_border(doc, section_title, table_rows(data), font_name=font_name)
+
 
 # ---------- MAIN FUNCTION ----------
 
-def json_to_docx_append_vertical_tables(input_json: Dict[str, Any]) -> str:
-    """Generate a Word file with vertical tables from input JSON."""
-    template_path = "data/Template.docx"
-    output_path = "data/output.docx"
-    shutil.copy(template_path, output_path)
-    doc = Document(output_path)
-    
+HRA_TITLE = "Health Risk Assessment"
+BASE_INFO_TITLE = "Candidate Information"
+
+
+def _is_section(value) -> bool:
+    """Top-level list[dict] values are rendered as sections."""
+    return isinstance(value, list) and all(isinstance(i, dict) for i in value)
+
+
+class HRAReportBuilder:
+    """
+    Turns HRA JSON into a format-neutral Report one top-level field at a time.
+
+    Pass `base_info` when the whole dict is known up front; otherwise it is
+    collected from the scalar fields seen before the first section. The
+    "Candidate Information" table always comes first.
+    """
+
+    def __init__(self, base_info: Dict[str, Any] = None):
+        self.report = Report(kind="hra", title=HRA_TITLE)
+        self.fields = []
+        self.base_info = dict(base_info) if base_info is not None else {}
+        self._collect_base_info = base_info is None
+        self._base_rendered = False
+
+    def _add_section(self, section: Section):
+        self.report.sections.append(section)
+
+    def _render_base_info(self):
+        if not self._base_rendered:
+            self._add_section(Section(BASE_INFO_TITLE, table_rows(self.base_info)))
+            self._base_rendered = True
+
+    def add_field(self, key: str, value: Any):
+        self.fields.append(key)
+        if _is_section(value):
+            self._render_base_info()
+            for entry in value:
+                merged = {**self.base_info, **entry}
+                self._add_section(Section(key, table_rows(merged)))
+        elif self._collect_base_info:
+            self.base_info.update(extract_base_info({key: value}))
+
+    def finish(self) -> Report:
+        self._render_base_info()
+        return self.report
+
+
+def _new_hra_document(title: str) -> Document:
+    # Century Gothic comes from the pre-styled template; runs only carry size/bold
+    doc = new_document_from_template(font=DOCUMENT_FONT)
+
     # Add global heading first
     heading = doc.add_paragraph()
     heading.alignment = 1  # 0=left, 1=center, 2=right, 3=justify
-    run = heading.add_run("Health Risk Assessment")
-    set_font(run, font_name="Century Gothic", size=18, bold=True)
+    run = heading.add_run(title)
+    set_font(run, font_name=None, size=18, bold=True)
     run.underline = True
     heading.paragraph_format.space_after = Pt(20)
+    return doc
+
+
+def _document_bytes(doc: Document) -> BytesIO:
+    # Nothing touches disk, so concurrent requests can never see each other's output
+    doc_io = BytesIO()
+    with stage("save"):
+        doc.save(doc_io)
+    doc_io.seek(0)
+    return doc_io
+
+
+@register_docx_layout("hra")
+def hra_report_to_docx(report: Report) -> BytesIO:
+    """DOCX layout for HRA reports: centred title, then one bordered table per section."""
+    doc = _new_hra_document(report.title)
+    for section in report.sections:
+        add_rows_table_with_border(doc, section.title, section.rows, font_name=None)
+    return _document_bytes(doc)
+
 
-    # Base candidate info
-    base_info = extract_base_info(input_json)
-    add_vertical_table_with_border(doc, "Candidate Information", base_info)
+class HRADocumentBuilder(HRAReportBuilder):
+    """
+    HRAReportBuilder that also draws each section into the DOCX as soon as it closes,
+    so tables can be built while the rest of the data is still arriving (see src/model.py).
+    """
 
-    # Iterate over all top-level keys (look for list[dict] to treat as sections)
+    def __init__(self, base_info: Dict[str, Any] = None):
+        super().__init__(base_info)
+        self.doc = _new_hra_document(self.report.title)
+
+    def _add_section(self, section: Section):
+        super()._add_section(section)
+        add_rows_table_with_border(self.doc, section.title, section.rows, font_name=None)
+
+    def to_bytes(self) -> BytesIO:
+        self.finish()
+        return _document_bytes(self.doc)
+
+
+def build_hra_report(input_json: Dict[str, Any]) -> Report:
+    """Format-neutral HRA report for the given model/BigQuery output."""
+    builder = HRAReportBuilder(base_info=extract_base_info(input_json))
     for key, value in input_json.items():
-        if isinstance(value, list) and all(isinstance(i, dict) for i in value):
-            for entry in value:
-                merged = {**base_info, **entry}
-                add_vertical_table_with_border(doc, key, merged)
+        builder.add_field(key, value)
+    return builder.finish()
+
 
-    doc.save(output_path)
-    print(f"Document saved to {output_path}")
-    return output_path
\ No newline at end of file
+def json_to_docx_append_vertical_tables(input_json: Dict[str, Any]) -> BytesIO:
+    """Generate a Word document with vertical tables from input JSON, returned as an in-memory buffer."""
+    return render_docx(build_hra_report(input_json))
\ No newline at end of file
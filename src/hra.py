@@ -0,0 +1,135 @@
+import json
+import os
+import re
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from src.model import openai_model_with_mcp_tools
+from src.document_pre import json_to_docx_append_vertical_tables, HRADocumentBuilder, build_hra_report
+from src.report import render
+from src.cache import ResultCache
+from src.telemetry import stage
+
+# "llm": OpenAI + MCP Bigquery_tool (default). "direct": parameterized BigQuery reads, no LLM.
+HRA_DATA_MODES = ("llm", "direct")
+DEFAULT_HRA_DATA_MODE = os.getenv("HRA_DATA_MODE", "llm")
+# Stream the LLM response and render sections as they arrive
+DEFAULT_HRA_STREAM = os.getenv("HRA_STREAM", "0").lower() in ("1", "true", "yes")
+
+
+class HRAGenerationError(Exception):
+    """The HRA data could not be fetched (candidate or section missing) or the model output parsed."""
+
+
+def fetch_hra_input(selected_fields, candidate_name, mode=None, deadline=None) -> dict:
+    """Fetch the HRA dict consumed by json_to_docx_append_vertical_tables using the chosen mode."""
+    mode = (mode or DEFAULT_HRA_DATA_MODE).lower()
+    if mode not in HRA_DATA_MODES:
+        raise ValueError(f"mode must be one of {list(HRA_DATA_MODES)}")
+
+    if mode == "direct":
+        from src.hra_data import fetch_hra_data, HRADataNotFound, HRASectionUnavailable
+        try:
+            return fetch_hra_data(selected_fields, candidate_name)
+        except (HRADataNotFound, HRASectionUnavailable) as e:
+            raise HRAGenerationError(f"Failed to generate HRA: {e}")
+
+    result = openai_model_with_mcp_tools(selected_fields, candidate_name, deadline=deadline)
+    if not isinstance(result, dict):
+        raise HRAGenerationError(f"Failed to generate HRA: {result}")
+    return result
+
+
+def _generate_streamed(selected_fields, candidate_name, deadline=None) -> BytesIO:
+    """LLM mode with DOCX tables built while the model is still generating."""
+    builder = HRADocumentBuilder()
+    result = openai_model_with_mcp_tools(selected_fields, candidate_name, on_section=builder.add_field, deadline=deadline)
+    if not isinstance(result, dict):
+        raise HRAGenerationError(f"Failed to generate HRA: {result}")
+    if builder.fields != list(result.keys()):
+        # The incremental parse diverged from the final one; render from the authoritative dict
+        return json_to_docx_append_vertical_tables(result)
+    # Most tables were drawn during the stream; this is the remainder plus the save
+    with stage("docx_render"):
+        return builder.to_bytes()
+
+
+def generate_hra_document(selected_fields, candidate_name, mode=None, stream=None, deadline=None, fmt="docx") -> BytesIO:
+    """
+    Fetch HRA data for a candidate and render it to an in-memory document (DOCX by
+    default, or any src.report format). `deadline` (time.monotonic()) bounds the
+    model call, including retries. Streaming only applies to DOCX.
+    """
+    if fmt != "docx":
+        return render(build_hra_report(fetch_hra_input(selected_fields, candidate_name, mode, deadline)), fmt)
+    stream = DEFAULT_HRA_STREAM if stream is None else stream
+    if stream and (mode or DEFAULT_HRA_DATA_MODE).lower() == "llm":
+        return _generate_streamed(selected_fields, candidate_name, deadline)
+    return json_to_docx_append_vertical_tables(fetch_hra_input(selected_fields, candidate_name, mode, deadline))
+
+
+# ---------- BATCH ----------
+
+HRA_BATCH_CONCURRENCY = int(os.getenv("HRA_BATCH_CONCURRENCY", "4"))
+
+
+def _safe_filename(text: str) -> str:
+    return re.sub(r"[^A-Za-z0-9 ._-]+", "_", text).strip() or "candidate"
+
+
+def generate_hra_batch(items, mode=None, stream=None, deadline=None, max_workers=None) -> BytesIO:
+    """
+    Generate HRAs for many candidates and return a ZIP with one DOCX per unique request
+    plus manifest.json. Each item is {"candidate_name", "selected_fields", "assessment_type"}.
+    Identical requests (same type, candidate and table set) are generated once.
+    """
+    unique = {}
+    for item in items:
+        key = (item["assessment_type"], ResultCache.make_key(item["candidate_name"], item["selected_fields"]))
+        unique.setdefault(key, item)
+
+    def build(item):
+        return generate_hra_document(item["selected_fields"], item["candidate_name"], mode, stream, deadline)
+
+    outcomes = {}
+    with ThreadPoolExecutor(max_workers=max_workers or HRA_BATCH_CONCURRENCY, thread_name_prefix="hra-batch") as pool:
+        futures = {key: pool.submit(build, item) for key, item in unique.items()}
+        for key, future in futures.items():
+            try:
+                outcomes[key] = (future.result(), None)
+            except Exception as e:
+                outcomes[key] = (None, str(e))
+
+    zip_io = BytesIO()
+    filenames, used = {}, set()
+    manifest = []
+    with zipfile.ZipFile(zip_io, "w", zipfile.ZIP_DEFLATED) as zf:
+        for key, item in unique.items():
+            doc_io, error = outcomes[key]
+            if doc_io is None:
+                continue
+            base = _safe_filename(f"{item['candidate_name']}_{item['assessment_type']}_hra")
+            name, n = f"{base}.docx", 1
+            while name in used:
+                n += 1
+                name = f"{base}_{n}.docx"
+            used.add(name)
+            filenames[key] = name
+            zf.writestr(name, doc_io.getvalue())
+
+        for item in items:
+            key = (item["assessment_type"], ResultCache.make_key(item["candidate_name"], item["selected_fields"]))
+            error = outcomes[key][1]
+            manifest.append({
+                "candidate_name": item["candidate_name"],
+                "assessment_type": item["assessment_type"],
+                "selected_fields": item["selected_fields"],
+                "status": "error" if error else "success",
+                "file": filenames.get(key),
+                "error": error,
+            })
+        zf.writestr("manifest.json", json.dumps(manifest, indent=2))
+
+    zip_io.seek(0)
+    return zip_io
@@ -0,0 +1,127 @@
+import datetime
+import os
+import re
+from typing import Any, Dict, List
+
+import pandas as pd
+
+from src.bigquery_client import get_bigquery_client
+from src.sources import SourceError, fan_out
+from src.telemetry import timed_stage
+
+# ✅ Direct (LLM-free) access to the HRA tables the MCP Bigquery_tool reads.
+# The schema is configurable because it lives outside this repo.
+HRA_DATASET = os.getenv("HRA_BQ_DATASET", "genai-poc-424806.SerranoAdvisorsBQ")
+HRA_CANDIDATE_TABLE = os.getenv("HRA_CANDIDATE_TABLE", "candidates")
+HRA_CANDIDATE_KEY = os.getenv("HRA_CANDIDATE_KEY", "candidate_id")
+HRA_CANDIDATE_COLUMNS = {
+    "Candidate Name": os.getenv("HRA_CANDIDATE_NAME_COLUMN", "candidate_name"),
+    "Date of Birth": os.getenv("HRA_CANDIDATE_DOB_COLUMN", "date_of_birth"),
+    "Inmate Number": os.getenv("HRA_CANDIDATE_INMATE_COLUMN", "inmate_number"),
+}
+
+_IDENTIFIER_RE = re.compile(r"^[A-Za-z0-9_]+$")
+
+
+class HRADataNotFound(LookupError):
+    """No candidate row matched the requested name."""
+
+
+class HRASectionUnavailable(RuntimeError):
+    """A selected HRA table could not be read (query failed, timed out or BigQuery was saturated)."""
+
+
+def humanize_key(key: str) -> str:
+    """adult_suicide_risk_scale → Adult Suicide Risk Scale, screening_id → Screening ID."""
+    words = str(key).replace("_", " ").split()
+    return " ".join("ID" if w.lower() == "id" else w.capitalize() for w in words)
+
+
+def _plain_value(value):
+    """BigQuery/pandas scalar → the plain Python value the LLM path would emit."""
+    if value is None:
+        return None
+    if isinstance(value, (list, dict)):
+        return value
+    if pd.isna(value):
+        return None
+    if isinstance(value, (pd.Timestamp, datetime.datetime)) and value.tzinfo is None and value.time() == datetime.time():
+        return value.date().isoformat()  # DATE columns come back as midnight timestamps
+    if isinstance(value, (pd.Timestamp, datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if hasattr(value, "item"):
+        return value.item()
+    return value
+
+
+def _table_ref(table: str) -> str:
+    if not _IDENTIFIER_RE.match(table):
+        raise ValueError(f"Invalid HRA table name: {table!r}")
+    return f"`{HRA_DATASET}.{table}`"
+
+
+@timed_stage("bigquery")
+def _query(sql: str, params: Dict[str, Any]) -> pd.DataFrame:
+    from google.cloud import bigquery
+
+    query_parameters = [
+        bigquery.ScalarQueryParameter(name, "INT64" if isinstance(value, int) else "STRING", value)
+        for name, value in params.items()
+    ]
+    job_config = bigquery.QueryJobConfig(query_parameters=query_parameters)
+    return get_bigquery_client().query(sql, job_config=job_config).to_dataframe()
+
+
+def _fetch_candidate(candidate: str) -> Dict[str, Any]:
+    name_column = HRA_CANDIDATE_COLUMNS["Candidate Name"]
+    df = _query(
+        f"SELECT * FROM {_table_ref(HRA_CANDIDATE_TABLE)} "
+        f"WHERE LOWER(TRIM({name_column})) = LOWER(TRIM(@name)) LIMIT 1",
+        {"name": candidate},
+    )
+    if df.empty:
+        raise HRADataNotFound(f"No HRA candidate named {candidate!r}")
+    return df.to_dict(orient="records")[0]
+
+
+def _fetch_section(table: str, candidate_id) -> List[Dict[str, Any]]:
+    df = _query(
+        f"SELECT * FROM {_table_ref(table)} WHERE {HRA_CANDIDATE_KEY} = @cid",
+        {"cid": _plain_value(candidate_id)},
+    )
+    rows, seen = [], set()
+    for record in df.to_dict(orient="records"):
+        record.pop(HRA_CANDIDATE_KEY, None)
+        row = {humanize_key(k): _plain_value(v) for k, v in record.items()}
+        fingerprint = repr(sorted(row.items()))
+        if fingerprint not in seen:
+            seen.add(fingerprint)
+            rows.append(row)
+    return rows
+
+
+def fetch_hra_data(selected_tables, candidate) -> Dict[str, Any]:
+    """
+    Build the same dict the LLM path returns: the three top-level candidate fields,
+    then one "Title Case Table Name": [row, ...] entry per selected table.
+    """
+    for table in selected_tables:
+        _table_ref(table)  # reject bad identifiers before touching BigQuery
+
+    candidate_row = _fetch_candidate(candidate)
+    result = {label: _plain_value(candidate_row.get(column)) for label, column in HRA_CANDIDATE_COLUMNS.items()}
+
+    candidate_id = candidate_row.get(HRA_CANDIDATE_KEY)
+    # Every selected table is required: a blank section would read as "no findings"
+    try:
+        sections = fan_out(
+            {table: (lambda t=table: _fetch_section(t, candidate_id)) for table in selected_tables},
+            default=list, pool="hra_bigquery", required=selected_tables,
+        )
+    except SourceError as e:
+        raise HRASectionUnavailable(
+            "Could not read HRA sections: " + "; ".join(f"{humanize_key(t)} ({reason})" for t, reason in e.failures.items())
+        ) from e
+    for table, rows in sections.items():
+        result[humanize_key(table)] = rows
+    return result
@@ -0,0 +1,147 @@
+import contextvars
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from src.telemetry import log_event
+
+
+class QueueFull(Exception):
+    """Raised when a JobQueue already holds its maximum number of pending jobs."""
+
+
+class JobQueue:
+    """
+    Bounded background executor for document jobs.
+
+    Jobs run on at most `max_workers` threads and at most `max_pending` jobs may be
+    queued or running per process. Job state and finished documents are written to
+    `directory`, so any gunicorn worker can answer status and download requests.
+    """
+
+    _ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+    def __init__(self, directory: str, max_workers: int = 2, max_pending: int = 8, ttl: float = 3600.0):
+        self.directory = directory
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.ttl = ttl
+        os.makedirs(directory, exist_ok=True)
+
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    @classmethod
+    def from_env(cls, prefix: str):
+        """Build a queue from <prefix>_DIR, <prefix>_WORKERS, <prefix>_MAX_PENDING and <prefix>_TTL_S."""
+        return cls(
+            os.getenv(f"{prefix}_DIR", os.path.join(tempfile.gettempdir(), prefix.lower())),
+            max_workers=int(os.getenv(f"{prefix}_WORKERS", "2")),
+            max_pending=int(os.getenv(f"{prefix}_MAX_PENDING", "8")),
+            ttl=float(os.getenv(f"{prefix}_TTL_S", "3600")),
+        )
+
+    # ---------- storage ----------
+
+    def _meta_path(self, job_id):
+        return os.path.join(self.directory, f"{job_id}.json")
+
+    def _result_path(self, job_id):
+        return os.path.join(self.directory, f"{job_id}.bin")
+
+    def _write_meta(self, job_id, meta):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self._meta_path(job_id))
+
+    def _update(self, job_id, **fields):
+        meta = self.status(job_id) or {}
+        meta.update(fields)
+        self._write_meta(job_id, meta)
+
+    def _purge_expired(self):
+        cutoff = time.time() - self.ttl
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    # ---------- public API ----------
+
+    @property
+    def pending(self):
+        return self._pending
+
+    def submit(self, fn, *args, filename=None, **kwargs) -> str:
+        """
+        Queue `fn(*args, **kwargs)`, which must return a BytesIO, and return the job id.
+        Raises QueueFull when this process already has `max_pending` jobs in flight.
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise QueueFull(f"{self._pending} jobs already pending")
+            self._pending += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job")
+
+        self._purge_expired()
+        job_id = uuid.uuid4().hex
+        self._write_meta(job_id, {
+            "job_id": job_id,
+            "status": "queued",
+            "filename": filename,
+            "error": None,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+        })
+        try:
+            self._executor.submit(contextvars.copy_context().run, self._run, job_id, fn, args, kwargs)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+        return job_id
+
+    def _run(self, job_id, fn, args, kwargs):
+        try:
+            self._update(job_id, status="running", started_at=time.time())
+            doc_io = fn(*args, **kwargs)
+            with open(self._result_path(job_id), "wb") as f:
+                f.write(doc_io.getvalue())
+            self._update(job_id, status="done", finished_at=time.time())
+        except Exception as e:
+            log_event("job_failed", level="error", job_id=job_id, error=str(e), traceback=traceback.format_exc())
+            self._update(job_id, status="failed", error=str(e), finished_at=time.time())
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def status(self, job_id):
+        """Job metadata dict, or None for an unknown (or expired) job id."""
+        if not self._ID_RE.match(job_id or ""):
+            return None
+        try:
+            with open(self._meta_path(job_id), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def result_path(self, job_id):
+        """Path of the finished document, or None if the job is not done."""
+        meta = self.status(job_id)
+        if not meta or meta.get("status") != "done":
+            return None
+        path = self._result_path(job_id)
+        return path if os.path.exists(path) else None
@@ -0,0 +1,67 @@
+import ast
+from typing import Any, List, Tuple
+
+
+class TopLevelMemberParser:
+    """
+    Incrementally parse the top-level members of a streamed JSON / Python-literal object.
+
+    Text is fed in arbitrary chunks. Each time a top-level `"key": value` member
+    closes (at the following comma or the final brace) it is evaluated with
+    ast.literal_eval — the same rules as the non-streaming path — and returned.
+    Anything before the first "{" (e.g. a stray preamble) is ignored.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.members = {}
+        self.done = False
+
+        self._pos = 0
+        self._depth = 0
+        self._quote = None
+        self._escape = False
+        self._member_start = None
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """Consume more text and return the members completed by it, in order."""
+        self.text += chunk
+        completed = []
+        text = self.text
+        while self._pos < len(text) and not self.done:
+            ch = text[self._pos]
+            if self._quote:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == self._quote:
+                    self._quote = None
+            elif ch in "\"'":
+                if self._depth > 0:
+                    self._quote = ch
+            elif ch in "{[(" and (self._depth > 0 or ch == "{"):
+                self._depth += 1
+                if self._depth == 1:
+                    self._member_start = self._pos + 1
+            elif ch in "}])" and self._depth > 0:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._emit(text[self._member_start:self._pos], completed)
+                    self.done = True
+            elif ch == "," and self._depth == 1:
+                self._emit(text[self._member_start:self._pos], completed)
+                self._member_start = self._pos + 1
+            self._pos += 1
+        return completed
+
+    def _emit(self, member_text, completed):
+        if not member_text.strip():
+            return
+        try:
+            parsed = ast.literal_eval("{" + member_text + "}")
+        except (ValueError, SyntaxError):
+            return
+        for key, value in parsed.items():
+            self.members[key] = value
+            completed.append((key, value))
@@ -0,0 +1,142 @@
+import os
+import random
+import threading
+import time
+
+import httpx
+import openai
+from openai import OpenAI
+
+from src.telemetry import OPENAI_EVENTS, OPENAI_SECONDS, current_endpoint, histogram_totals, log_event
+
+# ✅ One keep-alive OpenAI client per worker, with our own jittered retries and deadlines
+
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "3"))
+OPENAI_BACKOFF_BASE_S = float(os.getenv("OPENAI_BACKOFF_BASE_S", "1.0"))
+OPENAI_BACKOFF_MAX_S = float(os.getenv("OPENAI_BACKOFF_MAX_S", "20"))
+OPENAI_TIMEOUT_S = float(os.getenv("OPENAI_TIMEOUT_S", "110"))
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+_client = None
+_client_lock = threading.Lock()
+
+LLM_EVENTS = ("calls", "retries", "failures", "deadline_exceeded")
+
+
+class DeadlineExceeded(Exception):
+    """The request's deadline passed before the model call could complete."""
+
+
+def _bump(event, amount=1):
+    OPENAI_EVENTS.inc(event, current_endpoint(), amount=amount)
+
+
+def _http2_available():
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def get_openai_client() -> OpenAI:
+    """
+    Process-wide OpenAI client on a pooled, keep-alive httpx transport. HTTP/2 comes from
+    httpx[http2] in requirements.txt; an environment without h2 falls back to HTTP/1.1.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                http_client = httpx.Client(
+                    http2=_http2_available(),
+                    limits=httpx.Limits(
+                        max_connections=int(os.getenv("OPENAI_MAX_CONNECTIONS", "20")),
+                        max_keepalive_connections=int(os.getenv("OPENAI_MAX_KEEPALIVE", "10")),
+                        keepalive_expiry=float(os.getenv("OPENAI_KEEPALIVE_EXPIRY_S", "120")),
+                    ),
+                    timeout=httpx.Timeout(OPENAI_TIMEOUT_S, connect=10.0),
+                )
+                # Retries are handled in create_response so they can respect the request deadline
+                _client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), http_client=http_client, max_retries=0)
+    return _client
+
+
+def remaining_time(deadline):
+    """Seconds left before a time.monotonic() deadline (None means no deadline)."""
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def check_deadline(deadline):
+    left = remaining_time(deadline)
+    if left is not None and left <= 0:
+        _bump("deadline_exceeded")
+        raise DeadlineExceeded("Request deadline exceeded while waiting for the model")
+
+
+def _is_retryable(error) -> bool:
+    if isinstance(error, (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code in RETRYABLE_STATUS
+
+
+def _retry_after(error):
+    response = getattr(error, "response", None)
+    try:
+        return float(response.headers.get("retry-after")) if response is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def create_response(request: dict, deadline=None, stream=False):
+    """
+    client.responses.create(**request) with jittered exponential backoff on 429/5xx and
+    connection errors. Never waits or retries past `deadline` (a time.monotonic() value).
+    """
+    client = get_openai_client()
+    attempt = 0
+    while True:
+        check_deadline(deadline)
+        left = remaining_time(deadline)
+        timeout = OPENAI_TIMEOUT_S if left is None else min(OPENAI_TIMEOUT_S, left)
+
+        start = time.perf_counter()
+        _bump("calls")
+        try:
+            response = client.with_options(timeout=timeout).responses.create(**request, stream=stream)
+        except Exception as e:
+            attempt += 1
+            if not _is_retryable(e) or attempt > OPENAI_MAX_RETRIES:
+                _bump("failures")
+                if isinstance(e, openai.APITimeoutError) and deadline is not None and remaining_time(deadline) <= 0:
+                    _bump("deadline_exceeded")
+                    raise DeadlineExceeded("Request deadline exceeded while waiting for the model") from e
+                raise
+            # Full jitter, but never shorter than the server's Retry-After
+            delay = random.uniform(0, min(OPENAI_BACKOFF_MAX_S, OPENAI_BACKOFF_BASE_S * 2 ** (attempt - 1)))
+            delay = max(delay, _retry_after(e) or 0)
+            left = remaining_time(deadline)
+            if left is not None and delay >= left:
+                _bump("failures")
+                _bump("deadline_exceeded")
+                raise DeadlineExceeded("Request deadline would pass before the next retry") from e
+            _bump("retries")
+            log_event("openai_retry", level="warning", error=e.__class__.__name__, attempt=attempt,
+                      max_retries=OPENAI_MAX_RETRIES, delay_s=round(delay, 2))
+            time.sleep(delay)
+            continue
+
+        OPENAI_SECONDS.observe(time.perf_counter() - start, current_endpoint())
+        return response
+
+
+def llm_stats():
+    """This worker's totals for /health (per-endpoint series are on /metrics)."""
+    stats = dict.fromkeys(LLM_EVENTS, 0)
+    for (event, _), value in OPENAI_EVENTS.snapshot().items():
+        stats[event] = stats.get(event, 0) + value
+    succeeded, latency_total = histogram_totals(OPENAI_SECONDS)
+    stats["latency_total_s"] = latency_total
+    stats["latency_avg_s"] = latency_total / succeeded if succeeded else 0.0
+    return stats
@@ -1,22 +1,21 @@
 from dotenv import load_dotenv
 import os
-from openai import OpenAI   
 load_dotenv()
-from src.document_pre import json_to_docx_append_vertical_tables
 import re
 import json
 import ast
+import time
+from src.cache import ResultCache
+from src.json_stream import TopLevelMemberParser
+from src.llm_client import create_response, check_deadline
+from src.telemetry import HRA_FIRST_SECTION_SECONDS, HRA_STREAMS, current_endpoint, histogram_totals, log_event, stage
 
-def openai_model_with_mcp_tools(selected_tables, candidate):
-    print(f"\n🤖 OPENAI MODEL CALLED")
-    print(f"📂 SELECTED TABLES: {selected_tables}")
-    print(f"👤 CANDIDATE: {candidate}")
-    
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    user_input = f"I need full data for: {candidate} from following tables only: {', '.join(selected_tables)} as JSON, don't include duplicate records across tables."
-    print(f"📝 USER INPUT: {user_input}")
-    print("🚀 CALLING OpenAI API...")
-    response = client.responses.create(
+# ✅ Parsed HRA results keyed on (candidate, table set); see src/cache.py for HRA_CACHE_* settings
+HRA_CACHE = ResultCache.from_env("HRA_CACHE")
+
+def _response_request(user_input):
+    """Keyword arguments for client.responses.create: prompt, few-shot example and MCP tool."""
+    return dict(
     model="gpt-5",
     input=[
         {
@@ -83,27 +82,81 @@ def openai_model_with_mcp_tools(selected_tables, candidate):
         "web_search_call.action.sources"
     ]
     )
-    print(f"🤖 AI RESPONSE: {response.output_text[:200]}...")  # First 200 chars
-    print(f"🤖 FULL RESPONSE LENGTH: {len(response.output_text)} characters")
-    print("🔍 SEARCHING for JSON in response...")
-    match = re.search(r'\{[\s\S]*\}', response.output_text)
+
+
+def stream_stats():
+    """This worker's streamed-response totals for /health (per-endpoint series are on /metrics)."""
+    streams = sum(HRA_STREAMS.snapshot().values())
+    count, total = histogram_totals(HRA_FIRST_SECTION_SECONDS)
+    return {"streams": streams, "first_section_count": count,
+            "first_section_avg_s": total / count if count else None}
+
+def _stream_output_text(request, on_section, deadline=None):
+    """Stream the response, handing each top-level JSON member to on_section as soon as it closes."""
+    parser = TopLevelMemberParser()
+    chunks = []
+    start = time.perf_counter()
+    first_section_s = None
+    HRA_STREAMS.inc(current_endpoint())
+
+    stream = create_response(request, deadline=deadline, stream=True)
+    for event in stream:
+        if deadline is not None and time.monotonic() >= deadline:
+            stream.close()
+            check_deadline(deadline)
+        if event.type != "response.output_text.delta":
+            continue
+        chunks.append(event.delta)
+        for key, value in parser.feed(event.delta):
+            if first_section_s is None:
+                first_section_s = time.perf_counter() - start
+                HRA_FIRST_SECTION_SECONDS.observe(first_section_s, current_endpoint())
+                log_event("hra_first_section", first_section_s=round(first_section_s, 3))
+            on_section(key, value)
+
+    return "".join(chunks)
+
+def openai_model_with_mcp_tools(selected_tables, candidate, on_section=None, deadline=None):
+    """
+    Fetch HRA data for a candidate via the MCP Bigquery_tool and return it as a dict
+    (or the raw model text when no JSON could be parsed).
+
+    With on_section, the response is streamed and on_section(key, value) is called
+    for each top-level field as soon as it has been generated. `deadline` is a
+    time.monotonic() value; retries and streaming stop once it passes.
+    """
+    cached = HRA_CACHE.get(candidate, selected_tables)
+    if cached is not None:
+        log_event("hra_cache_hit", tables=len(selected_tables))
+        if on_section is not None:
+            for key, value in cached.items():
+                on_section(key, value)
+        return cached
+    
+    user_input = f"I need full data for: {candidate} from following tables only: {', '.join(selected_tables)} as JSON, don't include duplicate records across tables."
+    request = _response_request(user_input)
+    with stage("openai"):
+        if on_section is None:
+            output_text = create_response(request, deadline=deadline).output_text
+        else:
+            output_text = _stream_output_text(request, on_section, deadline=deadline)
+
+    match = re.search(r'\{[\s\S]*\}', output_text)
     if match:
         json_data = match.group(0)
-        print(f"✅ JSON FOUND: {len(json_data)} characters")
         try:
-            input_json = ast.literal_eval(json_data)  # ✅ handles Python booleans/None
-            print(f"✅ JSON PARSED successfully: {len(input_json)} top-level keys")
-            print(f"🔑 JSON KEYS: {list(input_json.keys())[:10]}...")  # First 10 keys
-            print("🔧 CALLING json_to_docx_append_vertical_tables()...")
-            json_to_docx_append_vertical_tables(input_json)
-            print("✅ DOCUMENT PROCESSING completed")
+            with stage("json_parse"):
+                input_json = ast.literal_eval(json_data)  # ✅ handles Python booleans/None
+            log_event("hra_parsed", tables=len(selected_tables), response_chars=len(output_text),
+                      top_level_keys=len(input_json))
+            HRA_CACHE.set(candidate, selected_tables, input_json)
             return input_json
         except Exception as e:
-            print(f"❌ ERROR parsing JSON: {e}")
-            return response.output_text
+            log_event("hra_parse_failed", level="error", response_chars=len(output_text), error=str(e))
+            return output_text
     else:
-        print("❌ NO JSON found in response")
-        return response.output_text
+        log_event("hra_no_json", level="error", response_chars=len(output_text))
+        return output_text
 
 
 
@@ -1,13 +1,9 @@
-import streamlit as st
 import os
 # os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = r"C:\Dinesh\Projects\Python_projects\video\sarreno_app\sarreno_app\service_account.json"
 
 import pandas as pd
-from sqlalchemy import create_engine
-import traceback
-from google.cloud import bigquery
-import pymysql
-import shutil
+import json
+import threading
 from io import BytesIO
 from docx import Document
 from docx.enum.text import WD_ALIGN_PARAGRAPH
@@ -18,6 +14,17 @@ from docx.oxml.ns import qn
 from dotenv import load_dotenv
 load_dotenv()
 import re
+from src.roster import RosterStore, normalize_id_key
+from src import db
+from src.bigquery_client import get_bigquery_client
+from src.sources import fan_out
+from src.search import CandidateIndex, SearchSource
+from src.sql_reader import SQLTableReader
+from src.report import Report, Section, register_docx_layout, render, render_docx
+from src.document_pre import new_document_from_template, append_rows_from_template, apply_document_font, set_rfonts, template_version, DOCUMENT_FONT
+from src.zipstream import iter_zip
+from src.cache import DocumentCache
+from src.telemetry import log_event, stage, timed_stage
 
 
 
@@ -64,20 +71,9 @@ CANON_MAP = {
     "Emergency contacts": "Emergency contacts"
 }
 
-def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
-    """Rename known variants to canonical column names."""
-    if df is None or df.empty:
-        return df
-    rename_map = {k: v for k, v in CANON_MAP.items() if k in df.columns}
-    return df.rename(columns=rename_map)
-
-def normalize_selected_fields(selected_fields):
-    """Map UI labels to canonical where needed (e.g., Medi-Cal -> Medical)."""
-    return [CANON_MAP.get(f, f) for f in selected_fields]
-
 def get_case_notes(sql_dict, bq_dict, dict_representation):
     """Fetch Case Notes with fallback SQL → BQ → Excel."""
-    possible_keys = ["Case Notes", "case_notes", "casenotes"]
+    possible_keys = CASE_NOTES_KEYS
 
     for key in possible_keys:
         if sql_dict.get(key):
@@ -96,9 +92,48 @@ def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
     rename_map = {k: v for k, v in CANON_MAP.items() if k in df.columns}
     return df.rename(columns=rename_map)
 
+# The UI tags each field with where it usually comes from: "Housing (SQL)", "Employment (CM)"
+SOURCE_TAG = re.compile(r"\s+\((?:SQL|CM|Excel)\)$")
+
 def normalize_selected_fields(selected_fields):
-    """Map UI labels to canonical where needed (e.g., Medi-Cal -> Medical)."""
-    return [CANON_MAP.get(f, f) for f in selected_fields]
+    """Map UI labels to canonical column names ("Housing (SQL)" -> Housing, Medi-Cal -> Medical)."""
+    fields = []
+    for field in selected_fields:
+        field = SOURCE_TAG.sub("", str(field).strip())
+        field = FIELD_MAP.get(field, field)
+        fields.append(CANON_MAP.get(field, field))
+    return list(dict.fromkeys(fields))
+
+# ✅ Excel roster, parsed once per process and reloaded when the file changes
+ROSTER_PATH = os.getenv("REENTRY_ROSTER_PATH", "ExcelFiles/reentry5.xlsx")
+ROSTER = RosterStore(ROSTER_PATH, normalize=normalize_columns)
+
+def _records(df):
+    """Normalized DataFrame → list of row dicts ([] for None/empty)."""
+    df = normalize_columns(df)
+    if not isinstance(df, pd.DataFrame) or df.empty:
+        return []
+    return df.to_dict(orient="records")
+
+def _candidate_entry(row):
+    """{"name", "medical_id", "display_text"} for a row from any source (columns canonical or raw), or None."""
+    name = str(row.get("Name of the youth") or row.get("youth_name") or "").strip()
+    mid = normalize_id_key(row.get("Medical ID Number") or row.get("medical_id_number") or "")
+    phone = str(row.get("Telephone") or row.get("telephone") or "N/A").strip()
+    addr = str(row.get("Residential Address") or row.get("residential_address") or "N/A").strip()
+    if not (name and mid):
+        return None
+    display_text = f"{name} — Medical ID-{mid} | Telephone Number- {phone} | Residential Address- {addr}"
+    return {"name": name, "medical_id": mid, "display_text": display_text}
+
+def _format_candidates(records):
+    """Format rows from any source (columns canonical or raw) as candidate strings."""
+    formatted = []
+    for row in records:
+        entry = _candidate_entry(row)
+        if entry:
+            formatted.append(entry["display_text"])
+    return formatted
 
 def get_candidates_by_name(person_input: str):
     """
@@ -106,58 +141,16 @@ def get_candidates_by_name(person_input: str):
     Returns a de-duplicated list of formatted strings:
     "Name — Medical ID-XXXX | Telephone Number- XXX | Residential Address- XXX"
     """
-    candidates = []
-
-    # Excel
-    try:
-        file_data = pd.read_excel("ExcelFiles/reentry5.xlsx")
-        file_data = normalize_columns(file_data)
-
-        if "Name of the youth" in file_data.columns:
-            matches = file_data[
-                file_data["Name of the youth"].astype(str).str.strip().str.lower()
-                == person_input.strip().lower()
-            ]
-            for _, row in matches.iterrows():
-                name = str(row.get("Name of the youth") or "").strip()
-                mid = str(row.get("Medi-Cal ID Number") or "").strip()
-                phone = str(row.get("Telephone") or "N/A").strip()
-                addr = str(row.get("Residential Address") or "N/A").strip()
-                if name and mid:
-                    formatted = f"{name} — Medical ID-{mid} | Telephone Number- {phone} | Residential Address- {addr}"
-                    candidates.append(formatted)
-    except Exception as e:
-        print("Excel search error:", e)
+    # All three sources are queried concurrently; a failed or slow source yields []
+    results = fan_out({
+        "excel": lambda: ROSTER.find_by_name(person_input),
+        "sql": lambda: _records(read_cloud_sql(person_input, columns=CANDIDATE_COLUMNS)),
+        "bigquery": lambda: _records(read_bigquery(person_input, columns=CANDIDATE_COLUMNS)),
+    }, default=list)
 
-    # SQL
-    try:
-        sql_df = read_cloud_sql(person_input)
-        sql_df = normalize_columns(sql_df)
-        for _, row in sql_df.iterrows():
-            name = str(row.get("youth_name") or "").strip()
-            mid = str(row.get("medical_id_number") or "").strip()
-            phone = str(row.get("telephone") or "N/A").strip()
-            addr = str(row.get("residential_address") or "N/A").strip()
-            if name and mid:
-                formatted = f"{name} — Medical ID-{mid} | Telephone Number- {phone} | Residential Address- {addr}"
-                candidates.append(formatted)
-    except Exception as e:
-        print("SQL search error:", e)
-
-    # BigQuery
-    try:
-        bq_df = read_bigquery(person_input)
-        bq_df = normalize_columns(bq_df)
-        for _, row in bq_df.iterrows():
-            name = str(row.get("youth_name") or "").strip()
-            mid = str(row.get("medical_id_number") or "").strip()
-            phone = str(row.get("telephone") or "N/A").strip()
-            addr = str(row.get("residential_address") or "N/A").strip()
-            if name and mid:
-                formatted = f"{name} — Medical ID-{mid} | Telephone Number- {phone} | Residential Address- {addr}"
-                candidates.append(formatted)
-    except Exception as e:
-        print("BigQuery search error:", e)
+    candidates = []
+    for records in results.values():
+        candidates.extend(_format_candidates(records))
 
     # Deduplicate by Medical ID (Excel → SQL → BigQuery priority)
     unique = {}
@@ -171,9 +164,6 @@ def get_candidates_by_name(person_input: str):
     return list(unique.values())
 
 
-# ✅ BigQuery client
-client = bigquery.Client()
-
 # ✅ UI → Actual column names mapping
 FIELD_MAP = {
     "Name": "Name of the youth",
@@ -195,6 +185,34 @@ FIELD_MAP = {
     "Case Notes": "Case Notes"
 }
 
+SQL_TABLE = "SocialEconomicLogistics_backup"
+BQ_TABLE = "genai-poc-424806.SerranoAdvisorsBQ.scalablefeaturesforBQ"
+
+# ✅ Cloud SQL reads select only what CANON_MAP / FIELD_MAP (plus case notes and contact columns) can use
+CASE_NOTES_KEYS = ["Case Notes", "case_notes", "casenotes"]
+SQL_READER = SQLTableReader(
+    SQL_TABLE,
+    [*CANON_MAP, *CANON_MAP.values(), *FIELD_MAP.values(), *CASE_NOTES_KEYS, "telephone", "residential_address"],
+)
+
+# ✅ Projection pushdown: each source reads only the columns behind the selected fields
+KEY_COLUMNS = ["medical_id_number", "youth_name", "Medical ID Number", "Medi-Cal ID Number", "Name of the youth"]
+SOURCE_COLUMNS = {}
+for _raw, _canonical in CANON_MAP.items():
+    SOURCE_COLUMNS.setdefault(_canonical, [_canonical]).append(_raw)
+# What a candidate line shows (see _candidate_entry)
+CANDIDATE_COLUMNS = [*KEY_COLUMNS, "Telephone", "telephone", "Residential Address", "residential_address"]
+
+def source_columns(selected_fields):
+    """
+    Raw and canonical column names that can fill the (normalized) selected fields, plus the
+    key columns lookups and bulk export rely on. Case notes are only read when selected.
+    """
+    columns = list(KEY_COLUMNS)
+    for field in selected_fields:
+        columns.extend(CASE_NOTES_KEYS if field == "Case Notes" else SOURCE_COLUMNS.get(field, [field]))
+    return list(dict.fromkeys(columns))
+
 def set_table_borders(table, color_rgb=(0, 0, 0)):
     """Apply borders to a table manually (works even without Word styles)."""
     tbl = table._tbl
@@ -238,117 +256,87 @@ def _set_run_font(run, name="Century Gothic", size_pt=None, color_rgb=None):
 
 def force_document_font(doc, name="Century Gothic"):
     """
-    Apply the desired font to:
-      - Normal style (document default)
-      - All existing paragraphs/runs
-      - All existing tables (headers + cells)
+    Apply the desired font to the whole document:
+      - docDefaults + Normal, table and heading styles (everything inherits from these)
+      - only those runs (body, headers, footers) whose own w:rFonts names a different font
+    Runs without explicit fonts are never touched, so the cost is O(styles + overrides).
     """
-    # Default Normal style
-    base = doc.styles['Normal']
-    base.font.name = name
-    # Ensure East Asia defaults also use the same font
-    rPr = base._element.get_or_add_rPr()
-    rFonts = rPr.rFonts or OxmlElement('w:rFonts')
-    rFonts.set(qn('w:ascii'), name)
-    rFonts.set(qn('w:hAnsi'), name)
-    rFonts.set(qn('w:cs'), name)
-    rFonts.set(qn('w:eastAsia'), name)
-    if rPr.rFonts is None:
-        rPr.append(rFonts)
+    apply_document_font(doc, name)
+
+    parts = [doc.element.body]
+    for section in doc.sections:
+        for hf in (section.header, section.footer):
+            if not hf.is_linked_to_previous:
+                parts.append(hf._element)
+    for part in parts:
+        for rFonts in part.xpath(".//w:r/w:rPr/w:rFonts"):
+            set_rfonts(rFonts, name)
 
-    # Existing paragraphs
-    for p in doc.paragraphs:
-        for run in p.runs:
-            _set_run_font(run, name=name)
 
-    # Existing tables (headers + cells)
-    for table in doc.tables:
-        for row in table.rows:
-            for cell in row.cells:
-                for p in cell.paragraphs:
-                    for run in p.runs:
-                        _set_run_font(run, name=name)
+# Font for reentry care plans. Set it to render from a pre-styled template (fonts applied
+# once via styles, see force_document_font); leave it empty to keep the template's fonts.
+REENTRY_DOCUMENT_FONT = os.getenv("REENTRY_DOCUMENT_FONT", "") or None
 
 # -------------------------------------------------------------------------
 
 
-def generate_reentry_care_plan(selected_fields, person_input):
-    print(f"🔍 Parsing person_input: '{person_input}'")
-    
-    # Regex patterns to extract name and medical ID from formatted string
-    name_pattern = r"^(.*?)\s+—"
-    medical_id_pattern = r"Medical ID-(\d+)"
+def build_reentry_report(person_input, selected_fields, dict_representation, sql_dict, bq_dict) -> Report:
+    """Merge one person's Excel → SQL → BQ records into a format-neutral care plan report."""
+    # Merge dictionaries (Excel → SQL → BQ priority)
+    merged_dict = {}
+    merged_dict.update(dict_representation)
+    merged_dict.update(sql_dict)
+    merged_dict.update(bq_dict)
+    merged_dict.pop("id", None)
 
-    # Extract values from person_input
-    name_match = re.search(name_pattern, person_input)
-    medical_id_match = re.search(medical_id_pattern, person_input)
+    # Table of all fields
+    all_possible_fields = [f for f in dict.fromkeys(CANON_MAP.values()) if f != "Case Notes"]
 
-    if name_match and medical_id_match:
-        name = name_match.group(1)
-        medical_id = medical_id_match.group(1)
-        print(f"📊 EXTRACTED: name='{name}', medical_id='{medical_id}'")
-    else:
-        # If no formatted string, use the entire input as name
-        name = person_input
-        medical_id = None
-        print(f"📊 NO FORMATTING DETECTED: using name='{name}', medical_id=None")
-        
-    try:
-        selected_fields = normalize_selected_fields(selected_fields)
-
-        # Excel
-        file_data = pd.read_excel("ExcelFiles/reentry5.xlsx")
-        file_data = normalize_columns(file_data)
-
-        if medical_id and "Medical ID Number" in file_data.columns:
-            person_row = file_data[file_data["Medical ID Number"].astype(str) == str(medical_id)]
+    rows = []
+    for key in all_possible_fields:
+        if key in selected_fields:
+            value = merged_dict.get(key, "Not Available")
         else:
-            person_row = file_data[file_data.get("Name of the youth", pd.Series(dtype=str)) == person_input]
-
-        dict_representation = person_row.to_dict(orient="records")[0] if not person_row.empty else {}
-
-        # SQL + BigQuery
-        sql_record = read_cloud_sql(person_input, medical_id)
-        sql_record = normalize_columns(sql_record)
-
-        bq_record = read_bigquery(person_input, medical_id)
-        bq_record = normalize_columns(bq_record)
-
-        # Convert to dicts
-        sql_dict = (sql_record.to_dict(orient="records")[0]
-                    if isinstance(sql_record, pd.DataFrame) and not sql_record.empty else {})
-        bq_dict = (bq_record.to_dict(orient="records")[0]
-                   if isinstance(bq_record, pd.DataFrame) and not bq_record.empty else {})
-
-        # Merge dictionaries (Excel → SQL → BQ priority)
-        merged_dict = {}
-        merged_dict.update(dict_representation)
-        merged_dict.update(sql_dict)
-        merged_dict.update(bq_dict)
-        merged_dict.pop("id", None)
-
-        # ✅ Load Template instead of starting fresh
-        doc = Document("data/Template.docx")
-
-        # Title
-        doc.add_paragraph("")
-        title_text = f"{person_input}'s Reentry Care Plan"
-        doc_title = doc.add_paragraph(title_text)
-        doc_title.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        if doc_title.runs:
-            run = doc_title.runs[0]
-            run.bold = True
-            run.font.color.rgb = RGBColor(0, 0, 0)
-
-        doc.add_paragraph("")
-
-        # Table of all fields
-        all_possible_fields = [f for f in dict.fromkeys(CANON_MAP.values()) if f != "Case Notes"]
-
-        table = doc.add_table(rows=1, cols=2)
-        
-
-# apply borders directly (XML hack inline)
+            value = "Not Selected"
+        rows.append((str(key), "" if pd.isna(value) else str(value)))
+
+    # Case Notes
+    # Case Notes → only if selected
+    if "Case Notes" in selected_fields:
+        case_notes_value = get_case_notes(sql_dict, bq_dict, dict_representation)
+        rows.append(("Case Notes", "" if pd.isna(case_notes_value) else str(case_notes_value).strip()))
+
+    return Report(
+        kind="reentry",
+        title=f"{person_input}'s Reentry Care Plan",
+        sections=[Section(None, rows, header=("Field", "Value"))],
+    )
+
+
+@register_docx_layout("reentry")
+def reentry_report_to_docx(report: Report) -> BytesIO:
+    """DOCX layout for care plans: centred bold title, then one bordered Field/Value table per section."""
+    # ✅ Clone the cached, pre-parsed template instead of starting fresh
+    doc = new_document_from_template(font=REENTRY_DOCUMENT_FONT)
+
+    # Title
+    doc.add_paragraph("")
+    doc_title = doc.add_paragraph(report.title)
+    doc_title.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    if doc_title.runs:
+        run = doc_title.runs[0]
+        run.bold = True
+        run.font.color.rgb = RGBColor(0, 0, 0)
+
+    doc.add_paragraph("")
+
+    for section in report.sections:
+        if section.title:
+            doc.add_paragraph(section.title)
+
+        table = doc.add_table(rows=1 if section.header else 0, cols=2)
+
+        # apply borders directly (XML hack inline)
         tbl = table._tbl
         tblBorders = OxmlElement('w:tblBorders')
         for border_name in ["top", "left", "bottom", "right", "insideH", "insideV"]:
@@ -360,95 +348,367 @@ def generate_reentry_care_plan(selected_fields, person_input):
             tblBorders.append(border)
         tbl.tblPr.append(tblBorders)
 
+        if section.header:
+            hdr_cells = table.rows[0].cells
+            hdr_cells[0].text, hdr_cells[1].text = section.header
 
-        hdr_cells = table.rows[0].cells
-        hdr_cells[0].text = "Field"
-        hdr_cells[1].text = "Value"
+        # ✅ First data row through python-docx, the rest cloned from it in one pass
+        if section.rows:
+            row_cells = table.add_row().cells
+            row_cells[0].text, row_cells[1].text = section.rows[0]
+            append_rows_from_template(table, tbl.tr_lst[-1], section.rows[1:])
 
-        for key in all_possible_fields:
-            if key in selected_fields:
-                value = merged_dict.get(key, "Not Available")
-            else:
-                value = "Not Selected"
+    # Save as BytesIO
+    doc_io = BytesIO()
+    with stage("save"):
+        doc.save(doc_io)
+    doc_io.seek(0)
+    return doc_io
 
-            row_cells = table.add_row().cells
-            row_cells[0].text = str(key)
-            row_cells[1].text = "" if pd.isna(value) else str(value)
 
-        # Case Notes
-        # Case Notes → only if selected
-        if "Case Notes" in selected_fields:
-            case_notes_value = get_case_notes(sql_dict, bq_dict, dict_representation)
-            row_cells = table.add_row().cells
-            row_cells[0].text = "Case Notes"
-            row_cells[1].text = "" if pd.isna(case_notes_value) else str(case_notes_value).strip()
+def render_reentry_care_plan(person_input, selected_fields, dict_representation, sql_dict, bq_dict):
+    """Merge one person's Excel → SQL → BQ records and render the care plan (BytesIO)."""
+    return render_docx(build_reentry_report(person_input, selected_fields, dict_representation, sql_dict, bq_dict))
 
 
-        # Save as BytesIO
-        doc_io = BytesIO()
-        doc.save(doc_io)
-        doc_io.seek(0)
-        return doc_io
+def parse_person_input(person_input):
+    """Split a formatted candidate string into (name, medical_id); plain input is (input, None)."""
+    # Regex patterns to extract name and medical ID from formatted string
+    name_pattern = r"^(.*?)\s+—"
+    medical_id_pattern = r"Medical ID-(\d+)"
+
+    # Extract values from person_input
+    name_match = re.search(name_pattern, person_input)
+    medical_id_match = re.search(medical_id_pattern, person_input)
+
+    if name_match and medical_id_match:
+        return name_match.group(1), medical_id_match.group(1)
+    # If no formatted string, use the entire input as name
+    return person_input, None
+
+
+def fetch_reentry_records(person_input, selected_fields=None):
+    """
+    One person's (Excel, Cloud SQL, BigQuery) records, read concurrently; a failed or slow
+    source yields {}. With `selected_fields` (normalized), the remote reads only select the
+    columns those fields need.
+    """
+    name, medical_id = parse_person_input(person_input)
+    columns = source_columns(selected_fields) if selected_fields is not None else None
+
+    @timed_stage("excel")
+    def excel_record():
+        if medical_id:
+            return ROSTER.find_by_medical_id(medical_id)
+        matches = ROSTER.find_by_name(person_input)
+        return matches[0] if matches else {}
+
+    def first_record(df):
+        rows = _records(df)
+        return rows[0] if rows else {}
+
+    # Excel (in-memory roster), SQL and BigQuery concurrently
+    results = fan_out({
+        "excel": excel_record,
+        "sql": lambda: first_record(read_cloud_sql(person_input, medical_id, columns)),
+        "bigquery": lambda: first_record(read_bigquery(person_input, medical_id, columns)),
+    }, default=dict)
+    log_event("reentry_sources", by_medical_id=bool(medical_id),
+              **{f"{source}_found": bool(record) for source, record in results.items()})
+    return results["excel"], results["sql"], results["bigquery"]
+
+
+# ✅ Rendered care plans, keyed by a hash of the merged records, fields, format and template (see src/cache.py)
+REENTRY_DOCUMENTS = DocumentCache.from_env("REENTRY_DOC_CACHE")
+# Bump when build_reentry_report / reentry_report_to_docx change what a document looks like
+REENTRY_LAYOUT_VERSION = 1
+
+def generate_reentry_care_plan_document(selected_fields, person_input, fmt="docx"):
+    """
+    (etag, BytesIO) for one person's care plan as `fmt`, or None on failure.
+
+    A repeat of the same request within REENTRY_DOC_CACHE_FRESH_S is answered from the
+    cache without touching the sources. Otherwise the sources are read and the document is
+    only rendered when the records, fields, format or template changed since it was cached.
+    """
+    try:
+        selected_fields = normalize_selected_fields(selected_fields)
+        cache = REENTRY_DOCUMENTS
+        request_key = json.dumps([person_input, selected_fields, fmt])
+        if cache is not None:
+            cached = cache.get_fresh(request_key)
+            if cached is not None:
+                return cached[0], BytesIO(cached[1])
+
+        dict_representation, sql_dict, bq_dict = fetch_reentry_records(person_input, selected_fields)
+        content_key = DocumentCache.make_key(
+            REENTRY_LAYOUT_VERSION, template_version(font=REENTRY_DOCUMENT_FONT), fmt,
+            person_input, selected_fields, dict_representation, sql_dict, bq_dict,
+        )
+        cached = cache.get(content_key) if cache is not None else None
+        if cached is None:
+            report = build_reentry_report(person_input, selected_fields, dict_representation, sql_dict, bq_dict)
+            body = render(report, fmt).getvalue()
+            cached = cache.set(content_key, body) if cache is not None else (DocumentCache.make_etag(content_key), body)
+        if cache is not None:
+            cache.remember(request_key, content_key)
+        return cached[0], BytesIO(cached[1])
 
     except Exception as e:
-        print("❌ Error in generate_reentry_care_plan:", str(e))
-        st.error(f"Failed to generate care plan: {e}")
+        log_event("reentry_failed", level="error", error=str(e))
         return None
 
 
-def read_cloud_sql(person_input, medical_id=None):
-    user = os.environ["CLOUD_SQL_USER"]
-    password = os.environ["CLOUD_SQL_PASSWORD"]
-    host = os.environ["CLOUD_SQL_HOST"]
-    database = "serrano"
+def generate_reentry_care_plan(selected_fields, person_input, fmt="docx"):
+    """Fetch one person's records from every source and render the care plan as `fmt` (see src.report)."""
+    document = generate_reentry_care_plan_document(selected_fields, person_input, fmt)
+    return document[1] if document is not None else None
 
-    connection_url = f"mysql+pymysql://{user}:{password}@{host}/{database}"
-    engine = create_engine(connection_url)
 
-    if medical_id:
-        query = f"SELECT * FROM SocialEconomicLogistics_backup WHERE medical_id_number='{medical_id}'"
-    else:
-        query = f"SELECT * FROM SocialEconomicLogistics_backup WHERE youth_name='{person_input}'"
+# ---------- BULK EXPORT ----------
 
-    df = pd.read_sql(query, engine)
-    return df
+BULK_CHUNK_SIZE = int(os.getenv("REENTRY_BULK_CHUNK_SIZE", "1000"))
+BULK_SOURCE_TIMEOUT_S = float(os.getenv("REENTRY_BULK_SOURCE_TIMEOUT_S", "60"))
+
+def _index_by_medical_id(records):
+    """First record per Medical ID, mirroring the [0] pick of the single-person path."""
+    indexed = {}
+    for record in records:
+        mid = record.get("Medical ID Number")
+        if mid is not None and not (isinstance(mid, float) and pd.isna(mid)):
+            indexed.setdefault(normalize_id_key(mid), record)
+    return indexed
 
-def read_bigquery(person_input, medical_id=None):
+def generate_reentry_care_plans_bulk(selected_fields, people):
+    """
+    Render care plans for many people with one pass over each source.
+
+    `people` holds formatted candidate strings or bare Medical IDs. Excel is read from
+    the in-memory roster, Cloud SQL with chunked IN (...) queries and BigQuery with a
+    single UNNEST(@ids) query, all concurrently. Returns an iterator of ZIP chunks
+    (one DOCX per person plus manifest.json); documents are rendered as the ZIP streams.
+    """
+    selected_fields = normalize_selected_fields(selected_fields)
+
+    targets = []
+    for person_input in people:
+        person_input = str(person_input).strip()
+        name, medical_id = parse_person_input(person_input)
+        if medical_id is None and person_input.isdigit():
+            name, medical_id = None, person_input
+        targets.append((person_input, name, medical_id))
+
+    ids = list(dict.fromkeys(mid for _, _, mid in targets if mid))
+    columns = source_columns(selected_fields)
+    timeouts = {source: BULK_SOURCE_TIMEOUT_S for source in ("excel", "sql", "bigquery")}
+    results = fan_out({
+        "excel": timed_stage("excel")(lambda: {mid: ROSTER.find_by_medical_id(mid) for mid in ids}),
+        "sql": lambda: _index_by_medical_id(_records(read_cloud_sql_bulk(ids, columns))),
+        "bigquery": lambda: _index_by_medical_id(_records(read_bigquery_bulk(ids, columns))),
+    }, default=dict, timeouts=timeouts)
+    log_event("reentry_bulk_sources", sample=1.0, people=len(targets), unique_ids=len(ids),
+              excel=sum(1 for v in results["excel"].values() if v), sql=len(results["sql"]),
+              bigquery=len(results["bigquery"]))
+
+    def entries():
+        manifest, used = [], set()
+        for person_input, name, medical_id in targets:
+            entry = {"candidate": person_input, "medical_id": medical_id, "status": "error", "file": None, "error": None}
+            manifest.append(entry)
+            if not medical_id:
+                entry["error"] = "No Medical ID in candidate"
+                continue
+            excel = results["excel"].get(medical_id) or {}
+            sql_dict = results["sql"].get(medical_id, {})
+            bq_dict = results["bigquery"].get(medical_id, {})
+            if not (excel or sql_dict or bq_dict):
+                entry["error"] = "No record found in any source"
+                continue
+
+            display_name = name or str(
+                bq_dict.get("Name of the youth") or sql_dict.get("Name of the youth")
+                or excel.get("Name of the youth") or medical_id
+            ).strip()
+            filename = re.sub(r"[^A-Za-z0-9 ._-]+", "_", f"{display_name}_{medical_id}_reentry_care_plan") + ".docx"
+            if filename in used:
+                entry.update(status="success", file=filename)  # same person requested twice
+                continue
+
+            title = person_input if name else f"{display_name} — Medical ID-{medical_id}"
+            try:
+                doc_io = render_reentry_care_plan(title, selected_fields, excel, sql_dict, bq_dict)
+            except Exception as e:
+                entry["error"] = str(e)
+                continue
+            used.add(filename)
+            entry.update(status="success", file=filename)
+            yield filename, doc_io.getvalue()
+        yield "manifest.json", json.dumps(manifest, indent=2, default=str).encode("utf-8")
+
+    return iter_zip(entries())
+
+
+@timed_stage("cloud_sql")
+def read_cloud_sql_bulk(medical_ids, columns=None):
+    """All SocialEconomicLogistics_backup rows for the given IDs, one IN (...) query per chunk."""
+    return SQL_READER.fetch_many(list(medical_ids), BULK_CHUNK_SIZE, columns=columns)
+
+_bq_columns = None
+_bq_columns_lock = threading.Lock()
+
+def bigquery_columns():
+    """Column names of BQ_TABLE, read once per process from table metadata (free, unlike a query)."""
+    global _bq_columns
+    if _bq_columns is None:
+        with _bq_columns_lock:
+            if _bq_columns is None:
+                _bq_columns = [field.name for field in get_bigquery_client().get_table(BQ_TABLE).schema]
+    return _bq_columns
+
+def _bigquery_select(columns=None):
+    """SELECT list for BQ_TABLE: the requested columns that exist in the table, or * for all of them."""
+    if columns is None:
+        return "*"
+    try:
+        available = set(bigquery_columns())
+    except Exception as e:
+        log_event("bigquery_schema_failed", level="warning", error=str(e))
+        return "*"
+    names = [c for c in dict.fromkeys(columns) if c in available]
+    # Names come from the table's own schema, never from the request
+    return ", ".join(f"`{name}`" for name in names) or "*"
+
+@timed_stage("bigquery")
+def read_bigquery_bulk(medical_ids, columns=None):
+    """All BigQuery rows for the given IDs in a single UNNEST(@ids) query."""
+    from google.cloud import bigquery
+
+    if not medical_ids:
+        return pd.DataFrame()
+    query = f"""
+        SELECT {_bigquery_select(columns)}
+        FROM `{BQ_TABLE}`
+        WHERE medical_id_number IN UNNEST(@ids)
+    """
+    job_config = bigquery.QueryJobConfig(
+        query_parameters=[bigquery.ArrayQueryParameter("ids", "STRING", [str(mid) for mid in medical_ids])]
+    )
+    return get_bigquery_client().query(query, job_config=job_config).to_dataframe()
+
+
+@timed_stage("cloud_sql")
+def read_cloud_sql(person_input, medical_id=None, columns=None):
+    # Bound parameters on a fixed, column-projected statement over the shared pool (src/sql_reader.py)
+    return SQL_READER.fetch(person_input, medical_id, columns=columns)
+
+@timed_stage("bigquery")
+def read_bigquery(person_input, medical_id=None, columns=None):
+    from google.cloud import bigquery
+
+    select = _bigquery_select(columns)
     if medical_id:
-        query = """
-            SELECT *
-            FROM genai-poc-424806.SerranoAdvisorsBQ.scalablefeaturesforBQ
+        query = f"""
+            SELECT {select}
+            FROM `{BQ_TABLE}`
             WHERE medical_id_number = @mid
         """
         job_config = bigquery.QueryJobConfig(
             query_parameters=[bigquery.ScalarQueryParameter("mid", "STRING", str(medical_id))]
         )
     else:
-        query = """
-            SELECT *
-            FROM genai-poc-424806.SerranoAdvisorsBQ.scalablefeaturesforBQ
+        query = f"""
+            SELECT {select}
+            FROM `{BQ_TABLE}`
             WHERE youth_name = @name
         """
         job_config = bigquery.QueryJobConfig(
             query_parameters=[bigquery.ScalarQueryParameter("name", "STRING", person_input)]
         )
 
-    df = client.query(query, job_config=job_config).to_dataframe()
+    df = get_bigquery_client().query(query, job_config=job_config).to_dataframe()
     return df
 
-# ✅ DB CONFIG
-DB_CONFIG = {
-    "host": "34.44.69.178",
-    "user": "root",
-    "password": "SQLsql$123",
-    "database": "serrano"
-}
+# ---------- CANDIDATE SEARCH INDEX ----------
+
+def _candidate_entries(records):
+    return [entry for entry in map(_candidate_entry, records) if entry]
 
-# ✅ Test DB connection on import
-conn = pymysql.connect(**DB_CONFIG)
-cursor = conn.cursor()
-cursor.execute("SELECT id FROM SocialEconomicLogistics_backup LIMIT 3")
-rows = cursor.fetchall()
-print("ROWS:", rows)
-cursor.close()
-conn.close()
\ No newline at end of file
+def _roster_version():
+    return os.path.getmtime(ROSTER_PATH)
+
+def _cloud_sql_version():
+    """
+    Last write time of the SQL table, or its row count when the engine does not track one
+    (UPDATE_TIME is NULL on InnoDB after a restart; other engines have no such column).
+    Edits that keep the count are picked up by the periodic full reload.
+    """
+    from sqlalchemy import text
+
+    with db.connection() as conn:
+        updated = None
+        if conn.dialect.name == "mysql":
+            updated = conn.execute(
+                text("SELECT UPDATE_TIME FROM information_schema.TABLES "
+                     "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table"),
+                {"table": SQL_TABLE},
+            ).scalar()
+        if updated is not None:
+            return updated
+        return ("rows", conn.execute(text(f"SELECT COUNT(*) FROM {SQL_TABLE}")).scalar())
+
+def _bigquery_version():
+    """Table metadata lookup; free, unlike a query."""
+    return get_bigquery_client().get_table(BQ_TABLE).modified
+
+@timed_stage("cloud_sql")
+def read_cloud_sql_candidates():
+    return SQL_READER.fetch_all(CANDIDATE_COLUMNS)
+
+@timed_stage("bigquery")
+def read_bigquery_candidates():
+    return get_bigquery_client().query(f"SELECT {_bigquery_select(CANDIDATE_COLUMNS)} FROM `{BQ_TABLE}`").to_dataframe()
+
+# Excel is re-checked often (local mtime); remote tables poll their modification time less often
+SEARCH_REFRESH_EXCEL_S = float(os.getenv("SEARCH_REFRESH_EXCEL_S", "5"))
+SEARCH_REFRESH_REMOTE_S = float(os.getenv("SEARCH_REFRESH_REMOTE_S", "120"))
+# Cloud SQL is also fully reloaded this often, for edits its version probe cannot see
+SEARCH_REFRESH_FULL_S = float(os.getenv("SEARCH_REFRESH_FULL_S", "1800"))
+
+SEARCH_INDEX = CandidateIndex({
+    "excel": SearchSource(lambda: _candidate_entries(ROSTER.records()), _roster_version, SEARCH_REFRESH_EXCEL_S),
+    "sql": SearchSource(lambda: _candidate_entries(_records(read_cloud_sql_candidates())), _cloud_sql_version,
+                        SEARCH_REFRESH_REMOTE_S, SEARCH_REFRESH_FULL_S),
+    "bigquery": SearchSource(lambda: _candidate_entries(_records(read_bigquery_candidates())), _bigquery_version,
+                             SEARCH_REFRESH_REMOTE_S),
+}, poll_interval=min(SEARCH_REFRESH_EXCEL_S, SEARCH_REFRESH_REMOTE_S))
+
+def search_candidates(query, limit=10):
+    """Typeahead over the union of all sources; starts the background index on first use."""
+    SEARCH_INDEX.start(wait=float(os.getenv("SEARCH_INITIAL_WAIT_S", "2")))
+    return SEARCH_INDEX.search(query, limit)
+
+def warm_up():
+    """
+    Open the expensive per-process resources ahead of the first request.
+
+    Meant to be called once per worker after fork (see gunicorn.conf.py).
+    Each step is best-effort: a slow or unreachable backend is logged and
+    left to be retried lazily on first use instead of blocking boot.
+    """
+    steps = {
+        "excel": ROSTER.records,
+        "template": lambda: new_document_from_template(font=REENTRY_DOCUMENT_FONT),
+        "hra_template": lambda: new_document_from_template(font=DOCUMENT_FONT),
+        "cloud_sql": db.ping,
+        "bigquery": get_bigquery_client,
+        "search_index": SEARCH_INDEX.start,
+    }
+    if os.getenv("CLOUD_SQL_ENSURE_INDEXES", "0").lower() in ("1", "true", "yes"):
+        steps["cloud_sql_indexes"] = SQL_READER.ensure_indexes
+    for name, step in steps.items():
+        try:
+            with stage(f"warm_up_{name}"):
+                step()
+            log_event("warm_up_ready", sample=1.0, step=name)
+        except Exception as e:
+            log_event("warm_up_skipped", level="warning", step=name, error=str(e))
\ No newline at end of file
@@ -0,0 +1,194 @@
+import html
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+from dataclasses import dataclass, field
+from io import BytesIO
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.telemetry import stage
+
+# ✅ Format-neutral document model: generators fill a Report, renderers turn it into bytes
+
+DOCX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+
+# format → (response mimetype, file extension)
+FORMATS = {
+    "docx": (DOCX_MIMETYPE, "docx"),
+    "pdf": ("application/pdf", "pdf"),
+    "html": ("text/html; charset=utf-8", "html"),
+    "json": ("application/json", "json"),
+}
+
+PDF_CONVERT_TIMEOUT_S = float(os.getenv("PDF_CONVERT_TIMEOUT_S", "60"))
+
+
+class UnsupportedFormat(ValueError):
+    """The requested output format is unknown, or its converter is not installed."""
+
+
+@dataclass
+class Section:
+    """One two-column table: an optional title, an optional header row and (field, value) rows."""
+    title: Optional[str]
+    rows: List[Tuple[str, str]]
+    header: Optional[Tuple[str, str]] = None
+
+
+@dataclass
+class Report:
+    """A rendered-text document. `kind` picks the DOCX layout ("hra", "reentry")."""
+    kind: str
+    title: str
+    sections: List[Section] = field(default_factory=list)
+
+    def to_dict(self):
+        return {
+            "kind": self.kind,
+            "title": self.title,
+            "sections": [
+                {
+                    "title": section.title,
+                    "header": list(section.header) if section.header else None,
+                    "rows": [{"field": key, "value": value} for key, value in section.rows],
+                }
+                for section in self.sections
+            ],
+        }
+
+
+# ---------- DOCX ----------
+
+_DOCX_LAYOUTS: Dict[str, Callable[[Report], BytesIO]] = {}
+
+
+def register_docx_layout(kind: str):
+    """Decorator: register the function that draws Reports of `kind` onto the Word template."""
+    def decorator(fn):
+        _DOCX_LAYOUTS[kind] = fn
+        return fn
+    return decorator
+
+
+def render_docx(report: Report) -> BytesIO:
+    layout = _DOCX_LAYOUTS.get(report.kind)
+    if layout is None:
+        raise UnsupportedFormat(f"No DOCX layout registered for {report.kind!r} reports")
+    with stage("docx_render"):
+        return layout(report)
+
+
+# ---------- HTML / JSON ----------
+
+_HTML_STYLE = (
+    "body{font-family:'Century Gothic',Arial,sans-serif;margin:2em;color:#000}"
+    "h1{text-align:center;font-size:1.4em}h2{font-size:1.1em;margin-top:1.5em}"
+    "table{border-collapse:collapse;width:100%}th,td{border:1px solid #000;padding:4px 8px;"
+    "text-align:left;vertical-align:top;white-space:pre-wrap}th{background:#f2f2f2}"
+)
+
+
+def render_html(report: Report) -> BytesIO:
+    """A small self-contained HTML page for in-browser previews."""
+    esc = html.escape
+    parts = [
+        "<!DOCTYPE html><html><head><meta charset=\"utf-8\">",
+        f"<title>{esc(report.title)}</title><style>{_HTML_STYLE}</style></head><body>",
+        f"<h1>{esc(report.title)}</h1>",
+    ]
+    for section in report.sections:
+        if section.title:
+            parts.append(f"<h2>{esc(section.title)}</h2>")
+        parts.append("<table>")
+        if section.header:
+            parts.append("<tr>" + "".join(f"<th>{esc(h)}</th>" for h in section.header) + "</tr>")
+        for key, value in section.rows:
+            parts.append(f"<tr><td>{esc(key)}</td><td>{esc(value)}</td></tr>")
+        parts.append("</table>")
+    parts.append("</body></html>")
+    return BytesIO("".join(parts).encode("utf-8"))
+
+
+def render_json(report: Report) -> BytesIO:
+    return BytesIO(json.dumps(report.to_dict(), indent=2, ensure_ascii=False).encode("utf-8"))
+
+
+# ---------- PDF ----------
+
+def pdf_converter() -> Optional[str]:
+    """Path of the local headless converter (PDF_CONVERTER, else soffice/libreoffice on PATH)."""
+    return os.getenv("PDF_CONVERTER") or shutil.which("soffice") or shutil.which("libreoffice")
+
+
+def render_pdf(report: Report) -> BytesIO:
+    """Render the DOCX and convert it with a headless LibreOffice in a private temp profile."""
+    converter = pdf_converter()
+    if not converter:
+        raise UnsupportedFormat("PDF output needs LibreOffice (soffice) or PDF_CONVERTER")
+
+    with tempfile.TemporaryDirectory(prefix="report-pdf-") as tmp:
+        docx_path = os.path.join(tmp, "report.docx")
+        with open(docx_path, "wb") as f:
+            f.write(render_docx(report).getvalue())
+        # A per-call profile directory lets conversions run in parallel
+        subprocess.run(
+            [converter, f"-env:UserInstallation=file://{tmp}/profile", "--headless",
+             "--convert-to", "pdf", "--outdir", tmp, docx_path],
+            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+            timeout=PDF_CONVERT_TIMEOUT_S, check=True,
+        )
+        with open(os.path.join(tmp, "report.pdf"), "rb") as f:
+            return BytesIO(f.read())
+
+
+# ---------- DISPATCH ----------
+
+RENDERERS: Dict[str, Callable[[Report], BytesIO]] = {
+    "docx": render_docx,
+    "pdf": render_pdf,
+    "html": render_html,
+    "json": render_json,
+}
+
+
+def available_formats() -> List[str]:
+    """Formats that can be produced here, in order of preference (DOCX first)."""
+    return [fmt for fmt in RENDERERS if fmt != "pdf" or pdf_converter()]
+
+
+def negotiate_format(requested: Optional[str] = None, best_match: Callable = None) -> str:
+    """
+    Pick the output format: an explicit `requested` name wins; otherwise `best_match`
+    (e.g. Flask's request.accept_mimetypes.best_match) chooses among available mimetypes.
+    Raises UnsupportedFormat when nothing acceptable can be produced.
+    """
+    formats = available_formats()
+    if requested:
+        fmt = requested.strip().lower()
+        if fmt not in RENDERERS:
+            raise UnsupportedFormat(f"format must be one of {list(RENDERERS)}")
+        if fmt not in formats:
+            raise UnsupportedFormat(f"{fmt} output is not available on this server")
+        return fmt
+    if best_match is None:
+        return "docx"
+    by_mimetype = {FORMATS[fmt][0].split(";")[0]: fmt for fmt in formats}
+    mimetype = best_match(list(by_mimetype))
+    if mimetype is None:
+        raise UnsupportedFormat(f"Acceptable formats: {', '.join(by_mimetype)}")
+    return by_mimetype[mimetype]
+
+
+def render(report: Report, fmt: str = "docx") -> BytesIO:
+    renderer = RENDERERS.get(fmt)
+    if renderer is None:
+        raise UnsupportedFormat(f"format must be one of {list(RENDERERS)}")
+    if fmt == "docx":
+        doc_io = renderer(report)
+    else:
+        with stage(f"{fmt}_render"):
+            doc_io = renderer(report)
+    doc_io.seek(0)
+    return doc_io
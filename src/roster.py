@@ -0,0 +1,134 @@
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from src import snapshot as snapshots
+from src.telemetry import log_event, stage
+
+
+def normalize_name_key(value) -> str:
+    """Key used for case-insensitive name lookups."""
+    return str(value).strip().lower()
+
+
+def normalize_id_key(value) -> str:
+    """Key used for Medi-Cal ID lookups (Excel stores IDs as int or float)."""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+class RosterStore:
+    """
+    Process-wide, in-memory copy of an Excel roster.
+
+    The roster is indexed by normalized name and Medi-Cal ID in dicts, so lookups are
+    plain dict hits. When an Arrow snapshot of the workbook is available (see
+    src/snapshot.py) the dicts hold row numbers and the rows stay in the memory-mapped
+    file, shared by every worker; otherwise the workbook is parsed with pandas and the
+    dicts hold the records. Either way the file's mtime is re-checked at most every
+    `check_interval` seconds and the roster is reloaded when it changes.
+    """
+
+    def __init__(self, path: str, normalize: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None,
+                 name_column: str = "Name of the youth", id_column: str = "Medical ID Number",
+                 check_interval: float = 2.0):
+        self.path = path
+        self.normalize = normalize
+        self.name_column = name_column
+        self.id_column = id_column
+        self.check_interval = check_interval
+
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._checked_at = 0.0
+        self._records: List[Dict[str, Any]] = []
+        # Records on the pandas path, row numbers into the snapshot on the snapshot path
+        self._by_name: Dict[str, List[Any]] = {}
+        self._by_id: Dict[str, Any] = {}
+        self._snapshot: Optional[snapshots.Snapshot] = None
+
+    def _load_snapshot(self) -> Optional[snapshots.Snapshot]:
+        """The mapped snapshot with normalized column names, or None to fall back to pandas."""
+        try:
+            with stage("excel_load"):
+                snap = snapshots.load_snapshot(self.path)
+        except Exception as e:
+            log_event("roster_snapshot_failed", level="warning", path=self.path, error=str(e))
+            return None
+        if snap is None or self.normalize is None or snap.num_rows == 0:
+            return snap
+        # Learn the renames from one row (normalizers only rename columns)
+        sample = self.normalize(snap.table.slice(0, 1).to_pandas())
+        if len(sample.columns) != snap.table.num_columns:
+            return None
+        return snap.rename_columns([str(c) for c in sample.columns])
+
+    def _load(self, mtime):
+        snap = self._load_snapshot()
+        if snap is not None:
+            by_name = snap.positions_by(self.name_column, normalize_name_key)
+            # First row wins, same as taking [0] of a filtered frame
+            by_id = {key: rows[0] for key, rows in snap.positions_by(self.id_column, normalize_id_key).items()}
+            self._snapshot, self._records, self._by_name, self._by_id = snap, [], by_name, by_id
+            self._mtime = mtime
+            log_event("roster_loaded", sample=1.0, path=self.path, rows=snap.num_rows, snapshot=snap.path)
+            return
+
+        with stage("excel_load"):
+            df = pd.read_excel(self.path)
+        if self.normalize is not None:
+            df = self.normalize(df)
+
+        records = df.to_dict(orient="records")
+        by_name, by_id = {}, {}
+        for record in records:
+            if self.name_column in record:
+                by_name.setdefault(normalize_name_key(record[self.name_column]), []).append(record)
+            if self.id_column in record:
+                # First row wins, same as taking [0] of a filtered frame
+                by_id.setdefault(normalize_id_key(record[self.id_column]), record)
+
+        self._snapshot, self._records, self._by_name, self._by_id = None, records, by_name, by_id
+        self._mtime = mtime
+        log_event("roster_loaded", sample=1.0, path=self.path, rows=len(records))
+
+    def _refresh(self):
+        """Reload the workbook if it has never been loaded or its mtime changed."""
+        now = time.monotonic()
+        if self._mtime is not None and now - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            if self._mtime is not None and now - self._checked_at < self.check_interval:
+                return
+            mtime = os.stat(self.path).st_mtime
+            if mtime != self._mtime:
+                self._load(mtime)
+            self._checked_at = now
+
+    def find_by_name(self, name) -> List[Dict[str, Any]]:
+        """All rows whose name matches case-insensitively, in sheet order."""
+        self._refresh()
+        matches = self._by_name.get(normalize_name_key(name), [])
+        snap = self._snapshot
+        if snap is not None:
+            return snap.rows(matches)
+        return [dict(r) for r in matches]
+
+    def find_by_medical_id(self, medical_id) -> Dict[str, Any]:
+        """The first row with this Medi-Cal ID, or {} when there is none."""
+        self._refresh()
+        record = self._by_id.get(normalize_id_key(medical_id))
+        snap = self._snapshot
+        if snap is not None:
+            return snap.row(record) if record is not None else {}
+        return dict(record) if record else {}
+
+    def records(self) -> List[Dict[str, Any]]:
+        self._refresh()
+        if self._snapshot is not None:
+            return self._snapshot.records()
+        return [dict(r) for r in self._records]
@@ -0,0 +1,344 @@
+import bisect
+import re
+import threading
+import time
+import unicodedata
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.telemetry import log_event
+
+# ✅ In-memory candidate search: exact / prefix / typo-tolerant matching over every source
+
+
+def normalize_text(value) -> str:
+    """Lowercase, strip accents and collapse everything but letters and digits to single spaces."""
+    text = unicodedata.normalize("NFKD", str(value or ""))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    return " ".join(re.findall(r"[a-z0-9]+", text))
+
+
+def trigrams(text: str) -> set:
+    """Character trigrams of each word, padded so short words and word starts still count."""
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def bounded_edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Optimal-string-alignment distance (insert, delete, substitute, swap adjacent letters),
+    or limit + 1 as soon as it is known to exceed `limit`. "jonh" → "john" is one edit.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before, previous = None, list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                cost = min(cost, before[j - 2] + 1)
+            current.append(cost)
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return previous[-1]
+
+
+# Diffs larger than this rebuild the sorted token/ID lists instead of inserting one by one
+BULK_REINDEX_THRESHOLD = 1000
+
+
+def max_edits(token: str) -> int:
+    """Typos tolerated per query word: none for 1–2 letters, one up to 6, two beyond."""
+    return 0 if len(token) <= 2 else 1 if len(token) <= 6 else 2
+
+
+class SearchSource:
+    """
+    One backend feeding the index. `load()` returns candidate dicts
+    ({"name", "medical_id", "display_text"}); `version()` is a cheap change probe
+    (file mtime, table modification time, row count). The full load only runs when the
+    version changes or, with `max_age`, once the last load is that many seconds old, which
+    catches edits a coarse probe misses. A version of None means "unknown": it reloads
+    every `max_age` seconds, or on every check when there is no `max_age`.
+    """
+
+    def __init__(self, load: Callable[[], List[Dict[str, Any]]], version: Callable[[], Any] = None,
+                 interval: float = 60.0, max_age: Optional[float] = None):
+        self.load = load
+        self.version = version
+        self.interval = interval
+        self.max_age = max_age
+
+        self.last_version = None
+        self.loaded_at = None
+        self.checked_at = None
+        self.error = None
+
+    def is_current(self, version) -> bool:
+        """Whether the last load can be kept for this version."""
+        if self.loaded_at is None:
+            return False
+        if self.max_age is not None and time.time() - self.loaded_at >= self.max_age:
+            return False
+        if version is None:
+            return self.max_age is not None
+        return version == self.last_version
+
+
+class CandidateIndex:
+    """
+    Candidates from every source, merged by Medical ID (earlier sources win, matching
+    get_candidates_by_name) and indexed for typeahead:
+
+      - exact name and Medical ID prefix lookups
+      - word-prefix matches ("jo sm" → "John Smith") via a sorted token list
+      - typo-tolerant matches ("jonh smtih") via trigram candidates checked by edit distance
+
+    Sources refresh in a background thread; each refresh diffs the new rows against
+    the previous snapshot and only re-indexes the candidates that changed.
+    """
+
+    def __init__(self, sources: Dict[str, SearchSource], poll_interval: float = 5.0):
+        self.sources = sources
+        self.poll_interval = poll_interval
+
+        self._lock = threading.RLock()
+        self._snapshots: Dict[str, Dict[str, Dict[str, Any]]] = {name: {} for name in sources}
+        self._docs: Dict[str, Dict[str, Any]] = {}
+        self._tokens: List[Tuple[str, str]] = []      # sorted (token, key)
+        self._grams: Dict[str, set] = {}              # trigram → keys
+        self._by_name: Dict[str, set] = {}            # normalized full name → keys
+        self._ids: List[str] = []                     # sorted Medical IDs
+
+        self._thread = None
+        self._first_refresh = threading.Event()
+
+    # ---------- indexing ----------
+
+    def _merged(self, key):
+        merged, sources = None, []
+        for name in self.sources:
+            entry = self._snapshots[name].get(key)
+            if entry is not None:
+                sources.append(name)
+                merged = merged or entry
+        if merged is None:
+            return None
+        name = normalize_text(merged["name"])
+        return {**merged, "sources": sources, "_norm": name, "_words": name.split()}
+
+    def _unindex(self, key, doc, bulk=False):
+        for word in set(doc["_words"]) if not bulk else ():
+            i = bisect.bisect_left(self._tokens, (word, key))
+            if i < len(self._tokens) and self._tokens[i] == (word, key):
+                del self._tokens[i]
+        for gram in trigrams(doc["_norm"]):
+            keys = self._grams.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._grams[gram]
+        names = self._by_name.get(doc["_norm"])
+        if names is not None:
+            names.discard(key)
+            if not names:
+                del self._by_name[doc["_norm"]]
+        i = bisect.bisect_left(self._ids, key) if not bulk else len(self._ids)
+        if i < len(self._ids) and self._ids[i] == key:
+            del self._ids[i]
+
+    def _index(self, key, doc, bulk=False):
+        for gram in trigrams(doc["_norm"]):
+            self._grams.setdefault(gram, set()).add(key)
+        self._by_name.setdefault(doc["_norm"], set()).add(key)
+        if not bulk:
+            for word in set(doc["_words"]):
+                bisect.insort(self._tokens, (word, key))
+            bisect.insort(self._ids, key)
+
+    def _apply(self, source_name, rows):
+        snapshot = {}
+        for row in rows:
+            key = str(row.get("medical_id") or "").strip()
+            if key and row.get("name"):
+                snapshot.setdefault(key, row)
+
+        with self._lock:
+            previous = self._snapshots[source_name]
+            changed = [k for k in snapshot if previous.get(k) != snapshot[k]]
+            changed += [k for k in previous if k not in snapshot]
+            self._snapshots[source_name] = snapshot
+            # Small diffs patch the sorted lists in place; big ones (first load) re-sort once
+            bulk = len(changed) > BULK_REINDEX_THRESHOLD
+            for key in changed:
+                old, new = self._docs.get(key), self._merged(key)
+                if old == new:
+                    continue
+                if old is not None:
+                    self._unindex(key, old, bulk)
+                if new is None:
+                    self._docs.pop(key, None)
+                else:
+                    self._docs[key] = new
+                    self._index(key, new, bulk)
+            if bulk:
+                self._tokens = sorted((word, key) for key, doc in self._docs.items() for word in set(doc["_words"]))
+                self._ids = sorted(self._docs)
+        return len(changed)
+
+    def refresh(self, force: bool = False) -> Dict[str, int]:
+        """Reload every source that is due and whose version changed; returns changed keys per source."""
+        changes = {}
+        now = time.monotonic()
+        for name, source in self.sources.items():
+            if not force and source.checked_at is not None and now - source.checked_at < source.interval:
+                continue
+            source.checked_at = now
+            try:
+                version = source.version() if source.version else None
+                if not force and source.is_current(version):
+                    continue
+                changes[name] = self._apply(name, source.load())
+                source.last_version = version
+                source.loaded_at = time.time()
+                source.error = None
+            except Exception as e:
+                source.error = str(e)
+                log_event("search_refresh_failed", level="warning", source=name, error=str(e))
+            # Sources come in priority order, so queries can start once the first one is in
+            self._first_refresh.set()
+        return changes
+
+    def _run(self):
+        while True:
+            self.refresh()
+            time.sleep(self.poll_interval)
+
+    def start(self, wait: float = 0.0):
+        """Start the background refresher (idempotent); optionally wait for the first pass."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="candidate-index", daemon=True)
+                self._thread.start()
+        if wait:
+            self._first_refresh.wait(wait)
+
+    # ---------- queries ----------
+
+    def _public(self, key, match, score):
+        doc = self._docs[key]
+        return {
+            "name": doc["name"],
+            "medical_id": doc["medical_id"],
+            "display_text": doc["display_text"],
+            "sources": doc["sources"],
+            "match": match,
+            "score": round(score, 3),
+        }
+
+    def _prefix_range(self, word):
+        """[lo, hi) of the (token, key) pairs whose token starts with `word`."""
+        lo = bisect.bisect_left(self._tokens, (word, ""))
+        hi = bisect.bisect_left(self._tokens, (word + "\U0010ffff", ""), lo)
+        return lo, hi
+
+    def _prefix_matches(self, words, cap):
+        """
+        Keys where every query word prefixes some word of the name, at most `cap` of them.
+        Candidates come from the most selective word's range, so the cap never drops a
+        match that a common first word ("john") would have crowded out.
+        """
+        lo, hi = min((self._prefix_range(w) for w in set(words)), key=lambda r: r[1] - r[0])
+        keys = []
+        seen = set()
+        for _, key in self._tokens[lo:hi]:
+            if key in seen:
+                continue
+            seen.add(key)
+            doc_words = self._docs[key]["_words"]
+            if all(any(w.startswith(q) for w in doc_words) for q in words):
+                keys.append(key)
+                if len(keys) >= cap:
+                    break
+        return keys
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Best matches for a typeahead query, exact before prefix before fuzzy."""
+        id_match = re.search(r"Medical ID-(\d+)", query or "")
+        norm = normalize_text(query)
+        if not norm:
+            return []
+        words = norm.split()
+        scored: Dict[str, Tuple[float, str]] = {}
+
+        def offer(key, score, match):
+            if scored.get(key, (-1.0, ""))[0] < score:
+                scored[key] = (score, match)
+
+        with self._lock:
+            # A full display string (e.g. a profile picked earlier) resolves to that candidate
+            if id_match and id_match.group(1) in self._docs:
+                return [self._public(id_match.group(1), "exact", 1.0)]
+
+            for key in self._by_name.get(norm, ()):
+                offer(key, 1.0, "exact")
+
+            if norm.isdigit():
+                i = bisect.bisect_left(self._ids, norm)
+                while i < len(self._ids) and self._ids[i].startswith(norm) and len(scored) < limit * 5:
+                    offer(self._ids[i], 0.95 if self._ids[i] == norm else 0.9, "id")
+                    i += 1
+
+            # Every query word must prefix some word of the name
+            for key in self._prefix_matches(words, cap=limit * 50):
+                coverage = len(norm) / max(len(self._docs[key]["_norm"]), 1)
+                offer(key, 0.7 + 0.2 * coverage, "prefix")
+
+            # Typo tolerance: trigram overlap picks candidates, edit distance confirms them
+            if len(scored) < limit and any(max_edits(q) for q in words):
+                query_grams = trigrams(norm)
+                counts: Dict[str, int] = {}
+                for gram in query_grams:
+                    for key in self._grams.get(gram, ()):
+                        counts[key] = counts.get(key, 0) + 1
+                threshold = max(1, len(query_grams) // 3)
+                shortlist = sorted((k for k, c in counts.items() if c >= threshold and k not in scored),
+                                   key=lambda k: -counts[k])[:limit * 20]
+                for key in shortlist:
+                    doc_words = self._docs[key]["_words"]
+                    edits = 0
+                    for q in words:
+                        allowed = max_edits(q)
+                        # Compare with whole words and with word prefixes of the typed length
+                        best = min(
+                            min(bounded_edit_distance(q, w, allowed), bounded_edit_distance(q, w[:len(q)], allowed))
+                            for w in doc_words
+                        )
+                        if best > allowed:
+                            break
+                        edits += best
+                    else:
+                        offer(key, 0.6 - 0.1 * edits + 0.1 * counts[key] / len(query_grams), "fuzzy")
+
+            ranked = sorted(scored.items(), key=lambda item: (-item[1][0], self._docs[item[0]]["_norm"], item[0]))
+            return [self._public(key, match, score) for key, (score, match) in ranked[:limit]]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "candidates": len(self._docs),
+                "running": self._thread is not None,
+                "sources": {
+                    name: {
+                        "rows": len(self._snapshots[name]),
+                        "loaded_at": source.loaded_at,
+                        "version": None if source.last_version is None else str(source.last_version),
+                        "error": source.error,
+                    }
+                    for name, source in self.sources.items()
+                },
+            }
@@ -0,0 +1,274 @@
+"""
+Columnar snapshots of the Excel/CSV rosters in ExcelFiles/.
+
+    python -m src.snapshot [ExcelFiles] [--out DIR]
+
+Each workbook is read once with pandas and written as an uncompressed Arrow IPC file
+(string columns dictionary-encoded) next to a note of the source's size, mtime and hash.
+The app memory-maps the snapshot instead of parsing the workbook, so every gunicorn worker
+reads the same page-cache pages and nothing is copied into per-worker pandas frames.
+
+Each worker keeps only dict indexes of normalized name / Medi-Cal ID → row numbers; the
+cells of a matching row are read from the mapped buffers when it is looked up.
+
+A snapshot whose source has changed is rebuilt on load (ROSTER_SNAPSHOT_REBUILD=1, the
+default) or ignored, which sends callers back to pd.read_excel.
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+# Bump when the snapshot layout or the pandas → Arrow conversion changes
+SNAPSHOT_VERSION = 1
+SNAPSHOTS_ENABLED = os.getenv("ROSTER_SNAPSHOTS", "1").lower() in ("1", "true", "yes")
+SNAPSHOT_DIR = os.getenv("ROSTER_SNAPSHOT_DIR", os.path.join("ExcelFiles", ".snapshots"))
+SNAPSHOT_REBUILD = os.getenv("ROSTER_SNAPSHOT_REBUILD", "1").lower() in ("1", "true", "yes")
+SOURCE_PATTERNS = ("*.xlsx", "*.xls", "*.csv")
+
+_METADATA_KEY = b"serrano.snapshot"
+
+
+def _file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def _source_info(path) -> Dict[str, Any]:
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def snapshot_path(source: str, snapshot_dir: str = None) -> str:
+    # Keep the extension: row_1.xlsx and row_1.csv are different sources
+    return os.path.join(snapshot_dir or SNAPSHOT_DIR, f"{os.path.basename(source)}.arrow")
+
+
+def read_source(path: str) -> pd.DataFrame:
+    """The workbook exactly as the pandas path reads it."""
+    return pd.read_csv(path) if path.lower().endswith(".csv") else pd.read_excel(path)
+
+
+def _to_arrow(df: pd.DataFrame):
+    """pandas → Arrow, with all-string object columns dictionary-encoded."""
+    import pyarrow as pa
+
+    columns, names = [], []
+    for name in df.columns:
+        series = df[name]
+        if series.dtype == object:
+            values = series.dropna()
+            if values.map(lambda v: isinstance(v, str)).all():
+                array = pa.array(series, type=pa.string(), from_pandas=True).dictionary_encode()
+            else:
+                # Mixed types (e.g. numbers and text in one column) are kept as text
+                array = pa.array(series.map(lambda v: v if pd.isna(v) else str(v)), type=pa.string(), from_pandas=True)
+        else:
+            array = pa.array(series, from_pandas=True)
+        columns.append(array)
+        names.append(str(name))
+    return pa.Table.from_arrays(columns, names=names)
+
+
+def _write_table(table, dest, metadata: Dict[str, Any]):
+    """Write one record batch, uncompressed (required for zero-copy mmap reads), atomically."""
+    import pyarrow as pa
+
+    table = table.replace_schema_metadata({_METADATA_KEY: json.dumps(metadata).encode("utf-8")})
+    directory = os.path.dirname(dest) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    os.close(fd)
+    try:
+        with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table, max_chunksize=max(table.num_rows, 1))
+        os.replace(tmp, dest)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def write_snapshot(source: str, dest: str = None) -> Dict[str, Any]:
+    """Convert one workbook to an Arrow snapshot; returns its metadata."""
+    dest = dest or snapshot_path(source)
+    start = time.perf_counter()
+    df = read_source(source)
+    table = _to_arrow(df)
+    metadata = {
+        "version": SNAPSHOT_VERSION,
+        "source": os.path.abspath(source),
+        "source_sha": _file_digest(source),
+        **{f"source_{k}": v for k, v in _source_info(source).items()},
+        "rows": table.num_rows,
+        "columns": table.column_names,
+    }
+    _write_table(table, dest, metadata)
+    metadata["ingest_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    metadata["bytes"] = os.path.getsize(dest)
+    return metadata
+
+
+def _map_table(path):
+    import pyarrow as pa
+
+    with pa.memory_map(path, "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+    metadata = json.loads((table.schema.metadata or {}).get(_METADATA_KEY, b"{}"))
+    return table, metadata
+
+
+def _array(column):
+    """The column as one array; a single chunk is returned as-is (still backed by the mapping)."""
+    return column.chunk(0) if column.num_chunks == 1 else column.combine_chunks()
+
+
+def _is_current(metadata, source) -> bool:
+    if metadata.get("version") != SNAPSHOT_VERSION:
+        return False
+    info = _source_info(source)
+    if metadata.get("source_size") == info["size"] and metadata.get("source_mtime_ns") == info["mtime_ns"]:
+        return True
+    # Same bytes with a new mtime (checkout, copy) still match
+    return metadata.get("source_size") == info["size"] and metadata.get("source_sha") == _file_digest(source)
+
+
+def _column_reader(array) -> Callable[[int], Any]:
+    """
+    Row number → cell value, read straight from the mapped buffers. Missing cells read as
+    NaN, as on the pandas path (callers rely on NaN being truthy).
+    Dictionary-encoded strings index their decoded dictionary (one entry per distinct
+    value) and numbers read a NumPy view, so a lookup costs a few array hits per column.
+    """
+    import pyarrow as pa
+
+    # memoryview indexing yields plain Python ints/floats/bools, much faster than NumPy scalars
+    if pa.types.is_dictionary(array.type):
+        values = array.dictionary.to_pylist()
+        if not array.indices.null_count:
+            positions = memoryview(array.indices.to_numpy())
+            return lambda i: values[positions[i]]
+        values.append(float("nan"))  # nulls point at this extra entry
+        positions = memoryview(array.indices.fill_null(len(values) - 1).to_numpy())
+        return lambda i: values[positions[i]]
+    if pa.types.is_integer(array.type) or pa.types.is_floating(array.type) or pa.types.is_boolean(array.type):
+        # Zero-copy for null-free ints and floats; missing floats read as NaN
+        data = memoryview(array.to_numpy(zero_copy_only=False))
+        return data.__getitem__
+    def read(i):
+        value = array[i].as_py()
+        return float("nan") if value is None else value
+    return read
+
+
+class Snapshot:
+    """A memory-mapped roster snapshot: rows by position and per-column key → rows indexes."""
+
+    def __init__(self, path: str, table, metadata: Dict[str, Any]):
+        self.path = path
+        self.table = table
+        self.metadata = metadata
+        # Snapshots are written as one record batch, so each column is a single mapped array
+        self._arrays = [(name, _array(column)) for name, column in zip(table.column_names, table.columns)]
+        self._readers = [(name, _column_reader(array)) for name, array in self._arrays]
+
+    @property
+    def num_rows(self) -> int:
+        return self.table.num_rows
+
+    def rename_columns(self, names: List[str]) -> "Snapshot":
+        """Same mapped data under new column names (zero-copy)."""
+        return Snapshot(self.path, self.table.rename_columns(names), self.metadata)
+
+    def row(self, i: int) -> Dict[str, Any]:
+        return {name: read(i) for name, read in self._readers}
+
+    def rows(self, positions: List[int]) -> List[Dict[str, Any]]:
+        return [self.row(i) for i in positions]
+
+    def records(self) -> List[Dict[str, Any]]:
+        # Missing cells are NaN on the pandas path, and callers rely on NaN being truthy
+        return [{key: float("nan") if value is None else value for key, value in record.items()}
+                for record in self.table.to_pylist()]
+
+    def positions_by(self, column: str, normalize: Callable[[Any], str]) -> Dict[str, List[int]]:
+        """normalize(value) → row numbers in sheet order ({} when the column is missing)."""
+        index: Dict[str, List[int]] = {}
+        if column not in self.table.column_names:
+            return index
+        array = dict(self._arrays)[column]
+        import pyarrow as pa
+
+        if pa.types.is_dictionary(array.type):
+            # Normalize each distinct value once
+            keys = [normalize(value) for value in array.dictionary.to_pylist()]
+            nan_key = normalize(float("nan"))
+            indices = array.indices.fill_null(-1) if array.indices.null_count else array.indices
+            for row, position in enumerate(indices.to_numpy().tolist()):
+                index.setdefault(keys[position] if position >= 0 else nan_key, []).append(row)
+        else:
+            for row, value in enumerate(array.to_pylist()):
+                index.setdefault(normalize(float("nan") if value is None else value), []).append(row)
+        return index
+
+
+def load_snapshot(source: str, snapshot_dir: str = None) -> Optional[Snapshot]:
+    """
+    Memory-map the snapshot for `source`. Returns None when pyarrow is unavailable or the
+    snapshot is missing or stale and ROSTER_SNAPSHOT_REBUILD is off, or ROSTER_SNAPSHOTS=0.
+    """
+    if not SNAPSHOTS_ENABLED:
+        return None
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return None
+    path = snapshot_path(source, snapshot_dir)
+    try:
+        table, metadata = _map_table(path)
+        if _is_current(metadata, source):
+            return Snapshot(path, table, metadata)
+    except (OSError, ValueError):
+        pass
+    if not SNAPSHOT_REBUILD:
+        return None
+    write_snapshot(source, path)
+    table, metadata = _map_table(path)
+    return Snapshot(path, table, metadata)
+
+
+def find_sources(paths: List[str]) -> List[str]:
+    """Workbooks under the given files/directories, skipping Office lock files (~$...)."""
+    sources = []
+    for path in paths:
+        if os.path.isdir(path):
+            for pattern in SOURCE_PATTERNS:
+                sources.extend(sorted(glob.glob(os.path.join(path, pattern))))
+        else:
+            sources.append(path)
+    return [s for s in dict.fromkeys(sources) if not os.path.basename(s).startswith("~$")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert Excel/CSV rosters to memory-mappable Arrow snapshots.")
+    parser.add_argument("paths", nargs="*", default=["ExcelFiles"], help="workbooks or directories")
+    parser.add_argument("--out", default=None, help=f"snapshot directory (default {SNAPSHOT_DIR})")
+    args = parser.parse_args()
+
+    for source in find_sources(args.paths):
+        metadata = write_snapshot(source, snapshot_path(source, args.out))
+        print(f"🧊 Snapshot: {source} → {snapshot_path(source, args.out)} "
+              f"({metadata['rows']:,} rows, {metadata['bytes']:,} bytes, {metadata['ingest_ms']} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from src.telemetry import log_event
+
+# ✅ Concurrent fan-out across the Excel / Cloud SQL / BigQuery sources
+
+DEFAULT_TIMEOUT_S = float(os.getenv("SOURCE_TIMEOUT_S", "15"))
+DEFAULT_POOL_SIZE = int(os.getenv("SOURCE_FANOUT_WORKERS", "12"))
+
+
+class SourceError(RuntimeError):
+    """One or more required sources raised, timed out or were refused because their pool was full."""
+
+    def __init__(self, failures: Dict[str, str]):
+        self.failures = failures
+        super().__init__("; ".join(f"{name}: {reason}" for name, reason in failures.items()))
+
+
+class _SourcePool:
+    """
+    Threads for one source. At most `size` calls are in flight, including calls that already
+    missed their timeout and are still running, so a stuck backend uses up its own pool and
+    nobody else's. When every slot is taken new calls are refused instead of queued.
+    """
+
+    def __init__(self, name: str, size: int):
+        self.size = size
+        self._executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix=f"source-{name}")
+        self._slots = threading.BoundedSemaphore(size)
+
+    def submit(self, fn):
+        """The call's future, or None when the pool is full."""
+        if not self._slots.acquire(blocking=False):
+            return None
+        try:
+            future = self._executor.submit(fn)
+        except BaseException:
+            self._slots.release()
+            raise
+        # Done callbacks also fire when the future is cancelled before it runs
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+
+_pools: Dict[str, _SourcePool] = {}
+_pools_pid = None
+_pools_lock = threading.Lock()
+
+
+def _get_pool(name: str) -> _SourcePool:
+    """This process's pool for `name` (created lazily; threads do not survive a fork)."""
+    global _pools, _pools_pid
+    with _pools_lock:
+        if _pools_pid != os.getpid():
+            _pools, _pools_pid = {}, os.getpid()
+        pool = _pools.get(name)
+        if pool is None:
+            size = int(os.getenv(f"SOURCE_FANOUT_WORKERS_{name.upper()}", DEFAULT_POOL_SIZE))
+            pool = _pools[name] = _SourcePool(name, size)
+        return pool
+
+
+def source_timeout(name: str) -> float:
+    """Per-source timeout: SOURCE_TIMEOUT_<NAME>_S, falling back to SOURCE_TIMEOUT_S."""
+    value = os.getenv(f"SOURCE_TIMEOUT_{name.upper()}_S")
+    return float(value) if value else DEFAULT_TIMEOUT_S
+
+
+def fan_out(calls: Dict[str, Callable[[], Any]], default: Any = None,
+            timeouts: Optional[Dict[str, float]] = None, pool: Optional[str] = None,
+            required: Iterable[str] = ()) -> Dict[str, Any]:
+    """
+    Run every source lookup in `calls` concurrently and collect the results.
+
+    Each source runs on its own bounded pool (or all of them on `pool`, e.g. one per
+    backend when the keys are table names). The returned dict keeps the key order of
+    `calls`, so callers can merge in their usual priority order. A source that raises,
+    misses its timeout (one deadline per source, measured from submission) or is refused
+    because its pool is full is reported and mapped to `default`; the other sources'
+    results are still returned. If any of the `required` sources failed, SourceError is
+    raised instead.
+    """
+    timeouts = timeouts or {}
+    start = time.monotonic()
+    # Each call runs in a copy of the caller's context, so its stages keep the request's endpoint label
+    futures = {name: _get_pool(pool or name).submit(lambda fn=fn, ctx=contextvars.copy_context(): ctx.run(fn))
+               for name, fn in calls.items()}
+
+    results, failures = {}, {}
+    for name, future in futures.items():
+        timeout = timeouts.get(name, source_timeout(name))
+        try:
+            if future is None:
+                raise RuntimeError("pool full")
+            results[name] = future.result(timeout=max(start + timeout - time.monotonic(), 0))
+        except FutureTimeout:
+            future.cancel()
+            log_event("source_timeout", level="warning", source=name, elapsed_s=round(time.monotonic() - start, 3))
+            failures[name] = f"timed out after {timeout}s"
+        except Exception as e:
+            event = "source_refused" if future is None else "source_error"
+            log_event(event, level="warning", source=name, pool=pool or name, error=str(e))
+            failures[name] = str(e)
+        if name in failures:
+            results[name] = default() if callable(default) else default
+
+    failed_required = {name: failures[name] for name in required if name in failures}
+    if failed_required:
+        raise SourceError(failed_required)
+    return results
@@ -0,0 +1,164 @@
+"""
+Parameterized, column-projected reads from one Cloud SQL table.
+
+Every lookup uses a fixed statement text with bound parameters (never string
+interpolation), so values cannot inject SQL, and MySQL sees one query digest per
+lookup kind. SQLAlchemy caches the compiled statement. PyMySQL binds parameters
+client-side; it has no server-side PREPARE.
+
+Only the columns the caller can map (e.g. CANON_MAP / FIELD_MAP) are selected,
+intersected with the table's real columns, which are read once per process.
+Lookups can narrow that further to the columns one request needs (`columns=`);
+each distinct column set gets its own cached statement.
+
+Expected indexes (see SQLTableReader.index_ddl / ensure_indexes):
+
+    CREATE INDEX ix_<table>_medical_id_number ON <table> (medical_id_number);
+    CREATE INDEX ix_<table>_youth_name ON <table> (youth_name);   -- (youth_name(191)) for TEXT columns
+"""
+import threading
+from typing import Iterable, List, Optional
+
+import pandas as pd
+
+from src import db
+
+
+class SQLTableReader:
+    """
+    Lookups by Medical ID and by name against `table`, selecting only `wanted_columns`
+    (plus the key columns) that actually exist in the table.
+    """
+
+    def __init__(self, table: str, wanted_columns: Iterable[str],
+                 id_column: str = "medical_id_number", name_column: str = "youth_name"):
+        self.table = table
+        self.id_column = id_column
+        self.name_column = name_column
+        self.wanted_columns = list(dict.fromkeys([id_column, name_column, *wanted_columns]))
+
+        self._columns = None
+        self._statements = {}
+        self._lock = threading.Lock()
+
+    # ---------- schema ----------
+
+    def columns(self, conn) -> List[str]:
+        """Wanted columns present in the table, in table order (discovered once)."""
+        if self._columns is None:
+            from sqlalchemy import inspect
+
+            with self._lock:
+                if self._columns is None:
+                    wanted = set(self.wanted_columns)
+                    self._columns = [c["name"] for c in inspect(conn).get_columns(self.table) if c["name"] in wanted]
+        return self._columns
+
+    def _projection(self, conn, columns=None) -> Optional[tuple]:
+        """Requested columns that exist in the table, in table order (None = every wanted column)."""
+        if columns is None:
+            return None
+        requested = set(columns)
+        return tuple(c for c in self.columns(conn) if c in requested)
+
+    def _table(self, conn, columns=None):
+        from sqlalchemy import column, table
+
+        names = self.columns(conn) if columns is None else columns
+        # The key columns are always selected: lookups filter on them and callers index by them
+        return table(self.table, *(column(name) for name in dict.fromkeys([self.id_column, self.name_column, *names])))
+
+    def _statement(self, conn, kind: str, columns=None):
+        """Build (once) and return the select for a lookup kind and column set."""
+        columns = self._projection(conn, columns)
+        key = (kind, columns)
+        stmt = self._statements.get(key)
+        if stmt is None:
+            from sqlalchemy import bindparam, select
+
+            t = self._table(conn, columns)
+            stmt = select(*t.columns)
+            if kind == "id":
+                stmt = stmt.where(t.c[self.id_column] == bindparam("mid"))
+            elif kind == "name":
+                stmt = stmt.where(t.c[self.name_column] == bindparam("name"))
+            elif kind == "ids":
+                stmt = stmt.where(t.c[self.id_column].in_(bindparam("ids", expanding=True)))
+            self._statements[key] = stmt
+        return stmt
+
+    # ---------- reads ----------
+
+    @staticmethod
+    def _frame(result) -> pd.DataFrame:
+        return pd.DataFrame(result.fetchall(), columns=list(result.keys()))
+
+    def fetch(self, name: Optional[str] = None, medical_id=None, conn=None,
+              columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """Rows for a Medical ID when given, otherwise for an exact name; only `columns` when given."""
+        if conn is None:
+            with db.connection() as conn:
+                return self.fetch(name, medical_id, conn, columns)
+        if medical_id:
+            return self._frame(conn.execute(self._statement(conn, "id", columns), {"mid": str(medical_id)}))
+        return self._frame(conn.execute(self._statement(conn, "name", columns), {"name": name}))
+
+    def fetch_many(self, medical_ids, chunk_size: int = 1000, conn=None,
+                   columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """Rows for many Medical IDs, one IN (...) query per chunk; only `columns` when given."""
+        if not medical_ids:
+            return pd.DataFrame()
+        if conn is None:
+            with db.connection() as conn:
+                return self.fetch_many(medical_ids, chunk_size, conn, columns)
+        stmt = self._statement(conn, "ids", columns)
+        frames = [
+            self._frame(conn.execute(stmt, {"ids": [str(mid) for mid in medical_ids[i:i + chunk_size]]}))
+            for i in range(0, len(medical_ids), chunk_size)
+        ]
+        return pd.concat(frames, ignore_index=True)
+
+    def fetch_all(self, columns: Iterable[str], conn=None) -> pd.DataFrame:
+        """Every row, restricted to `columns` (e.g. the few the search index needs)."""
+        if conn is None:
+            with db.connection() as conn:
+                return self.fetch_all(columns, conn)
+        return self._frame(conn.execute(self._statement(conn, "all", list(columns))))
+
+    # ---------- indexes ----------
+
+    def _index_name(self, column):
+        return f"ix_{self.table}_{column}".lower()[:64]
+
+    def index_ddl(self, conn) -> List[str]:
+        """CREATE INDEX statements for key columns that are not the first column of any index."""
+        from sqlalchemy import inspect, types
+
+        inspector = inspect(conn)
+        indexed = {ix["column_names"][0] for ix in inspector.get_indexes(self.table) if ix["column_names"]}
+        indexed.update(inspector.get_pk_constraint(self.table).get("constrained_columns", [])[:1])
+        column_types = {c["name"]: c["type"] for c in inspector.get_columns(self.table)}
+        quote = conn.dialect.identifier_preparer.quote
+
+        statements = []
+        for col in (self.id_column, self.name_column):
+            if col in indexed or col not in column_types:
+                continue
+            # MySQL can only index a prefix of TEXT/BLOB columns
+            prefix = "(191)" if conn.dialect.name == "mysql" and isinstance(column_types[col], (types.Text, types.LargeBinary)) else ""
+            statements.append(f"CREATE INDEX {quote(self._index_name(col))} ON {quote(self.table)} ({quote(col)}{prefix})")
+        return statements
+
+    def ensure_indexes(self, conn=None) -> List[str]:
+        """Create the missing lookup indexes; returns the statements that were run."""
+        if conn is None:
+            with db.connection() as conn:
+                return self.ensure_indexes(conn)
+        from sqlalchemy import text
+
+        statements = self.index_ddl(conn)
+        for ddl in statements:
+            conn.execute(text(ddl))
+        if statements:
+            conn.commit()
+        return statements
@@ -0,0 +1,312 @@
+import atexit
+import contextvars
+import functools
+import glob
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Optional, Tuple
+
+# ✅ Per-stage latency histograms (Prometheus text format) and sampled, structured logging
+
+# Seconds; stages range from sub-millisecond roster hits to minute-long model calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80, 120)
+
+# Fraction of routine (info) events that are logged; warnings and errors are always logged
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.1"))
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
+# gunicorn workers write their snapshots here so /metrics on any worker covers all of them
+METRICS_DIR = os.getenv("METRICS_DIR", os.path.join(tempfile.gettempdir(), "serrano_metrics"))
+METRICS_FLUSH_S = float(os.getenv("METRICS_FLUSH_S", "5"))
+
+_endpoint = contextvars.ContextVar("endpoint", default="background")
+
+
+def current_endpoint() -> str:
+    return _endpoint.get()
+
+
+def set_endpoint(name: str):
+    """Label this request's stages with `name`; returns a token for reset_endpoint()."""
+    return _endpoint.set(name)
+
+
+def reset_endpoint(token):
+    _endpoint.reset(token)
+
+
+@contextmanager
+def endpoint_context(name: str):
+    """Label every stage observed inside the block (and in fan-out threads it starts) with `name`."""
+    token = _endpoint.set(name)
+    try:
+        yield
+    finally:
+        _endpoint.reset(token)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()) -> str:
+    pairs = [*zip(names, values), *extra]
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}" if pairs else ""
+
+
+class Histogram:
+    """Cumulative histogram with fixed buckets, one series per label-value tuple."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str], buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, ...], list] = {}   # labels → [bucket counts..., +Inf count, sum]
+
+    def observe(self, value: float, *labels):
+        index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+        _schedule_flush()
+
+    def snapshot(self) -> Dict[Tuple[str, ...], list]:
+        with self._lock:
+            return {labels: list(series) for labels, series in self._series.items()}
+
+    def exposition(self, snapshot=None) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, series in sorted((snapshot if snapshot is not None else self.snapshot()).items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), series[:-1]):
+                cumulative += count
+                le = bound if bound == "+Inf" else repr(float(bound))
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, [('le', le)])} {cumulative}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {series[-1]}")
+        return "\n".join(lines)
+
+
+class Counter:
+    """Monotonic counter, one series per label-value tuple."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._series[labels] = self._series.get(labels, 0) + amount
+        _schedule_flush()
+
+    def snapshot(self) -> Dict[Tuple[str, ...], float]:
+        with self._lock:
+            return dict(self._series)
+
+    def exposition(self, snapshot=None) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted((snapshot if snapshot is not None else self.snapshot()).items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value}")
+        return "\n".join(lines)
+
+
+# Stages: excel, cloud_sql, bigquery, openai, json_parse, <fmt>_render (docx_render, ...) and save
+STAGE_SECONDS = Histogram("serrano_stage_duration_seconds", "Time spent in one stage of a request.",
+                          ["stage", "endpoint"])
+STAGE_ERRORS = Counter("serrano_stage_errors_total", "Stages that raised.", ["stage", "endpoint"])
+REQUEST_SECONDS = Histogram("serrano_request_duration_seconds", "End-to-end request time.",
+                            ["endpoint", "status"])
+# event: calls, retries, failures, deadline_exceeded (src/llm_client.py)
+OPENAI_EVENTS = Counter("serrano_openai_events_total", "OpenAI request attempts, retries, failures and deadline misses.",
+                        ["event", "endpoint"])
+OPENAI_SECONDS = Histogram("serrano_openai_response_seconds", "Time for an OpenAI request attempt that succeeded.",
+                           ["endpoint"])
+HRA_STREAMS = Counter("serrano_hra_streams_total", "Streamed HRA model responses.", ["endpoint"])
+HRA_FIRST_SECTION_SECONDS = Histogram("serrano_hra_first_section_seconds",
+                                      "Time from the start of a streamed HRA response to its first section.",
+                                      ["endpoint"])
+METRICS = (STAGE_SECONDS, STAGE_ERRORS, REQUEST_SECONDS, OPENAI_EVENTS, OPENAI_SECONDS, HRA_STREAMS,
+           HRA_FIRST_SECTION_SECONDS)
+
+
+@contextmanager
+def stage(name: str):
+    """Time the block into STAGE_SECONDS{stage=name, endpoint=<current endpoint>}."""
+    endpoint = _endpoint.get()
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        STAGE_ERRORS.inc(name, endpoint)
+        raise
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, name, endpoint)
+
+
+def timed_stage(name: str):
+    """Decorator form of stage()."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def observe_request(endpoint: str, status: int, seconds: float):
+    REQUEST_SECONDS.observe(seconds, endpoint, str(status))
+
+
+def histogram_totals(histogram: Histogram):
+    """(count, sum) of this process's observations across all label values."""
+    count, total = 0, 0.0
+    for series in histogram.snapshot().values():
+        count += sum(series[:-1])
+        total += series[-1]
+    return count, total
+
+
+# ---------- cross-worker aggregation ----------
+
+_flush_lock = threading.Lock()
+_flush_pid = None
+
+
+def _snapshot_path(pid=None) -> str:
+    return os.path.join(METRICS_DIR, f"metrics.{pid or os.getpid()}.json")
+
+
+def flush():
+    """Write this process's series to METRICS_DIR (atomically) for the other workers to merge."""
+    data = {metric.name: [[list(labels), value] for labels, value in metric.snapshot().items()] for metric in METRICS}
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=METRICS_DIR, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp, _snapshot_path())
+
+
+def _flush_loop():
+    while True:
+        time.sleep(METRICS_FLUSH_S)
+        try:
+            flush()
+        except OSError as e:
+            log_event("metrics_flush_failed", level="warning", error=str(e))
+
+
+def _schedule_flush():
+    """Start the periodic flusher on first use in each process (threads do not survive a fork)."""
+    global _flush_pid
+    if _flush_pid != os.getpid():
+        with _flush_lock:
+            if _flush_pid != os.getpid():
+                threading.Thread(target=_flush_loop, name="metrics-flush", daemon=True).start()
+                atexit.register(flush)
+                _flush_pid = os.getpid()
+
+
+def reset_metrics_dir():
+    """Drop snapshots from previous runs; call once in the master before workers fork."""
+    for path in glob.glob(os.path.join(METRICS_DIR, "metrics.*.json")):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _merge(total, series):
+    for labels, value in series:
+        labels = tuple(labels)
+        if isinstance(value, list):
+            current = total.setdefault(labels, [0] * len(value))
+            total[labels] = [a + b for a, b in zip(current, value)]
+        else:
+            total[labels] = total.get(labels, 0) + value
+
+
+def render_metrics() -> str:
+    """
+    Prometheus text exposition of every worker's metrics: this process's live values plus
+    the last snapshot of every other worker. Snapshots of exited workers stay in the sum,
+    so totals keep growing across worker restarts.
+    """
+    own = _snapshot_path()
+    totals = {metric.name: metric.snapshot() for metric in METRICS}
+    for path in glob.glob(os.path.join(METRICS_DIR, "metrics.*.json")):
+        if path == own:
+            continue
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for metric in METRICS:
+            _merge(totals[metric.name], data.get(metric.name, []))
+    return "\n".join(metric.exposition(totals[metric.name]) for metric in METRICS) + "\n"
+
+
+# ---------- structured logging ----------
+
+logger = logging.getLogger("serrano")
+_logging_lock = threading.Lock()
+_listener_pid = None
+
+
+def _configure_logging():
+    """JSON lines on stdout, written by a background thread so requests never block on I/O."""
+    global _listener_pid
+    if _listener_pid == os.getpid():
+        return
+    with _logging_lock:
+        if _listener_pid == os.getpid():
+            return
+        # A listener inherited through fork has no thread behind it; replace it
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+        records = queue.SimpleQueue()
+        stream = logging.StreamHandler(sys.stdout)
+        stream.setFormatter(logging.Formatter("%(message)s"))
+        listener = logging.handlers.QueueListener(records, stream)
+        listener.start()
+        atexit.register(listener.stop)
+        logger.addHandler(logging.handlers.QueueHandler(records))
+        logger.setLevel(LOG_LEVEL)
+        logger.propagate = False
+        _listener_pid = os.getpid()
+
+
+def log_event(event: str, level: str = "info", sample: Optional[float] = None, **fields):
+    """
+    Log one structured event as a JSON line. Info events are sampled at `sample`
+    (default LOG_SAMPLE_RATE); warnings and errors are always kept. Fields should be
+    counts, ids and short strings, not whole records.
+    """
+    _configure_logging()
+    levelno = logging.getLevelName(level.upper())
+    if not logger.isEnabledFor(levelno):
+        return
+    rate = LOG_SAMPLE_RATE if sample is None else sample
+    if levelno < logging.WARNING and rate < 1 and random.random() >= rate:
+        return
+    record = {"ts": round(time.time(), 3), "level": level.lower(), "event": event,
+              "endpoint": _endpoint.get(), "pid": os.getpid(), **fields}
+    logger.log(levelno, json.dumps(record, default=str, ensure_ascii=False))
@@ -0,0 +1,406 @@
+"""
+Template preparation: analyze a .docx template and emit a slim, cached copy.
+
+    python -m src.template_prep [template.docx] [--out slim.docx] [--runs N]
+
+The slim copy keeps everything that can show up on a page and drops the rest:
+  - embedded fonts whose typeface no run, style or theme reference uses
+  - parts that are not reachable from the package relationships
+  - styles nothing refers to (plus the latent-style table, which only feeds Word's style gallery)
+  - oversized images are re-encoded in place when Pillow is installed
+Every generated document copies the template's parts, so this shrinks both the
+render time (fewer bytes to clone and deflate per save) and the response payload.
+"""
+import hashlib
+import io
+import json
+import os
+import posixpath
+import sys
+import tempfile
+import time
+import zipfile
+from typing import Dict, Iterable, Set
+
+from lxml import etree
+
+from src.telemetry import log_event
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+R_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+A_NS = "http://schemas.openxmlformats.org/drawingml/2006/main"
+PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+CT_NS = "http://schemas.openxmlformats.org/package/2006/content-types"
+
+# Bump when the slimming rules change so cached templates are rebuilt
+PREP_VERSION = 1
+
+TEMPLATE_CACHE_DIR = os.getenv("TEMPLATE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "serrano_templates"))
+IMAGE_MAX_BYTES = int(os.getenv("TEMPLATE_IMAGE_MAX_BYTES", str(256 * 1024)))
+IMAGE_MAX_PX = int(os.getenv("TEMPLATE_IMAGE_MAX_PX", "1600"))
+IMAGE_JPEG_QUALITY = int(os.getenv("TEMPLATE_IMAGE_JPEG_QUALITY", "85"))
+
+# Typefaces applied at render time (see src.document_pre.DOCUMENT_FONT); their embeddings stay
+KEEP_FONTS = ("Century Gothic",)
+# Styles python-docx or our renderers may ask for by name even if the template never uses them
+KEEP_STYLES = (
+    "normal", "title", "subtitle", "table grid", "normal table", "tablenormal",
+    "heading 1", "heading 2", "heading 3", "heading 4", "heading 5", "heading 6",
+)
+
+_RFONTS_ATTRS = ("ascii", "hAnsi", "cs", "eastAsia")
+_STYLE_REF_TAGS = ("pStyle", "rStyle", "tblStyle", "numStyleLink", "styleLink")
+
+
+def _w(tag):
+    return f"{{{W_NS}}}{tag}"
+
+
+def _is_xml(name):
+    return name.endswith(".xml") or name.endswith(".rels")
+
+
+def _rels_path(part):
+    folder, base = posixpath.split(part)
+    return posixpath.join(folder, "_rels", base + ".rels")
+
+
+def _resolve(source_part, target):
+    if target.startswith("/"):
+        return target.lstrip("/")
+    return posixpath.normpath(posixpath.join(posixpath.dirname(source_part), target))
+
+
+def _parse(blob):
+    return etree.fromstring(blob)
+
+
+def _serialize(root):
+    return etree.tostring(root, xml_declaration=True, encoding="UTF-8", standalone=True)
+
+
+# ---------- ANALYSIS ----------
+
+def _reachable_parts(parts: Dict[str, bytes]) -> Set[str]:
+    """Parts reachable from _rels/.rels through internal relationships."""
+    reachable, stack = set(), [""]
+    while stack:
+        part = stack.pop()
+        rels = "_rels/.rels" if part == "" else _rels_path(part)
+        if rels not in parts:
+            continue
+        reachable.add(rels)
+        for rel in _parse(parts[rels]).iter(f"{{{PKG_REL_NS}}}Relationship"):
+            if rel.get("TargetMode") == "External":
+                continue
+            target = _resolve(part or "/", rel.get("Target")) if part else rel.get("Target").lstrip("/")
+            if target in parts and target not in reachable:
+                reachable.add(target)
+                stack.append(target)
+    return reachable
+
+
+def _used_typefaces(parts: Dict[str, bytes]) -> Set[str]:
+    """Typefaces any text can resolve to: explicit w:rFonts / w:sym names, plus theme fonts if referenced."""
+    used, theme_referenced = set(KEEP_FONTS), False
+    for name, blob in parts.items():
+        if not name.startswith("word/") or not name.endswith(".xml") or name == "word/fontTable.xml":
+            continue
+        if "theme/" in name:
+            continue
+        root = _parse(blob)
+        for rfonts in root.iter(_w("rFonts")):
+            for attr in _RFONTS_ATTRS:
+                value = rfonts.get(_w(attr))
+                if value:
+                    used.add(value)
+            if any(a.endswith("Theme") or a.endswith("theme") for a in (etree.QName(k).localname for k in rfonts.attrib)):
+                theme_referenced = True
+        for sym in root.iter(_w("sym")):
+            if sym.get(_w("font")):
+                used.add(sym.get(_w("font")))
+    if theme_referenced:
+        for name, blob in parts.items():
+            if name.startswith("word/theme/"):
+                for font in _parse(blob).iter(f"{{{A_NS}}}latin"):
+                    if font.get("typeface"):
+                        used.add(font.get("typeface"))
+    return used
+
+
+def analyze_template(path: str) -> dict:
+    """Size breakdown of a template: per-part sizes, embedded fonts (and whether used), images, styles."""
+    with zipfile.ZipFile(path) as zf:
+        infos = zf.infolist()
+        parts = {info.filename: zf.read(info.filename) for info in infos}
+
+    used = _used_typefaces(parts)
+    fonts = []
+    if "word/fontTable.xml" in parts:
+        rels = {}
+        rels_name = _rels_path("word/fontTable.xml")
+        if rels_name in parts:
+            for rel in _parse(parts[rels_name]).iter(f"{{{PKG_REL_NS}}}Relationship"):
+                rels[rel.get("Id")] = _resolve("word/fontTable.xml", rel.get("Target"))
+        for font in _parse(parts["word/fontTable.xml"]).iter(_w("font")):
+            for embed in font:
+                if etree.QName(embed).localname.startswith("embed"):
+                    target = rels.get(embed.get(f"{{{R_NS}}}id"))
+                    fonts.append({
+                        "typeface": font.get(_w("name")),
+                        "variant": etree.QName(embed).localname[len("embed"):],
+                        "part": target,
+                        "bytes": len(parts.get(target, b"")),
+                        "used": font.get(_w("name")) in used,
+                    })
+
+    styles = _parse(parts["word/styles.xml"]).findall(_w("style")) if "word/styles.xml" in parts else []
+    reachable = _reachable_parts(parts)
+    return {
+        "path": path,
+        "bytes": os.path.getsize(path),
+        "parts": sorted(
+            ({"name": i.filename, "bytes": i.file_size, "compressed": i.compress_size} for i in infos),
+            key=lambda p: -p["compressed"],
+        ),
+        "embedded_fonts": fonts,
+        "images": [{"name": n, "bytes": len(b)} for n, b in parts.items() if n.startswith("word/media/")],
+        "styles": len(styles),
+        "unreachable_parts": sorted(n for n in parts if n not in reachable and n != "[Content_Types].xml"),
+    }
+
+
+# ---------- SLIMMING ----------
+
+def _drop_unused_fonts(parts, report):
+    if "word/fontTable.xml" not in parts:
+        return
+    used = _used_typefaces(parts)
+    table = _parse(parts["word/fontTable.xml"])
+    dropped_ids = set()
+    for font in table.iter(_w("font")):
+        if font.get(_w("name")) in used:
+            continue
+        for embed in list(font):
+            if etree.QName(embed).localname.startswith("embed"):
+                dropped_ids.add(embed.get(f"{{{R_NS}}}id"))
+                font.remove(embed)
+                report["dropped_fonts"].append(f"{font.get(_w('name'))} ({etree.QName(embed).localname[5:]})")
+    if not dropped_ids:
+        return
+    parts["word/fontTable.xml"] = _serialize(table)
+
+    rels_name = _rels_path("word/fontTable.xml")
+    rels = _parse(parts[rels_name])
+    for rel in list(rels):
+        if rel.get("Id") in dropped_ids:
+            rels.remove(rel)
+    parts[rels_name] = _serialize(rels)
+
+
+def _style_refs(parts) -> Set[str]:
+    refs = set()
+    for name, blob in parts.items():
+        if name.startswith("word/") and name.endswith(".xml") and name != "word/styles.xml":
+            root = _parse(blob)
+            for tag in _STYLE_REF_TAGS:
+                for el in root.iter(_w(tag)):
+                    refs.add(el.get(_w("val")))
+    return refs
+
+
+def _drop_unused_styles(parts, report):
+    if "word/styles.xml" not in parts:
+        return
+    root = _parse(parts["word/styles.xml"])
+    styles = {s.get(_w("styleId")): s for s in root.findall(_w("style"))}
+
+    keep = set(_style_refs(parts))
+    for style_id, style in styles.items():
+        name = style.find(_w("name"))
+        if style.get(_w("default")) == "1" or (name is not None and name.get(_w("val"), "").lower() in KEEP_STYLES):
+            keep.add(style_id)
+    # Everything a kept style inherits from or links to
+    stack = list(keep)
+    while stack:
+        style = styles.get(stack.pop())
+        if style is None:
+            continue
+        for tag in ("basedOn", "link", "next"):
+            el = style.find(_w(tag))
+            if el is not None and el.get(_w("val")) not in keep:
+                keep.add(el.get(_w("val")))
+                stack.append(el.get(_w("val")))
+
+    for style_id, style in styles.items():
+        if style_id not in keep:
+            root.remove(style)
+            report["dropped_styles"].append(style_id)
+    latent = root.find(_w("latentStyles"))
+    if latent is not None:
+        root.remove(latent)
+        report["dropped_styles"].append("latentStyles")
+    parts["word/styles.xml"] = _serialize(root)
+
+
+def _drop_unreachable_parts(parts, report):
+    reachable = _reachable_parts(parts)
+    for name in list(parts):
+        if name != "[Content_Types].xml" and name not in reachable:
+            del parts[name]
+            report["dropped_parts"].append(name)
+
+    types = _parse(parts["[Content_Types].xml"])
+    for override in list(types.iter(f"{{{CT_NS}}}Override")):
+        if override.get("PartName").lstrip("/") not in parts:
+            types.remove(override)
+    parts["[Content_Types].xml"] = _serialize(types)
+
+
+def _recompress_images(parts, report, max_bytes=IMAGE_MAX_BYTES):
+    oversized = [n for n, b in parts.items() if n.startswith("word/media/") and len(b) > max_bytes]
+    if not oversized:
+        return
+    try:
+        from PIL import Image
+    except ImportError:
+        report["notes"].append(f"Pillow not installed; {len(oversized)} oversized image(s) left as is")
+        return
+
+    for name in oversized:
+        original = parts[name]
+        with Image.open(io.BytesIO(original)) as image:
+            fmt = image.format
+            if max(image.size) > IMAGE_MAX_PX:
+                image.thumbnail((IMAGE_MAX_PX, IMAGE_MAX_PX))
+            out = io.BytesIO()
+            if fmt == "JPEG":
+                image.convert("RGB").save(out, "JPEG", quality=IMAGE_JPEG_QUALITY, optimize=True, progressive=True)
+            elif fmt == "PNG":
+                image.save(out, "PNG", optimize=True)
+            else:
+                continue
+        # Same format and name, so no relationship or content type changes
+        if out.tell() < len(original):
+            parts[name] = out.getvalue()
+            report["recompressed_images"].append({"name": name, "before": len(original), "after": out.tell()})
+
+
+def slim_template(source: str, dest: str) -> dict:
+    """Write a slim copy of `source` to `dest` (atomically) and return what was changed."""
+    start = time.perf_counter()
+    with zipfile.ZipFile(source) as zf:
+        order = zf.namelist()
+        parts = {name: zf.read(name) for name in order}
+
+    report = {
+        "source": source, "dest": dest, "source_bytes": os.path.getsize(source),
+        "dropped_fonts": [], "dropped_parts": [], "dropped_styles": [], "recompressed_images": [], "notes": [],
+    }
+    _drop_unused_fonts(parts, report)
+    _drop_unused_styles(parts, report)
+    _recompress_images(parts, report)
+    _drop_unreachable_parts(parts, report)
+
+    os.makedirs(os.path.dirname(os.path.abspath(dest)), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(dest)), suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        with zipfile.ZipFile(f, "w", zipfile.ZIP_DEFLATED) as zf:
+            for name in order:
+                if name in parts:
+                    zf.writestr(name, parts[name])
+    os.replace(tmp, dest)
+
+    report["slim_bytes"] = os.path.getsize(dest)
+    report["prep_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return report
+
+
+def _file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def cached_slim_template(source: str, cache_dir: str = None) -> str:
+    """
+    Path of the slim copy of `source`, building it on first use. The cache file is keyed
+    on the template's content hash and PREP_VERSION, so template edits are picked up and
+    concurrent workers never read a half-written file. A JSON report sits next to it.
+    """
+    cache_dir = cache_dir or TEMPLATE_CACHE_DIR
+    stem = os.path.splitext(os.path.basename(source))[0]
+    dest = os.path.join(cache_dir, f"{stem}.{_file_digest(source)}.v{PREP_VERSION}.docx")
+    if not os.path.exists(dest):
+        report = slim_template(source, dest)
+        with open(dest[:-len(".docx")] + ".report.json", "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        log_event("template_slimmed", sample=1.0, source=source, source_bytes=report["source_bytes"],
+                  slim_bytes=report["slim_bytes"], prep_ms=report["prep_ms"])
+    return dest
+
+
+# ---------- REPORT ----------
+
+def _time_render(path, runs, rows=50):
+    """Median open-and-save time plus output size of a document with one `rows`-row table."""
+    from docx import Document
+
+    timings, size = [], 0
+    for _ in range(runs):
+        start = time.perf_counter()
+        doc = Document(path)
+        table = doc.add_table(rows=0, cols=2)
+        for i in range(rows):
+            cells = table.add_row().cells
+            cells[0].text, cells[1].text = f"Field {i}", f"Value {i}"
+        out = io.BytesIO()
+        doc.save(out)
+        timings.append(time.perf_counter() - start)
+        size = out.tell()
+    timings.sort()
+    return {"median_ms": round(timings[len(timings) // 2] * 1000, 1), "output_bytes": size}
+
+
+def main(argv: Iterable[str] = None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("template", nargs="?", default="data/Template.docx")
+    parser.add_argument("--out", help="slim template path (default: the runtime cache)")
+    parser.add_argument("--runs", type=int, default=5, help="render timing repetitions")
+    args = parser.parse_args(argv)
+
+    before = analyze_template(args.template)
+    if args.out:
+        prep = slim_template(args.template, args.out)
+        slim_path = args.out
+    else:
+        slim_path = cached_slim_template(args.template)
+        with open(slim_path[:-len(".docx")] + ".report.json", encoding="utf-8") as f:
+            prep = json.load(f)
+    after = analyze_template(slim_path)
+
+    report = {
+        "template": args.template,
+        "slim_template": slim_path,
+        "bytes": {"before": before["bytes"], "after": after["bytes"]},
+        "embedded_fonts": before["embedded_fonts"],
+        "images": before["images"],
+        "styles": {"before": before["styles"], "after": after["styles"]},
+        "dropped_fonts": prep["dropped_fonts"],
+        "dropped_parts": prep["dropped_parts"],
+        "dropped_styles": len(prep["dropped_styles"]),
+        "recompressed_images": prep["recompressed_images"],
+        "notes": prep["notes"],
+        "prep_ms": prep["prep_ms"],
+        "render": {"before": _time_render(args.template, args.runs), "after": _time_render(slim_path, args.runs)},
+    }
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+import io
+import zipfile
+from typing import Iterable, Iterator, Tuple
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only, non-seekable sink; zipfile then emits data descriptors and never seeks back."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def iter_zip(entries: Iterable[Tuple[str, bytes]], compress: bool = False) -> Iterator[bytes]:
+    """
+    Build a ZIP archive incrementally from (name, data) pairs and yield it in chunks,
+    so only one entry is held in memory at a time. DOCX files are already deflated,
+    hence ZIP_STORED by default.
+    """
+    sink = _ChunkSink()
+    method = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+    with zipfile.ZipFile(sink, "w", method) as zf:
+        for name, data in entries:
+            zf.writestr(name, data)
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    tail = sink.drain()
+    if tail:
+        yield tail
@@ -0,0 +1,142 @@
+import io
+import os
+
+import pytest
+
+from src import cache
+from src.cache import DiskBackend, DocumentCache, LRUBackend, ResultCache
+
+
+@pytest.fixture(params=["memory", "disk"])
+def backend(request, tmp_path):
+    if request.param == "disk":
+        return DiskBackend(str(tmp_path / "cache"), max_entries=2)
+    return LRUBackend(max_entries=2)
+
+
+def test_key_ignores_case_spacing_and_table_order():
+    assert ResultCache.make_key(" John  Smith", ["b", "a", "a"]) == ResultCache.make_key("john smith", ["a", "b"])
+    assert ResultCache.make_key("john smith", ["a"]) != ResultCache.make_key("john smith", ["a", "b"])
+
+
+def test_hit_returns_a_copy_and_counts(backend):
+    results = ResultCache(backend, ttl=60)
+    assert results.get("John", ["a"]) is None
+    results.set("John", ["a"], {"rows": [1]})
+    value = results.get("john", ["a"])
+    assert value == {"rows": [1]}
+    value["rows"].append(2)
+    assert results.get("john", ["a"]) == {"rows": [1]}
+    assert (results.hits, results.misses) == (2, 1)
+
+
+def test_expired_entries_are_dropped(backend, monkeypatch):
+    results = ResultCache(backend, ttl=10)
+    now = 1_000_000.0
+    monkeypatch.setattr(cache.time, "time", lambda: now)
+    results.set("John", ["a"], {"rows": [1]})
+    now += 11
+    assert results.get("John", ["a"]) is None
+    assert len(backend) == 0
+
+
+def test_invalidate_one_entry_or_everything(backend):
+    results = ResultCache(backend, ttl=60)
+    results.set("John", ["a"], 1)
+    results.set("Ana", ["a"], 2)
+    results.invalidate("john", ["a"])
+    assert results.get("John", ["a"]) is None and results.get("Ana", ["a"]) == 2
+    results.invalidate()
+    assert results.get("Ana", ["a"]) is None
+
+
+def test_backend_keeps_at_most_max_entries(backend):
+    for i in range(4):
+        backend.set(f"k{i}", {"value": i})
+    assert len(backend) == 2
+    assert backend.get("k3") == {"value": 3}
+
+
+def test_disk_set_failure_leaves_no_temp_file(tmp_path):
+    directory = tmp_path / "cache"
+    disk = DiskBackend(str(directory))
+    circular = []
+    circular.append(circular)
+    with pytest.raises(ValueError):
+        disk.set("k", {"value": circular})
+    assert os.listdir(directory) == []
+
+
+def test_off_backend_never_caches():
+    results = ResultCache(None)
+    results.set("John", ["a"], 1)
+    assert results.get("John", ["a"]) is None
+    assert results.stats()["backend"] == "off"
+
+
+# ---------- document cache ----------
+
+
+def test_document_etag_follows_the_content_key_not_the_bytes():
+    documents = DocumentCache()
+    key = DocumentCache.make_key("layout", {"b": 1, "a": 2})
+    assert key == DocumentCache.make_key("layout", {"a": 2, "b": 1})
+    first = documents.set(key, b"render one")
+    second = documents.set(key, b"render two")
+    assert first[0] == second[0] == DocumentCache.make_etag(key)
+    assert documents.get(key) == second
+
+
+def test_documents_are_bounded_by_count_and_bytes():
+    documents = DocumentCache(max_entries=3, max_bytes=10)
+    for key in "abc":
+        documents.set(key, b"1234")
+    assert documents.get("a") is None and documents.get("c") is not None
+    assert documents.stats()["bytes"] == 8
+    documents.set("huge", b"x" * 11)
+    assert documents.get("huge") is None
+
+
+def test_fresh_request_index_expires(monkeypatch):
+    now = 100.0
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now)
+    documents = DocumentCache(fresh_s=30)
+    documents.set("content", b"doc")
+    documents.remember("request", "content")
+    assert documents.get_fresh("request")[1] == b"doc"
+    now += 31
+    assert documents.get_fresh("request") is None
+
+
+@pytest.fixture
+def client(monkeypatch):
+    import app
+
+    monkeypatch.setattr(app, "generate_reentry_care_plan_document",
+                        lambda fields, name, fmt: ("etag-1", io.BytesIO(b"docx bytes")))
+    return app.app.test_client()
+
+
+def test_care_plan_get_is_revalidated_with_304(client):
+    query = {"candidate_name": "John Smith", "selected_fields": ["Housing", "Employment"]}
+    response = client.get("/generate_reentry_care_plan", query_string=query)
+    assert response.status_code == 200 and response.data == b"docx bytes"
+    assert response.headers["ETag"] == '"etag-1"'
+    assert {"private", "no-cache"} <= set(response.headers["Cache-Control"].replace(" ", "").split(","))
+
+    response = client.get("/generate_reentry_care_plan", query_string=query, headers={"If-None-Match": '"etag-1"'})
+    assert response.status_code == 304 and response.data == b""
+
+
+def test_matching_if_none_match_on_post_is_a_failed_precondition(client):
+    body = {"candidate_name": "John Smith", "selected_fields": ["Housing"]}
+    assert client.post("/generate_reentry_care_plan", json=body).status_code == 200
+    response = client.post("/generate_reentry_care_plan", json=body, headers={"If-None-Match": '"etag-1"'})
+    assert response.status_code == 412
+    response = client.post("/generate_reentry_care_plan", json=body, headers={"If-None-Match": '"other"'})
+    assert response.status_code == 200
+
+
+def test_care_plan_get_requires_fields(client):
+    response = client.get("/generate_reentry_care_plan", query_string={"candidate_name": "John Smith"})
+    assert response.status_code == 400
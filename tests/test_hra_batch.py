@@ -0,0 +1,41 @@
+import pytest
+
+import app
+
+
+@pytest.fixture
+def client():
+    return app.app.test_client()
+
+
+def _post(client, **body):
+    body.setdefault("selected_fields", ["Housing"])
+    return client.post("/generate_hra_batch", json=body)
+
+
+@pytest.mark.parametrize("candidates, error", [
+    ([], "At least one candidate is required"),
+    ("John Smith", "candidates must be a list"),
+    (["John Smith", 42], "candidates[1]: must be a name or an object"),
+    ([{"candidate_name": " "}], "candidates[0]: candidate name is required"),
+    ([{"candidate_name": "Ana", "assessment_type": "senior"}], "candidates[0]: assessment_type"),
+])
+def test_invalid_candidates_are_rejected(client, candidates, error):
+    response = _post(client, candidates=candidates)
+    assert response.status_code == 400
+    assert response.get_json()["error"].startswith(error)
+
+
+def test_sync_batches_over_the_cap_must_go_async(client, monkeypatch):
+    monkeypatch.setattr(app, "HRA_BATCH_SYNC_MAX_ITEMS", 2)
+    submitted = []
+    monkeypatch.setattr(app.HRA_JOBS, "submit", lambda *args, **kwargs: submitted.append(args) or "0" * 32)
+    names = ["Ana", "Ben", "Cy"]
+
+    response = _post(client, candidates=names)
+    assert response.status_code == 400
+    assert '"async": true' in response.get_json()["error"]
+
+    response = _post(client, candidates=names, **{"async": True})
+    assert response.status_code == 202
+    assert [item["candidate_name"] for item in submitted[0][1]] == names
@@ -0,0 +1,56 @@
+"""
+Importing src.reentry_care_plan must not touch the network (Cloud SQL, BigQuery) and must
+stay cheap, since every gunicorn worker pays it before serving its first request.
+"""
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_BUDGET_S = 1.0
+# The module's own share once pandas and python-docx (most of the total) are already loaded
+OWN_BUDGET_S = 0.25
+
+# Run in a fresh interpreter so nothing is already imported and the sockets stay blocked
+_PROBE = """
+import json, socket, sys, time
+
+def refuse(*args, **kwargs):
+    raise AssertionError(f"network access during import: {args[-1] if args else kwargs}")
+
+socket.socket.connect = refuse
+socket.socket.connect_ex = refuse
+socket.create_connection = refuse
+
+for name in sys.argv[1:]:
+    __import__(name)
+
+start = time.perf_counter()
+import src.reentry_care_plan
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    "elapsed_s": elapsed,
+    "lazy": [m for m in ("google.cloud.bigquery", "sqlalchemy", "pymysql", "streamlit") if m in sys.modules],
+}))
+"""
+
+
+def _probe(*preload):
+    result = subprocess.run([sys.executable, "-c", _PROBE, *preload], cwd=ROOT, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_import_makes_no_connections_and_fits_the_budget():
+    report = _probe()
+    assert report["elapsed_s"] < IMPORT_BUDGET_S, f"import took {report['elapsed_s']:.2f}s"
+
+
+def test_own_import_cost_fits_the_budget():
+    report = _probe("pandas", "docx")
+    assert report["elapsed_s"] < OWN_BUDGET_S, f"import took {report['elapsed_s']:.2f}s after pandas/docx"
+
+
+def test_backend_clients_are_imported_lazily():
+    assert _probe()["lazy"] == []
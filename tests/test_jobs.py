@@ -0,0 +1,73 @@
+import io
+import threading
+import time
+
+import pytest
+
+from src.jobs import JobQueue, QueueFull
+
+
+def _wait_until_finished(queue, job_id, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        meta = queue.status(job_id)
+        if meta["status"] in ("done", "failed"):
+            return meta
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_job_runs_and_its_result_can_be_read_back(tmp_path):
+    queue = JobQueue(str(tmp_path), max_workers=1, max_pending=2)
+    job_id = queue.submit(lambda text: io.BytesIO(text.encode()), "hello", filename="a.docx")
+    meta = _wait_until_finished(queue, job_id)
+    assert meta["status"] == "done" and meta["filename"] == "a.docx"
+    with open(queue.result_path(job_id), "rb") as f:
+        assert f.read() == b"hello"
+    assert queue.pending == 0
+
+
+def test_failed_job_records_the_error_and_frees_its_slot(tmp_path):
+    queue = JobQueue(str(tmp_path), max_workers=1, max_pending=1)
+
+    def fail():
+        raise RuntimeError("no data")
+
+    meta = _wait_until_finished(queue, queue.submit(fail))
+    assert meta["status"] == "failed" and meta["error"] == "no data"
+    assert queue.result_path(meta["job_id"]) is None
+    queue.submit(lambda: io.BytesIO(b""))
+
+
+def test_full_queue_raises_until_a_job_finishes(tmp_path):
+    queue = JobQueue(str(tmp_path), max_workers=1, max_pending=2)
+    release = threading.Event()
+    blocked = [queue.submit(lambda: release.wait(5) and io.BytesIO(b"x")) for _ in range(2)]
+    with pytest.raises(QueueFull):
+        queue.submit(lambda: io.BytesIO(b"y"))
+    release.set()
+    for job_id in blocked:
+        _wait_until_finished(queue, job_id)
+    queue.submit(lambda: io.BytesIO(b"y"))
+
+
+def test_unknown_or_malformed_job_ids(tmp_path):
+    queue = JobQueue(str(tmp_path))
+    assert queue.status("0" * 32) is None
+    assert queue.status("../../etc/passwd") is None
+    assert queue.result_path("0" * 32) is None
+
+
+def test_submit_endpoint_returns_429_with_retry_after_when_full(tmp_path, monkeypatch):
+    import app
+
+    queue = JobQueue(str(tmp_path), max_workers=1, max_pending=1)
+    release = threading.Event()
+    queue.submit(lambda: release.wait(5) and io.BytesIO(b"x"))
+    monkeypatch.setattr(app, "HRA_JOBS", queue)
+
+    body = {"assessment_type": "adult", "candidate_name": "John Smith", "selected_fields": ["Housing"]}
+    response = app.app.test_client().post("/hra_jobs", json=body)
+    release.set()
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "30"
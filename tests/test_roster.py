@@ -0,0 +1,65 @@
+import os
+
+import pandas as pd
+import pytest
+
+from src import snapshot
+from src.roster import RosterStore
+
+
+def _write(path, rows, mtime=None):
+    pd.DataFrame(rows, columns=["Name of the youth", "Medical ID Number", "Housing"]).to_excel(path, index=False)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+@pytest.fixture(params=["pandas", "snapshot"])
+def roster(request, tmp_path, monkeypatch):
+    """Every test runs against pd.read_excel and against the memory-mapped snapshot."""
+    monkeypatch.setattr(snapshot, "SNAPSHOTS_ENABLED", request.param == "snapshot")
+    monkeypatch.setattr(snapshot, "SNAPSHOT_DIR", str(tmp_path / "snapshots"))
+    path = str(tmp_path / "roster.xlsx")
+    _write(path, [
+        ["John Smith", 1001, "Shelter"],
+        ["Ana Lopez", 1002, None],
+        ["john smith ", 1003, "Family"],
+    ], mtime=1_000_000)
+    return path
+
+
+def test_name_lookup_ignores_case_and_whitespace_and_keeps_sheet_order(roster):
+    store = RosterStore(roster, check_interval=0)
+    assert [r["Medical ID Number"] for r in store.find_by_name("  JOHN SMITH")] == [1001, 1003]
+    assert store.find_by_name("Nobody") == []
+
+
+def test_medical_id_lookup_accepts_int_float_and_str(roster):
+    store = RosterStore(roster, check_interval=0)
+    for key in (1002, 1002.0, "1002", " 1002 "):
+        assert store.find_by_medical_id(key)["Name of the youth"] == "Ana Lopez"
+    assert store.find_by_medical_id("9999") == {}
+
+
+def test_missing_cells_are_nan_like_the_dataframe_path(roster):
+    record = RosterStore(roster, check_interval=0).find_by_medical_id(1002)
+    assert pd.isna(record["Housing"])
+
+
+def test_returned_rows_are_copies(roster):
+    store = RosterStore(roster, check_interval=0)
+    store.find_by_medical_id(1001)["Housing"] = "changed"
+    assert store.find_by_medical_id(1001)["Housing"] == "Shelter"
+
+
+def test_normalize_is_applied_before_indexing(roster):
+    rename = lambda df: df.rename(columns={"Name of the youth": "Name", "Medical ID Number": "ID"})
+    store = RosterStore(roster, normalize=rename, name_column="Name", id_column="ID", check_interval=0)
+    assert store.find_by_medical_id(1003)["Name"] == "john smith "
+
+
+def test_reloads_when_the_workbook_changes(roster):
+    store = RosterStore(roster, check_interval=0)
+    assert store.find_by_medical_id(1004) == {}
+    _write(roster, [["New Person", 1004, "Shelter"]], mtime=2_000_000)
+    assert store.find_by_medical_id(1004)["Name of the youth"] == "New Person"
+    assert store.find_by_name("John Smith") == []
@@ -0,0 +1,115 @@
+from contextlib import contextmanager
+
+import pytest
+
+from src.search import CandidateIndex, SearchSource, bounded_edit_distance, normalize_text
+
+
+def _people(*names, start=1000):
+    return [{"name": name, "medical_id": str(start + i), "display_text": f"{name} - Medical ID-{start + i}"}
+            for i, name in enumerate(names)]
+
+
+def _index(rows, **sources):
+    index = CandidateIndex({"excel": SearchSource(lambda: rows), **sources})
+    index.refresh(force=True)
+    return index
+
+
+def test_normalize_and_edit_distance():
+    assert normalize_text("  José  O'Brien-Smith ") == "jose o brien smith"
+    assert bounded_edit_distance("jonh", "john", 1) == 1
+    assert bounded_edit_distance("smtih", "smith", 1) == 1
+    assert bounded_edit_distance("abcdef", "uvwxyz", 2) == 3
+
+
+def test_exact_before_prefix_before_fuzzy():
+    index = _index(_people("John Smith", "John Smithers", "Jon Smit"))
+    results = index.search("john smith")
+    assert [(r["name"], r["match"]) for r in results[:2]] == [("John Smith", "exact"), ("John Smithers", "prefix")]
+    assert results[0]["score"] > results[1]["score"]
+
+
+def test_word_prefixes_in_any_order():
+    index = _index(_people("John Smith", "Ana Lopez"))
+    assert [r["name"] for r in index.search("sm jo")] == ["John Smith"]
+
+
+def test_typos_are_tolerated_per_word():
+    index = _index(_people("John Smith", "Ana Lopez"))
+    results = index.search("jonh smtih")
+    assert [(r["name"], r["match"]) for r in results] == [("John Smith", "fuzzy")]
+    assert index.search("xq") == []
+
+
+def test_rare_word_is_found_among_many_common_ones():
+    index = _index(_people(*[f"John Person{i}" for i in range(2000)], "John Smith"))
+    assert [r["name"] for r in index.search("john smi", limit=3)] == ["John Smith"]
+
+
+def test_medical_id_prefix_and_display_string():
+    index = _index(_people("John Smith", "Ana Lopez"))
+    assert {(r["medical_id"], r["match"]) for r in index.search("100")} == {("1000", "id"), ("1001", "id")}
+    assert [r["name"] for r in index.search("Whatever - Medical ID-1001")] == ["Ana Lopez"]
+
+
+def test_earlier_sources_win_and_all_sources_are_listed():
+    sql = _people("Johnny Smith", "Bo Diaz", start=1000)
+    index = _index(_people("John Smith"), sql=SearchSource(lambda: sql))
+    by_id = {r["medical_id"]: r for r in index.search("1")}
+    assert by_id["1000"]["name"] == "John Smith" and by_id["1000"]["sources"] == ["excel", "sql"]
+    assert by_id["1001"]["sources"] == ["sql"]
+
+
+def test_refresh_applies_only_changed_rows():
+    rows = _people("John Smith", "Ana Lopez")
+    index = _index(rows)
+    rows[:] = _people("John Smith", "Ana Lopes")
+    assert index.refresh(force=True) == {"excel": 1}
+    assert index.search("ana lopez")[0]["match"] == "fuzzy"
+    rows[:] = _people("John Smith")
+    index.refresh(force=True)
+    assert index.search("ana") == []
+
+
+def test_unchanged_version_skips_the_load_until_max_age(monkeypatch):
+    loads = []
+    source = SearchSource(lambda: loads.append(1) or _people("John Smith"), lambda: "v1", interval=0, max_age=60)
+    index = CandidateIndex({"sql": source})
+    index.refresh()
+    index.refresh()
+    assert len(loads) == 1
+    source.loaded_at -= 61
+    index.refresh()
+    assert len(loads) == 2
+
+
+def test_unknown_version_reloads_every_max_age_not_every_check():
+    loads = []
+    source = SearchSource(lambda: loads.append(1) or [], lambda: None, interval=0, max_age=60)
+    index = CandidateIndex({"sql": source})
+    index.refresh()
+    index.refresh()
+    assert len(loads) == 1
+    source.max_age = None
+    index.refresh()
+    assert len(loads) == 2
+
+
+def test_cloud_sql_version_falls_back_to_the_row_count(monkeypatch):
+    sqlalchemy = pytest.importorskip("sqlalchemy")
+    import src.reentry_care_plan as reentry
+
+    engine = sqlalchemy.create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f"CREATE TABLE {reentry.SQL_TABLE} (id INTEGER)")
+        conn.exec_driver_sql(f"INSERT INTO {reentry.SQL_TABLE} VALUES (1), (2)")
+
+    @contextmanager
+    def connection():
+        with engine.connect() as conn:
+            yield conn
+
+    # SQLite has no information_schema, like an engine that doesn't track UPDATE_TIME
+    monkeypatch.setattr(reentry.db, "connection", connection)
+    assert reentry._cloud_sql_version() == ("rows", 2)
@@ -0,0 +1,121 @@
+import math
+import os
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from src import snapshot
+from src.roster import RosterStore, normalize_name_key
+
+
+@pytest.fixture(autouse=True)
+def snapshot_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshot, "SNAPSHOTS_ENABLED", True)
+    monkeypatch.setattr(snapshot, "SNAPSHOT_REBUILD", True)
+    monkeypatch.setattr(snapshot, "SNAPSHOT_DIR", str(tmp_path / "snapshots"))
+
+
+ROWS = {
+    "Name of the youth": ["John Smith", "Ana Lopez", None, "john smith"],
+    "Medical ID Number": [1001, 1002, 1003, 1004],
+    "Score": [1.5, None, 3.0, 4.25],
+    "Active": [True, False, True, True],
+    "Notes": ["a", 7, None, "d"],  # mixed types are kept as text
+}
+
+
+def _write(path, rows=ROWS, mtime=1_000_000):
+    pd.DataFrame(rows).to_excel(path, index=False)
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def _same(a, b):
+    if isinstance(a, float) and isinstance(b, float) and math.isnan(a) and math.isnan(b):
+        return True
+    return a == b
+
+
+def _assert_rows_equal(left, right):
+    assert len(left) == len(right)
+    for a, b in zip(left, right):
+        assert a.keys() == b.keys()
+        assert all(_same(a[k], b[k]) for k in a), (a, b)
+
+
+def test_snapshot_rows_match_the_pandas_records(tmp_path):
+    source = _write(str(tmp_path / "roster.xlsx"))
+    expected = snapshot.read_source(source)
+    expected["Notes"] = expected["Notes"].map(lambda v: v if pd.isna(v) else str(v))
+    expected = expected.to_dict(orient="records")
+
+    snap = snapshot.load_snapshot(source)
+    _assert_rows_equal([snap.row(i) for i in range(snap.num_rows)], expected)
+    _assert_rows_equal(snap.records(), expected)
+
+
+def test_roster_store_answers_the_same_on_both_paths(tmp_path, monkeypatch):
+    # Mixed-type columns are the one known difference (text in the snapshot), so leave them out
+    source = _write(str(tmp_path / "roster.xlsx"), {k: v for k, v in ROWS.items() if k != "Notes"})
+    mapped = RosterStore(source, check_interval=0)
+    monkeypatch.setattr(snapshot, "SNAPSHOTS_ENABLED", False)
+    parsed = RosterStore(source, check_interval=0)
+    parsed.records()
+    monkeypatch.setattr(snapshot, "SNAPSHOTS_ENABLED", True)
+
+    for name in ("john smith", "Ana Lopez", float("nan"), "nobody"):
+        _assert_rows_equal(mapped.find_by_name(name), parsed.find_by_name(name))
+    for medical_id in (1001, "1003", 1004.0, 9999):
+        _assert_rows_equal([mapped.find_by_medical_id(medical_id)], [parsed.find_by_medical_id(medical_id)])
+    assert mapped._snapshot is not None and parsed._snapshot is None
+
+
+def test_missing_names_index_under_the_same_key_as_pandas(tmp_path):
+    snap = snapshot.load_snapshot(_write(str(tmp_path / "roster.xlsx")))
+    by_name = snap.positions_by("Name of the youth", normalize_name_key)
+    assert by_name == {"john smith": [0, 3], "ana lopez": [1], "nan": [2]}
+    assert snap.positions_by("No such column", normalize_name_key) == {}
+
+
+def test_changed_source_is_rebuilt(tmp_path):
+    source = _write(str(tmp_path / "roster.xlsx"))
+    assert snapshot.load_snapshot(source).num_rows == 4
+    _write(source, {**{k: v[:2] for k, v in ROWS.items()}}, mtime=2_000_000)
+    snap = snapshot.load_snapshot(source)
+    assert snap.num_rows == 2
+    assert snap.metadata["source_mtime_ns"] == 2_000_000 * 10**9
+
+
+def test_stale_snapshot_is_ignored_when_rebuilds_are_off(tmp_path, monkeypatch):
+    source = _write(str(tmp_path / "roster.xlsx"))
+    snapshot.write_snapshot(source)
+    _write(source, {**{k: v[:2] for k, v in ROWS.items()}}, mtime=2_000_000)
+    monkeypatch.setattr(snapshot, "SNAPSHOT_REBUILD", False)
+    assert snapshot.load_snapshot(source) is None
+
+
+def test_same_bytes_with_a_new_mtime_is_still_current(tmp_path, monkeypatch):
+    source = _write(str(tmp_path / "roster.xlsx"))
+    snapshot.write_snapshot(source)
+    os.utime(source, (3_000_000, 3_000_000))
+
+    def no_rebuild(*args):
+        raise AssertionError("snapshot was rebuilt")
+
+    monkeypatch.setattr(snapshot, "write_snapshot", no_rebuild)
+    assert snapshot.load_snapshot(source).num_rows == 4
+
+
+def test_older_snapshot_version_is_rebuilt(tmp_path, monkeypatch):
+    source = _write(str(tmp_path / "roster.xlsx"))
+    snapshot.write_snapshot(source)
+    monkeypatch.setattr(snapshot, "SNAPSHOT_VERSION", snapshot.SNAPSHOT_VERSION + 1)
+    assert snapshot.load_snapshot(source).metadata["version"] == snapshot.SNAPSHOT_VERSION
+
+
+def test_disabled_snapshots_and_source_names(monkeypatch):
+    assert snapshot.snapshot_path("ExcelFiles/row_1.xlsx") != snapshot.snapshot_path("ExcelFiles/row_1.csv")
+    monkeypatch.setattr(snapshot, "SNAPSHOTS_ENABLED", False)
+    assert snapshot.load_snapshot("ExcelFiles/does-not-matter.xlsx") is None
@@ -0,0 +1,68 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src import sources
+from src.sources import SourceError, fan_out
+
+
+def _fail():
+    raise ValueError("boom")
+
+
+def test_partial_results_keep_call_order_and_map_failures_to_default():
+    release = threading.Event()
+    results = fan_out(
+        {"slow": lambda: release.wait(5), "ok": lambda: 1, "broken": _fail},
+        default=list,
+        timeouts={"slow": 0.2},
+    )
+    release.set()
+    assert list(results) == ["slow", "ok", "broken"]
+    assert results == {"slow": [], "ok": 1, "broken": []}
+    assert results["slow"] is not results["broken"]
+
+
+def test_timeout_is_one_deadline_from_submission():
+    release = threading.Event()
+    start = time.monotonic()
+    results = fan_out({"stuck_deadline": lambda: release.wait(5)}, timeouts={"stuck_deadline": 0.3})
+    elapsed = time.monotonic() - start
+    release.set()
+    assert results == {"stuck_deadline": None}
+    assert elapsed < 0.5
+
+
+def test_required_source_failure_raises():
+    with pytest.raises(SourceError) as info:
+        fan_out({"a": lambda: 1, "b": _fail}, required=["b"])
+    assert info.value.failures == {"b": "boom"}
+
+
+def test_full_pool_refuses_instead_of_queueing(monkeypatch):
+    monkeypatch.setenv("SOURCE_FANOUT_WORKERS_FULL_POOL", "1")
+    release = threading.Event()
+    fan_out({"full_pool": lambda: release.wait(5)}, timeouts={"full_pool": 0.1})
+
+    start = time.monotonic()
+    results = fan_out({"full_pool": lambda: 1}, default="refused", timeouts={"full_pool": 5})
+    assert results == {"full_pool": "refused"}
+    assert time.monotonic() - start < 0.5
+
+    release.set()
+    time.sleep(0.1)
+    assert fan_out({"full_pool": lambda: 1}) == {"full_pool": 1}
+
+
+def test_cancelled_call_gives_its_slot_back():
+    pool = sources._SourcePool("cancelled", 1)
+    # Keep the pool's only thread busy so the next call is queued, then cancel it
+    busy = threading.Event()
+    pool._executor = ThreadPoolExecutor(max_workers=1)
+    pool._executor.submit(busy.wait, 5)
+    queued = pool.submit(lambda: 1)
+    assert queued is not None and queued.cancel()
+    busy.set()
+    assert pool.submit(lambda: 2).result(timeout=1) == 2
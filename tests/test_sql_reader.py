@@ -0,0 +1,55 @@
+import pytest
+
+from src.sql_reader import SQLTableReader
+
+sqlalchemy = pytest.importorskip("sqlalchemy")
+
+
+@pytest.fixture
+def conn():
+    engine = sqlalchemy.create_engine("sqlite://")
+    with engine.connect() as conn:
+        conn.exec_driver_sql(
+            "CREATE TABLE people (youth_name TEXT, housing TEXT, medical_id_number TEXT, notes TEXT)")
+        conn.exec_driver_sql(
+            "INSERT INTO people VALUES ('John Smith', 'Shelter', '1001', 'n1'), ('Ana Lopez', NULL, '1002', 'n2'),"
+            " ('John Smith', 'Family', '1003', 'n3'), ('Bo Diaz', 'Shelter', '1004', 'n4')")
+        yield conn
+
+
+@pytest.fixture
+def reader():
+    return SQLTableReader("people", ["housing", "employment"])
+
+
+def test_selects_only_wanted_columns_that_exist_in_table_order(reader, conn):
+    assert reader.columns(conn) == ["youth_name", "housing", "medical_id_number"]
+    assert list(reader.fetch(medical_id=1001, conn=conn).columns) == ["medical_id_number", "youth_name", "housing"]
+
+
+def test_fetch_by_id_wins_over_name(reader, conn):
+    assert reader.fetch(name="John Smith", medical_id=1002, conn=conn)["youth_name"].tolist() == ["Ana Lopez"]
+    assert reader.fetch(name="John Smith", conn=conn)["medical_id_number"].tolist() == ["1001", "1003"]
+
+
+def test_values_are_bound_not_interpolated(reader, conn):
+    assert reader.fetch(name="x' OR '1'='1", conn=conn).empty
+    assert reader._statement(conn, "name") is reader._statement(conn, "name")
+
+
+def test_fetch_many_queries_in_chunks(reader, conn):
+    frame = reader.fetch_many(["1001", 1002, "1004", "9999"], chunk_size=2, conn=conn)
+    assert sorted(frame["medical_id_number"]) == ["1001", "1002", "1004"]
+    assert reader.fetch_many([], conn=conn).empty
+
+
+def test_fetch_all_projects_the_requested_columns(reader, conn):
+    frame = reader.fetch_all(["youth_name", "notes"], conn=conn)
+    assert list(frame.columns) == ["medical_id_number", "youth_name"]
+    assert len(frame) == 4
+
+
+def test_ensure_indexes_creates_only_missing_ones(reader, conn):
+    assert len(reader.index_ddl(conn)) == 2
+    assert len(reader.ensure_indexes(conn)) == 2
+    assert reader.index_ddl(conn) == []